@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        # Register background job handlers
+        from . import assignment, duplication, item_analysis, regrade  # noqa: F401
+
+        from django.conf import settings
+        if getattr(settings, 'LEADERBOARD_INDEX_WARM_ON_STARTUP', False):
+            from .rank_index import warm_on_startup
+            warm_on_startup()
@@ -0,0 +1,121 @@
+"""
+Set-based course assignment.
+
+Learners are resolved (explicit user ids plus team members, minus anyone already
+enrolled) in a single query, and enrollments are inserted in batches that ignore
+conflicts on ``unique_together(course, user)``, so concurrent assignments of the
+same course never fail and never double-enroll.
+
+Org-wide rollouts run as an ``assign_course`` background job that walks the learners
+in id order, one chunk per transaction, and records its position with each chunk so
+``manage.py run_jobs --resume`` can continue after a worker restart.
+"""
+
+import uuid
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from .counters import apply_counter_deltas
+from .jobs import register_job
+from .models import Profile, Course, Enrollment, TeamMember
+
+BATCH_SIZE = 1000
+
+
+def _valid_uuids(values):
+    valid = []
+    for value in values or []:
+        try:
+            valid.append(uuid.UUID(str(value)))
+        except ValueError:
+            continue
+    return valid
+
+
+def learner_ids(user_ids=(), team_ids=()):
+    """
+    Queryset of ids of users named in ``user_ids`` or belonging to ``team_ids``, ordered
+    by id. Unknown or malformed ids are ignored.
+    """
+    members = TeamMember.objects.filter(team_id__in=_valid_uuids(team_ids)).values('user_id')
+    return (
+        Profile.objects.filter(Q(id__in=_valid_uuids(user_ids)) | Q(id__in=members))
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+
+
+def learners_to_enroll(course, user_ids=(), team_ids=()):
+    """Like ``learner_ids`` but excluding users already enrolled in ``course``."""
+    enrolled = Enrollment.objects.filter(course=course, user=OuterRef('pk'))
+    return learner_ids(user_ids, team_ids).filter(~Exists(enrolled))
+
+
+def enroll_users(course, user_ids, assigned_by):
+    """
+    Insert 'assigned' enrollments for ``user_ids`` and return how many rows were created.
+
+    Rows that lose a race with a concurrent assignment are skipped by the conflict-ignoring
+    insert; the created count comes from looking up the primary keys we generated.
+    """
+    created = 0
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        rows = [
+            Enrollment(course=course, user_id=user_id, assigned_by=assigned_by, status='assigned')
+            for user_id in user_ids[start:start + BATCH_SIZE]
+        ]
+        Enrollment.objects.bulk_create(rows, ignore_conflicts=True)
+        inserted = Enrollment.objects.filter(id__in=[row.id for row in rows]).count()
+        # bulk_create bypasses the Enrollment signals that keep course counters current
+        apply_counter_deltas(course.id, total_enrolled=inserted, assigned=inserted)
+        created += inserted
+    return created
+
+
+@transaction.atomic
+def assign_course(course, assigned_by, user_ids=(), team_ids=()):
+    """Enroll the given users and team members in ``course``; returns the number of new enrollments."""
+    return enroll_users(course, learners_to_enroll(course, user_ids, team_ids), assigned_by)
+
+
+@register_job('assign_course')
+def assign_course_job(job):
+    """
+    Enroll ``payload['user_ids']`` and members of ``payload['team_ids']`` chunk by chunk.
+
+    ``job.progress`` holds total/processed/created/skipped counts and the last user id
+    handled; it is saved in the same transaction as the chunk's enrollments.
+    """
+    payload = job.payload
+    course = Course.objects.get(id=payload['course_id'])
+    assigned_by = Profile.objects.filter(id=payload.get('assigned_by_id')).first()
+    candidates = learner_ids(payload.get('user_ids'), payload.get('team_ids'))
+
+    progress = job.progress
+    if not progress:
+        progress = {'total': candidates.count(), 'processed': 0, 'created': 0, 'skipped': 0, 'cursor': None}
+        job.progress = progress
+        job.save(update_fields=['progress', 'updated_at'])
+
+    while True:
+        chunk = candidates
+        if progress['cursor']:
+            chunk = chunk.filter(id__gt=progress['cursor'])
+        chunk_ids = list(chunk[:BATCH_SIZE])
+        if not chunk_ids:
+            break
+        with transaction.atomic():
+            enrolled = set(
+                Enrollment.objects.filter(course=course, user_id__in=chunk_ids).values_list('user_id', flat=True)
+            )
+            created = enroll_users(course, [uid for uid in chunk_ids if uid not in enrolled], assigned_by)
+            progress['processed'] += len(chunk_ids)
+            progress['created'] += created
+            progress['skipped'] += len(chunk_ids) - created
+            progress['cursor'] = str(chunk_ids[-1])
+            job.progress = progress
+            job.save(update_fields=['progress', 'updated_at'])
+
+    return {key: progress[key] for key in ('processed', 'created', 'skipped')}
@@ -0,0 +1,86 @@
+"""
+Denormalized per-course enrollment counters.
+
+``CourseEnrollmentCounter`` holds total/assigned/in_progress/completed for each course
+so course cards and stats read one row instead of counting ``enrollments``. Single-row
+Enrollment writes are tracked through signals (see courses.signals); bulk paths call
+``apply_counter_deltas`` themselves. ``rebuild_counters`` (and the
+``rebuild_enrollment_counters`` command) recomputes everything from scratch.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import Enrollment, CourseEnrollmentCounter
+
+COUNTER_STATUSES = ('assigned', 'in_progress', 'completed')
+
+
+def apply_counter_deltas(course_id, **deltas):
+    """Atomically add ``deltas`` (e.g. ``total_enrolled=1, assigned=1``) to a course's counters."""
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = {name: F(name) + delta for name, delta in deltas.items()}
+    if CourseEnrollmentCounter.objects.filter(course_id=course_id).update(**updates):
+        return
+    # First enrollment for this course: create the row, tolerating a concurrent creator.
+    CourseEnrollmentCounter.objects.bulk_create([CourseEnrollmentCounter(course_id=course_id)], ignore_conflicts=True)
+    CourseEnrollmentCounter.objects.filter(course_id=course_id).update(**updates)
+
+
+def status_change_deltas(old_status, new_status):
+    deltas = {}
+    if old_status in COUNTER_STATUSES:
+        deltas[old_status] = -1
+    if new_status in COUNTER_STATUSES:
+        deltas[new_status] = deltas.get(new_status, 0) + 1
+    return deltas
+
+
+def enrollment_created(enrollment):
+    apply_counter_deltas(enrollment.course_id, total_enrolled=1, **status_change_deltas(None, enrollment.status))
+
+
+def enrollment_status_changed(enrollment, old_status):
+    if old_status != enrollment.status:
+        apply_counter_deltas(enrollment.course_id, **status_change_deltas(old_status, enrollment.status))
+
+
+def enrollment_deleted(enrollment, status):
+    apply_counter_deltas(enrollment.course_id, total_enrolled=-1, **status_change_deltas(status, None))
+
+
+def read_counters(course_ids):
+    """Return ``{course_id: {'total_enrolled', 'assigned', 'in_progress', 'completed'}}``; one indexed lookup."""
+    empty = dict.fromkeys(('total_enrolled',) + COUNTER_STATUSES, 0)
+    counts = {str(course_id): dict(empty) for course_id in course_ids}
+    rows = CourseEnrollmentCounter.objects.filter(course_id__in=course_ids).values(
+        'course_id', 'total_enrolled', *COUNTER_STATUSES
+    )
+    for row in rows:
+        counts[str(row.pop('course_id'))] = row
+    return counts
+
+
+@transaction.atomic
+def rebuild_counters(course_ids=None):
+    """Recompute counters from ``enrollments`` with one grouped aggregate; returns the number of rows written."""
+    counters = CourseEnrollmentCounter.objects.all()
+    enrollments = Enrollment.objects.all()
+    if course_ids is not None:
+        counters = counters.filter(course_id__in=course_ids)
+        enrollments = enrollments.filter(course_id__in=course_ids)
+    counters.delete()
+    rows = (
+        enrollments.values('course_id')
+        .annotate(
+            total_enrolled=Count('id'),
+            **{name: Count('id', filter=Q(status=name)) for name in COUNTER_STATUSES}
+        )
+        .order_by()
+    )
+    created = CourseEnrollmentCounter.objects.bulk_create(
+        [CourseEnrollmentCounter(**row) for row in rows], batch_size=1000
+    )
+    return len(created)
@@ -0,0 +1,121 @@
+"""
+Learner-facing quiz delivery.
+
+A quiz's delivery payload (settings plus questions without ``correct_answer``) is
+built once and cached until the quiz or one of its questions changes, so opening a
+quiz does not read the questions table. Question and option order are applied per
+request from a deterministic seed (quiz, learner and attempt), so a learner sees the
+same order every time they reload an attempt while different attempts and learners
+get different orders.
+
+Options are delivered as ``{"id": <original index>, "text": ...}`` so answers can be
+given by id whatever order they were shown in; ``courses.grading`` accepts both.
+"""
+
+import hashlib
+import random
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+
+from .models import Quiz, Question
+
+PAYLOAD_TIMEOUT = 24 * 3600
+# Items of these types must never be shown in their stored (answer) order
+ALWAYS_SHUFFLED = ('ordering',)
+SHUFFLED_OPTIONS = ('multiple_choice', 'multiple_answer')
+
+
+def _cache_key(quiz_id):
+    return f'quiz:delivery:{quiz_id}'
+
+
+def _option_text(option):
+    if isinstance(option, dict):
+        for field in ('text', 'label', 'value'):
+            if field in option:
+                return option[field]
+    return option
+
+
+def question_payload(question):
+    item = {
+        'id': str(question.id),
+        'type': question.type,
+        'text': question.text,
+        'points': question.points,
+        'options': [{'id': index, 'text': _option_text(option)} for index, option in enumerate(question.options or [])],
+    }
+    correct = question.correct_answer
+    if question.type == 'ordering' and not item['options'] and isinstance(correct, list):
+        # Items only stored in the key: deliver them sorted, the seed shuffles them
+        item['options'] = [{'id': text, 'text': text} for text in sorted(map(str, correct))]
+    elif question.type == 'matching' and correct:
+        pairs = correct.items() if isinstance(correct, dict) else [
+            (pair['left'], pair['right']) if isinstance(pair, dict) else pair for pair in correct
+        ]
+        pairs = [(str(left), str(right)) for left, right in pairs]
+        item['left'] = [left for left, _ in pairs]
+        item['right'] = sorted(right for _, right in pairs)
+    return item
+
+
+def build_payload(quiz):
+    questions = Question.objects.filter(quiz=quiz).only('id', 'type', 'text', 'options', 'correct_answer', 'points', 'order')
+    return {
+        'id': str(quiz.id),
+        'course_id': str(quiz.unit.course_id),
+        'unit_id': str(quiz.unit_id),
+        'time_limit': quiz.time_limit,
+        'passing_score': quiz.passing_score,
+        'attempts_allowed': quiz.attempts_allowed,
+        'randomize_questions': quiz.randomize_questions,
+        'questions': [question_payload(question) for question in questions],
+        # Drawn per attempt from question banks (courses.question_banks)
+        'bank_draws': [
+            [str(bank_id), category, count]
+            for bank_id, category, count in quiz.bank_draws.values_list('bank_id', 'category', 'count')
+        ],
+    }
+
+
+def delivery_payload(quiz_id):
+    """Cached, answer-free payload of ``quiz_id``, or None for an unknown quiz."""
+    key = _cache_key(quiz_id)
+    payload = cache.get(key)
+    if payload is None:
+        try:
+            quiz = Quiz.objects.select_related('unit').filter(pk=quiz_id).first()
+        except ValidationError:
+            return None
+        if quiz is None:
+            return None
+        payload = build_payload(quiz)
+        cache.set(key, payload, PAYLOAD_TIMEOUT)
+    return payload
+
+
+def invalidate_delivery_payload(quiz_id):
+    cache.delete(_cache_key(quiz_id))
+
+
+def delivery_seed(quiz_id, user_id, attempt_id=None):
+    digest = hashlib.sha256(f'{quiz_id}:{user_id}:{attempt_id or ""}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def render(payload, seed):
+    """Copy of ``payload`` with question/option order drawn from ``seed``."""
+    rng = random.Random(seed)
+    randomize = payload['randomize_questions']
+    questions = []
+    for question in payload['questions']:
+        question = dict(question)
+        if question['type'] in ALWAYS_SHUFFLED or (randomize and question['type'] in SHUFFLED_OPTIONS):
+            question['options'] = rng.sample(question['options'], len(question['options']))
+        if 'right' in question:
+            question['right'] = rng.sample(question['right'], len(question['right']))
+        questions.append(question)
+    if randomize:
+        rng.shuffle(questions)
+    return {**payload, 'questions': questions}
@@ -0,0 +1,89 @@
+"""
+Course duplication.
+
+Copies a course with all of its units, every unit detail table, quiz questions and
+question bank draws, and module sequencing rules. Each table is read once and written with batched inserts,
+all inside a single transaction, so a copy is either complete or not there at all.
+"""
+
+from django.db import transaction
+from django.utils import timezone
+
+from .jobs import register_job
+from .models import Course, Unit, Question, QuizBankDraw, ModuleSequencing, Profile
+
+BATCH_SIZE = 500
+
+
+def _clone(obj, **overrides):
+    """Build an unsaved copy of ``obj`` with a fresh primary key and ``overrides`` applied."""
+    model = type(obj)
+    values = {
+        field.attname: getattr(obj, field.attname)
+        for field in model._meta.concrete_fields
+        if not field.primary_key
+    }
+    if 'created_at' in values:
+        values['created_at'] = timezone.now()
+    values.update(overrides)
+    return model(**values)
+
+
+@transaction.atomic
+def duplicate_course(course, user):
+    """Deep-copy ``course`` as a new draft owned by ``user`` and return the copy."""
+    dup = _clone(course, title=f"{course.title} (copy)", status='draft', created_by_id=user.pk)
+    dup.save()
+
+    units = list(Unit.objects.filter(course=course).order_by('sequence_order'))
+    unit_map = {}
+    new_units = []
+    for unit in units:
+        new_unit = _clone(unit, course_id=dup.pk)
+        unit_map[unit.pk] = new_unit.pk
+        new_units.append(new_unit)
+    Unit.objects.bulk_create(new_units, batch_size=BATCH_SIZE)
+
+    quiz_map = {}
+    for relation in Unit.DETAIL_RELATIONS:
+        model = Unit._meta.get_field(relation).related_model
+        copies = []
+        for detail in model.objects.filter(unit_id__in=unit_map):
+            copy = _clone(detail, unit_id=unit_map[detail.unit_id])
+            if relation == 'quiz_details':
+                quiz_map[detail.pk] = copy.pk
+            copies.append(copy)
+        model.objects.bulk_create(copies, batch_size=BATCH_SIZE)
+
+    Question.objects.bulk_create(
+        [_clone(q, quiz_id=quiz_map[q.quiz_id]) for q in Question.objects.filter(quiz_id__in=quiz_map)],
+        batch_size=BATCH_SIZE,
+    )
+    # The copies draw from the same (shared) question banks
+    QuizBankDraw.objects.bulk_create(
+        [_clone(draw, quiz_id=quiz_map[draw.quiz_id]) for draw in QuizBankDraw.objects.filter(quiz_id__in=quiz_map)],
+        batch_size=BATCH_SIZE,
+    )
+
+    # Rules pointing at a module outside this course keep their original reference.
+    ModuleSequencing.objects.bulk_create(
+        [
+            _clone(
+                rule,
+                course_id=dup.pk,
+                module_id=unit_map.get(rule.module_id, rule.module_id),
+                preceding_module_id=unit_map.get(rule.preceding_module_id, rule.preceding_module_id),
+            )
+            for rule in ModuleSequencing.objects.filter(course=course)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return dup
+
+
+@register_job('duplicate_course')
+def duplicate_course_job(job):
+    course = Course.objects.get(id=job.payload['course_id'])
+    user = Profile.objects.get(id=job.payload['user_id'])
+    dup = duplicate_course(course, user)
+    return {'course_id': str(dup.id)}
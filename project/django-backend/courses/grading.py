@@ -0,0 +1,280 @@
+"""
+Server-side quiz grading.
+
+Each quiz's questions are compiled once into an ``AnswerKey``: a tuple of
+``(question_id, type, key, points)`` whose keys are normalized, hashable values
+(sets of accepted tokens, tuples for orderings, pair sets for matchings). Keys are
+cached per quiz and dropped when the quiz or one of its questions changes, so
+grading an attempt is a loop over that tuple with set/tuple comparisons and no
+queries.
+
+Scores are percentages of the quiz's total points. Questions are all-or-nothing.
+Free text questions (and questions without a correct answer) are left pending;
+an attempt with pending questions is not passed until it is reviewed.
+"""
+
+from django.core.cache import cache
+
+from .models import Question, Quiz
+
+ANSWER_KEY_TIMEOUT = 24 * 3600
+
+
+def _text(value):
+    return ' '.join(str(value).split()).casefold()
+
+
+def _token(value):
+    """Comparable form of a choice: option index for ints, normalized text otherwise."""
+    if isinstance(value, bool):
+        return _text(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):
+        for field in ('id', 'value', 'text', 'label'):
+            if field in value:
+                return _token(value[field])
+    return _text(value)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return bool(value)
+    text = _text(value)
+    if text in ('true', 't', 'yes', '1'):
+        return True
+    if text in ('false', 'f', 'no', '0'):
+        return False
+    raise ValueError(value)
+
+
+def boolean_answer(answer):
+    """The bool given as ``answer`` to a true/false question (ValueError/IndexError if there is none)."""
+    return _boolean(_as_list(answer)[0])
+
+
+def _pairs(value):
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = [(pair['left'], pair['right']) if isinstance(pair, dict) else tuple(pair) for pair in value]
+    return frozenset((_text(left), _text(right)) for left, right in items)
+
+
+def _option_indexes(options, values):
+    """
+    Map every option (by index and by text) to its index so answers may use either.
+
+    Returns the token map and the indexes of ``values``; values that are not options
+    get indexes of their own.
+    """
+    tokens = {}
+    for index, option in enumerate(options):
+        tokens[index] = index
+        tokens.setdefault(_token(option), index)
+    indexes = []
+    for value in values:
+        token = _token(value)
+        if token not in tokens:
+            tokens[token] = len(options) + len(indexes)
+        indexes.append(tokens[token])
+    return tokens, indexes
+
+
+def _compile_choice(correct, options):
+    tokens, indexes = _option_indexes(options, _as_list(correct))
+    return tokens, frozenset(indexes)
+
+
+def chosen_options(key, answer):
+    """Indexes picked by ``answer`` under a compiled choice ``key`` (-1 for unknown values)."""
+    tokens, _ = key
+    return [tokens.get(_token(value), -1) for value in _as_list(answer)]
+
+
+def _check_choice(key, answer):
+    return set(chosen_options(key, answer)) == key[1]
+
+
+def _compile_ordering(correct, options):
+    tokens, indexes = _option_indexes(options, correct)
+    return tokens, tuple(indexes)
+
+
+def _check_ordering(key, answer):
+    tokens, expected = key
+    return tuple(tokens.get(_token(value), -1) for value in answer) == expected
+
+
+def _compile_fill_blank(correct, options):
+    values = _as_list(correct)
+    if values and all(isinstance(value, (list, tuple)) for value in values):
+        # One list of accepted answers per blank
+        return tuple(frozenset(_text(v) for v in blank) for blank in values)
+    return (frozenset(_text(value) for value in values),)
+
+
+def _check_fill_blank(key, answer):
+    answers = _as_list(answer)
+    return len(answers) == len(key) and all(_text(value) in accepted for value, accepted in zip(answers, key))
+
+
+COMPILERS = {
+    'multiple_choice': _compile_choice,
+    'multiple_answer': _compile_choice,
+    'true_false': lambda correct, options: _boolean(_as_list(correct)[0]),
+    'fill_blank': _compile_fill_blank,
+    'matching': lambda correct, options: _pairs(correct),
+    'ordering': _compile_ordering,
+}
+
+CHECKERS = {
+    'multiple_choice': _check_choice,
+    'multiple_answer': _check_choice,
+    'true_false': lambda key, answer: boolean_answer(answer) == key,
+    'fill_blank': _check_fill_blank,
+    'matching': lambda key, answer: _pairs(answer) == key,
+    'ordering': _check_ordering,
+}
+
+
+class AnswerKey:
+    """Compiled, picklable answer key of one quiz."""
+
+    __slots__ = ('quiz_id', 'passing_score', 'questions', 'total_points')
+
+    def __init__(self, quiz_id, passing_score, questions):
+        self.quiz_id = str(quiz_id)
+        self.passing_score = passing_score
+        self.questions = tuple(questions)
+        self.total_points = sum(points for _, _, _, points in self.questions)
+
+    def __getstate__(self):
+        return (self.quiz_id, self.passing_score, self.questions, self.total_points)
+
+    def __setstate__(self, state):
+        self.quiz_id, self.passing_score, self.questions, self.total_points = state
+
+
+def compile_question(question):
+    compiler = COMPILERS.get(question.type)
+    if compiler is None or question.correct_answer is None:
+        return (str(question.id), None, None, question.points)
+    options = question.options if isinstance(question.options, list) else []
+    try:
+        return (str(question.id), question.type, compiler(question.correct_answer, options), question.points)
+    except (TypeError, ValueError, KeyError, IndexError):
+        # A malformed key cannot be auto-graded; leave the question for review
+        return (str(question.id), None, None, question.points)
+
+
+def compile_answer_keys(quiz_ids):
+    """Build answer keys for ``quiz_ids`` with two queries in total."""
+    quiz_ids = [str(quiz_id) for quiz_id in quiz_ids]
+    questions = {quiz_id: [] for quiz_id in quiz_ids}
+    for question in Question.objects.filter(quiz_id__in=quiz_ids).only(
+        'id', 'quiz_id', 'type', 'options', 'correct_answer', 'points', 'order',
+    ):
+        questions[str(question.quiz_id)].append(compile_question(question))
+    return {
+        str(quiz_id): AnswerKey(quiz_id, passing_score, questions[str(quiz_id)])
+        for quiz_id, passing_score in Quiz.objects.filter(id__in=quiz_ids).values_list('id', 'passing_score')
+    }
+
+
+def _cache_key(quiz_id):
+    return f'quiz:answer-key:{quiz_id}'
+
+
+def answer_keys(quiz_ids):
+    """Cached answer keys for ``quiz_ids``: ``{quiz_id: AnswerKey}`` (unknown quizzes omitted)."""
+    quiz_ids = {str(quiz_id) for quiz_id in quiz_ids}
+    cached = cache.get_many([_cache_key(quiz_id) for quiz_id in quiz_ids])
+    keys = {quiz_id: cached[_cache_key(quiz_id)] for quiz_id in quiz_ids if _cache_key(quiz_id) in cached}
+    missing = quiz_ids - set(keys)
+    if missing:
+        compiled = compile_answer_keys(missing)
+        cache.set_many({_cache_key(quiz_id): key for quiz_id, key in compiled.items()}, ANSWER_KEY_TIMEOUT)
+        keys.update(compiled)
+    return keys
+
+
+def answer_key(quiz_id):
+    return answer_keys([quiz_id]).get(str(quiz_id))
+
+
+def invalidate_answer_key(quiz_id):
+    cache.delete(_cache_key(quiz_id))
+
+
+def _answer_map(answers):
+    """Accept ``{question_id: answer}`` or ``[{"question_id": ..., "answer": ...}]``."""
+    if isinstance(answers, dict):
+        return answers
+    if isinstance(answers, list):
+        return {
+            str(item.get('question_id')): item.get('answer')
+            for item in answers if isinstance(item, dict)
+        }
+    return {}
+
+
+def grade(key, answers):
+    """
+    Grade ``answers`` against a compiled ``key``.
+
+    Returns a dict with score (percent), passed, points_earned, points_possible,
+    pending_review and per-question ``results`` (True/False, or None when pending).
+    """
+    answers = _answer_map(answers)
+    earned = 0
+    pending = False
+    results = {}
+    for question_id, question_type, expected, points in key.questions:
+        if question_type is None:
+            pending = True
+            results[question_id] = None
+            continue
+        answer = answers.get(question_id)
+        correct = False
+        if answer is not None:
+            try:
+                correct = CHECKERS[question_type](expected, answer)
+            except (TypeError, ValueError, KeyError, IndexError):
+                correct = False
+        if correct:
+            earned += points
+        results[question_id] = correct
+    score = round(100 * earned / key.total_points) if key.total_points else 0
+    return {
+        'score': score,
+        'passed': not pending and score >= key.passing_score,
+        'points_earned': earned,
+        'points_possible': key.total_points,
+        'pending_review': pending,
+        'results': results,
+    }
+
+
+GRADED_FIELDS = ['score', 'passed', 'points_earned', 'pending_review']
+
+
+def grade_attempts(attempts):
+    """Grade ``attempts`` in place (one cache lookup for all their quizzes); returns them."""
+    keys = answer_keys({attempt.quiz_id for attempt in attempts})
+    for attempt in attempts:
+        key = keys.get(str(attempt.quiz_id))
+        if key is None:
+            continue
+        result = grade(key, attempt.answers)
+        for field in GRADED_FIELDS:
+            setattr(attempt, field, result[field])
+    return attempts
@@ -0,0 +1,212 @@
+"""
+Coalescing write buffer for media progress heartbeats.
+
+Players report ``watch_percentage`` every few seconds. Instead of a SELECT and an
+UPDATE per report, heartbeats are kept in memory (one value per enrollment/unit
+pair, the highest seen) and flushed periodically: one locking read of the affected
+``UnitProgress`` rows, one batched update and one batched insert.
+
+A flush never lowers a stored percentage, and marks the unit completed once the
+video's ``required_watch_percentage`` (100 for other media) is reached. Each worker
+process has its own buffer; because flushes only ever raise values, workers can
+flush independently in any order.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Enrollment, Unit, UnitProgress, VideoUnit
+from .progress import apply_progress_changes, record_activity
+
+logger = logging.getLogger(__name__)
+
+OWNER_CACHE_TIMEOUT = 3600
+FLUSH_BATCH_SIZE = 500
+
+
+class HeartbeatBuffer:
+    """Thread-safe map of (enrollment_id, unit_id) -> highest buffered watch_percentage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def add(self, enrollment_id, unit_id, watch_percentage):
+        key = (enrollment_id, unit_id)
+        with self._lock:
+            if watch_percentage > self._pending.get(key, -1):
+                self._pending[key] = watch_percentage
+        self._ensure_flusher()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def flush(self):
+        """Write all buffered heartbeats; returns the number of progress rows touched."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        try:
+            return write_heartbeats(pending)
+        except Exception:
+            # Put the values back so the next flush retries them (rows deleted meanwhile are dropped there)
+            with self._lock:
+                for key, value in pending.items():
+                    if value > self._pending.get(key, -1):
+                        self._pending[key] = value
+            raise
+
+    def _ensure_flusher(self):
+        interval = getattr(settings, 'PROGRESS_HEARTBEAT_FLUSH_SECONDS', 5)
+        if interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(interval,), name='heartbeat-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush progress heartbeats")
+            finally:
+                close_old_connections()
+
+
+heartbeat_buffer = HeartbeatBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        heartbeat_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush progress heartbeats on exit")
+
+
+def write_heartbeats(pending):
+    """Apply ``{(enrollment_id, unit_id): watch_percentage}`` to ``UnitProgress``; returns rows touched."""
+    items = list(pending.items())
+    touched = 0
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        touched += _write_batch(dict(items[start:start + FLUSH_BATCH_SIZE]))
+    return touched
+
+
+@transaction.atomic
+def _write_batch(pending):
+    unit_ids = {unit_id for _, unit_id in pending}
+    required = dict(
+        VideoUnit.objects.filter(unit_id__in=unit_ids).values_list('unit_id', 'required_watch_percentage')
+    )
+    now = timezone.now()
+    pairs = Q()
+    for enrollment_id, unit_id in pending:
+        pairs |= Q(enrollment_id=enrollment_id, unit_id=unit_id)
+    existing = {
+        (progress.enrollment_id, progress.unit_id): progress
+        for progress in UnitProgress.objects.select_for_update().filter(pairs)
+    }
+
+    # Pairs whose enrollment or unit was deleted after buffering would fail the insert's
+    # foreign keys (ignore_conflicts does not cover those) and block every later flush
+    new_keys = [key for key in pending if key not in existing]
+    if new_keys:
+        live_enrollments = set(
+            Enrollment.objects.filter(id__in={key[0] for key in new_keys}).values_list('id', flat=True)
+        )
+        live_units = set(Unit.objects.filter(id__in={key[1] for key in new_keys}).values_list('id', flat=True))
+        for key in new_keys:
+            if key[0] not in live_enrollments or key[1] not in live_units:
+                del pending[key]
+
+    to_update = []
+    to_create = []
+    old_statuses = {}
+    for key, watch_percentage in pending.items():
+        progress = existing.get(key)
+        if progress is None:
+            progress = UnitProgress(enrollment_id=key[0], unit_id=key[1])
+            to_create.append(progress)
+        elif watch_percentage <= progress.watch_percentage:
+            continue
+        else:
+            to_update.append(progress)
+            old_statuses[key] = progress.status
+        progress.watch_percentage = watch_percentage
+        if progress.started_at is None:
+            progress.started_at = now
+        if progress.status != 'completed':
+            if watch_percentage >= required.get(key[1], 100):
+                progress.status = 'completed'
+                progress.completed_at = now
+            else:
+                progress.status = 'in_progress'
+
+    if to_update:
+        UnitProgress.objects.bulk_update(to_update, ['watch_percentage', 'status', 'started_at', 'completed_at'])
+    if to_create:
+        # A row created concurrently by a regular progress write wins; the next heartbeat raises it
+        UnitProgress.objects.bulk_create(to_create, ignore_conflicts=True)
+        inserted = set(UnitProgress.objects.filter(id__in=[p.id for p in to_create]).values_list('id', flat=True))
+        to_create = [p for p in to_create if p.id in inserted]
+
+    # Bulk writes skip the UnitProgress signals, so update the enrollments here
+    apply_progress_changes(
+        [(p.enrollment_id, p.unit_id, old_statuses[(p.enrollment_id, p.unit_id)], p.status) for p in to_update]
+        + [(p.enrollment_id, p.unit_id, None, p.status) for p in to_create]
+    )
+    record_activity({p.enrollment_id for p in to_update + to_create}, now)
+    return len(to_update) + len(to_create)
+
+
+def authorize_heartbeats(user, pairs):
+    """
+    Return the (enrollment_id, unit_id) pairs that ``user`` may report progress for.
+
+    Enrollment owners and unit courses are cached, so steady-state heartbeats do not
+    query the database at all.
+    """
+    enrollment_ids = {str(enrollment_id) for enrollment_id, _ in pairs}
+    unit_ids = {str(unit_id) for _, unit_id in pairs}
+    keys = [f'heartbeat:enrollment:{eid}' for eid in enrollment_ids] + [f'heartbeat:unit:{uid}' for uid in unit_ids]
+    cached = cache.get_many(keys)
+
+    enrollments = {eid: cached[f'heartbeat:enrollment:{eid}'] for eid in enrollment_ids if f'heartbeat:enrollment:{eid}' in cached}
+    units = {uid: cached[f'heartbeat:unit:{uid}'] for uid in unit_ids if f'heartbeat:unit:{uid}' in cached}
+    missing_enrollments = enrollment_ids - set(enrollments)
+    missing_units = unit_ids - set(units)
+    fresh = {}
+    if missing_enrollments:
+        for eid, user_id, course_id in Enrollment.objects.filter(id__in=missing_enrollments).values_list('id', 'user_id', 'course_id'):
+            enrollments[str(eid)] = fresh[f'heartbeat:enrollment:{eid}'] = (str(user_id), str(course_id))
+    if missing_units:
+        for uid, course_id in Unit.objects.filter(id__in=missing_units).values_list('id', 'course_id'):
+            units[str(uid)] = fresh[f'heartbeat:unit:{uid}'] = str(course_id)
+    if fresh:
+        cache.set_many(fresh, OWNER_CACHE_TIMEOUT)
+
+    allowed = []
+    for enrollment_id, unit_id in pairs:
+        owner = enrollments.get(str(enrollment_id))
+        if owner and owner[0] == str(user.pk) and units.get(str(unit_id)) == owner[1]:
+            allowed.append((enrollment_id, unit_id))
+    return allowed
@@ -0,0 +1,431 @@
+"""
+Item analysis of quiz questions.
+
+For every question of a quiz (its own and those drawn from question banks) the
+report gives the difficulty (share of graded responses that were correct), the
+discrimination (point-biserial correlation between answering the item correctly
+and the points earned on the rest of the attempt), how often each option was
+picked, and the time from the start of the attempt to the final answer (session
+attempts only, see ``QuizAttempt.answer_times``).
+
+Submitted attempts are streamed in chunks. Each chunk's answers are decoded once
+into flat (attempt, item) arrays (choice answers into option indexes, true/false
+answers into 0/1) and graded against the cached answer keys with array
+comparisons; ``np.bincount`` then folds them into running per-item totals. Only
+fill-in, matching and ordering answers go through the per-answer checkers.
+Nothing is sized attempts x items, so memory follows the answers in a chunk
+however many bank questions a quiz draws from (response times excepted: one float
+per timed answer).
+
+Reports are cached for ``REPORT_CACHE_SECONDS``. Quizzes with more than
+``ITEM_ANALYSIS_SYNC_ATTEMPTS`` submitted attempts are analysed by an
+``item_analysis`` background job, which caches the report and keeps it as the
+job result.
+"""
+
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .delivery import delivery_payload
+from .grading import CHECKERS, answer_key, boolean_answer, chosen_options
+from .jobs import enqueue_job, register_job
+from .models import BackgroundJob, QuizAttempt
+from .question_banks import bank_questions, extend_key
+
+CHUNK_SIZE = 5000
+REPORT_CACHE_SECONDS = 600
+CHOICE_TYPES = ('multiple_choice', 'multiple_answer')
+# How each item is graded: by option indexes, by a decoded value, or not at all
+CHOICE, VALUE, PENDING = 0, 1, 2
+# Flags are only raised once an item has this many graded responses
+MIN_RESPONSES = 20
+TOO_EASY = 0.9
+TOO_HARD = 0.2
+LOW_DISCRIMINATION = 0.2
+
+
+class _Totals:
+    """Running per-item sums; columns are added as drawn questions show up."""
+
+    SUMS = ('presented', 'answered', 'graded', 'correct', 'rest', 'rest_sq', 'correct_rest')
+
+    def __init__(self):
+        self.columns = {}
+        self.question_ids = []
+        self.points = np.zeros(0)
+        # Per column: grading kind, expected decoded value, option count and expected option indexes
+        self.kinds = []
+        self.truths = []
+        self.option_slots = []
+        self.expected = []
+        for name in self.SUMS:
+            setattr(self, name, np.zeros(0))
+        self.option_counts = np.zeros((0, 1), dtype=np.int64)
+        self.times = []
+        self.attempts = 0
+        self.score_sum = 0.0
+        self.score_sq_sum = 0.0
+
+    def column(self, entry, option_count=0):
+        """Column of the answer key ``entry`` ``(question_id, type, key, points)``, added on first sight."""
+        question_id, question_type, expected, points = entry
+        column = self.columns.get(question_id)
+        if column is None:
+            column = self.columns[question_id] = len(self.question_ids)
+            self.question_ids.append(question_id)
+            self.points = np.append(self.points, points)
+            if question_type is None:
+                self.kinds.append(PENDING)
+            elif question_type in CHOICE_TYPES:
+                self.kinds.append(CHOICE)
+            else:
+                self.kinds.append(VALUE)
+            self.truths.append(int(expected) if question_type == 'true_false' else 1)
+            self.option_slots.append(option_count)
+            self.expected.append(sorted(expected[1]) if question_type in CHOICE_TYPES else [])
+        return column
+
+    def grade(self, rows, cols, answered, values, pick_pairs, picks, count):
+        """
+        Grade a chunk's decoded (attempt, item) pairs.
+
+        ``values`` holds each non-choice pair's decoded answer (-1 when missing or
+        invalid), compared with the column's expected value; ``pick_pairs``/``picks``
+        list the option indexes picked per choice pair (-1 for values that are not
+        options). A choice pair is correct when its distinct picks are exactly the
+        expected ones. Returns per-pair results (1, 0, -1 pending) and per-attempt
+        points earned and scores.
+        """
+        kinds = np.array(self.kinds, dtype=np.int8)[cols]
+        correct = np.array(self.truths, dtype=np.int8)[cols] == values
+
+        choice = kinds == CHOICE
+        if choice.any():
+            expected_counts = np.array([len(indexes) for indexes in self.expected])
+            stride = int(max(picks.max() if len(picks) else 0, max(max(indexes, default=0) for indexes in self.expected))) + 2
+            expected_keys = np.array(
+                [column * stride + index + 1 for column, indexes in enumerate(self.expected) for index in indexes], dtype=np.int64,
+            )
+            # Repeated picks of one option count once, as in grading.
+            distinct = np.unique(pick_pairs * stride + picks + 1)
+            pairs, slots = distinct // stride, distinct % stride
+            hit = np.isin(cols[pairs] * stride + slots, expected_keys)
+            hits = np.bincount(pairs[hit], minlength=len(cols))
+            misses = np.bincount(pairs[~hit], minlength=len(cols))
+            correct[choice] = (answered & (hits == expected_counts[cols]) & (misses == 0))[choice]
+
+        results = correct.astype(np.int8)
+        results[kinds == PENDING] = -1
+        weights = self.points[cols]
+        earned = np.bincount(rows, weights=correct * weights, minlength=count)
+        possible = np.bincount(rows, weights=weights, minlength=count)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = np.where(possible > 0, np.round(100 * earned / possible), 0.0)
+        return results, earned, scores
+
+    def grow(self, width, options):
+        missing = width - len(self.presented)
+        if missing > 0:
+            for name in self.SUMS:
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(missing)]))
+        rows, slots = self.option_counts.shape
+        if width > rows or options > slots:
+            grown = np.zeros((max(width, rows), max(options, slots)), dtype=np.int64)
+            grown[:rows, :slots] = self.option_counts
+            self.option_counts = grown
+
+    def add_chunk(self, rows, cols, results, answered, earned, scores, choice_cols, choices, time_cols, seconds):
+        """
+        Fold one chunk into the totals.
+
+        ``rows``/``cols``/``results``/``answered`` describe each presented (attempt,
+        item) pair (result 1 correct, 0 wrong, -1 pending); ``earned`` and ``scores``
+        are per attempt; ``choice_cols``/``choices`` list picked option slots and
+        ``time_cols``/``seconds`` the recorded answer times.
+        """
+        width = len(self.question_ids)
+        self.grow(width, int(choices.max()) + 1 if len(choices) else 1)
+        count = len(earned)
+        graded = results >= 0
+        graded_cols = cols[graded]
+        correct = (results[graded] == 1).astype(float)
+        # Points earned on the rest of the attempt, per graded (attempt, item) pair
+        rest = earned[rows[graded]] - correct * self.points[graded_cols]
+
+        def per_item(item_cols, weights=None):
+            return np.bincount(item_cols, weights=weights, minlength=width)
+
+        self.presented += per_item(cols)
+        self.answered += per_item(cols[answered])
+        self.graded += per_item(graded_cols)
+        self.correct += per_item(graded_cols, correct)
+        self.rest += per_item(graded_cols, rest)
+        self.rest_sq += per_item(graded_cols, rest * rest)
+        self.correct_rest += per_item(graded_cols, correct * rest)
+        np.add.at(self.option_counts, (choice_cols, choices), 1)
+        if len(seconds):
+            self.times.append((time_cols, seconds))
+        self.attempts += count
+        self.score_sum += float(scores.sum())
+        self.score_sq_sum += float((scores * scores).sum())
+
+    def difficulty(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.graded > 0, self.correct / self.graded, np.nan)
+
+    def discrimination(self):
+        """Item-rest point-biserial correlation per item (NaN when undefined)."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            n = self.graded
+            p = self.correct / n
+            mean_rest = self.rest / n
+            var_rest = self.rest_sq / n - mean_rest ** 2
+            cov = self.correct_rest / n - p * mean_rest
+            r = cov / np.sqrt(p * (1 - p) * var_rest)
+        return np.where((n > 1) & np.isfinite(r), r, np.nan)
+
+    def time_percentiles(self):
+        """``{column: (median, p90, n)}`` of recorded answer times."""
+        if not self.times:
+            return {}
+        cols = np.concatenate([cols for cols, _ in self.times])
+        seconds = np.concatenate([seconds for _, seconds in self.times])
+        order = np.lexsort((seconds, cols))
+        cols, seconds = cols[order], seconds[order]
+        starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        stops = np.r_[starts[1:], len(cols)]
+        return {
+            int(cols[start]): (*np.percentile(seconds[start:stop], [50, 90]).tolist(), int(stop - start))
+            for start, stop in zip(starts, stops)
+        }
+
+
+def _number(value, digits=3):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _decode_value(question_type, expected, answer):
+    """Decoded non-choice ``answer``: 0/1 for true/false, the checker's verdict otherwise, -1 if unusable."""
+    try:
+        if question_type == 'true_false':
+            return int(boolean_answer(answer))
+        return int(CHECKERS[question_type](expected, answer))
+    except (TypeError, ValueError, KeyError, IndexError):
+        return -1
+
+
+def _plan(totals, key, meta):
+    """``key``'s items as ``(question_id, type, key, column)`` plus the list of their columns."""
+    items = [
+        (question_id, question_type, expected, totals.column(
+            (question_id, question_type, expected, points),
+            len(meta[question_id]['options']) if question_type in CHOICE_TYPES else 0,
+        ))
+        for question_id, question_type, expected, points in key.questions
+    ]
+    return items, [column for *_, column in items]
+
+
+def _add_attempt(plan, answers, times, chunk):
+    """Append one attempt's presented items and decoded answers to ``chunk``."""
+    answers = answers if isinstance(answers, dict) else {}
+    times = times if isinstance(times, dict) else {}
+    items, columns = plan
+    pair = len(chunk['values'])
+    chunk['counts'].append(len(items))
+    chunk['cols'].extend(columns)
+    answered, values, pick_pairs, picks = chunk['answered'], chunk['values'], chunk['pick_pairs'], chunk['picks']
+    for question_id, question_type, expected, column in items:
+        answer = answers.get(question_id)
+        answered.append(answer is not None)
+        value = -1
+        if answer is not None and question_type is not None:
+            if question_type in CHOICE_TYPES:
+                # Option indexes map to themselves; skip token normalization for them
+                picked = [expected[0].get(answer, -1)] if type(answer) is int else chosen_options(expected, answer)
+                pick_pairs.extend([pair] * len(picked))
+                picks.extend(picked)
+            else:
+                value = _decode_value(question_type, expected, answer)
+        values.append(value)
+        if question_id in times:
+            chunk['time_cols'].append(column)
+            chunk['seconds'].append(times[question_id])
+        pair += 1
+
+
+def _flush(totals, chunk):
+    counts = chunk['counts']
+    if not counts:
+        return
+    rows = np.repeat(np.arange(len(counts), dtype=np.int64), counts)
+    cols = np.array(chunk['cols'], dtype=np.int64)
+    answered = np.array(chunk['answered'], dtype=bool)
+    pick_pairs = np.array(chunk['pick_pairs'], dtype=np.int64)
+    picks = np.array(chunk['picks'], dtype=np.int64)
+    results, earned, scores = totals.grade(
+        rows, cols, answered, np.array(chunk['values'], dtype=np.int8), pick_pairs, picks, len(counts),
+    )
+    choice_cols = cols[pick_pairs]
+    slots = np.array(totals.option_slots, dtype=np.int64)[choice_cols]
+    # The last slot counts values that are not options
+    choices = np.where((picks >= 0) & (picks < slots), picks, slots)
+    totals.add_chunk(
+        rows, cols, results, answered, earned, scores, choice_cols, choices,
+        np.array(chunk['time_cols'], dtype=np.int64),
+        np.array(chunk['seconds'], dtype=float),
+    )
+    chunk.update(_new_chunk())
+
+
+def _new_chunk():
+    return {name: [] for name in (
+        'counts', 'cols', 'answered', 'values', 'pick_pairs', 'picks', 'time_cols', 'seconds',
+    )}
+
+
+def _item_report(totals, column, meta, key_entry, difficulty, discrimination, timing):
+    question_id = totals.question_ids[column]
+    question = meta.get(question_id, {})
+    _, question_type, expected, points = key_entry
+    graded = int(totals.graded[column])
+    answered = int(totals.answered[column])
+    item = {
+        'question_id': question_id,
+        'source': question.get('source'),
+        'type': question.get('type'),
+        'text': question.get('text'),
+        'points': points,
+        'presented': int(totals.presented[column]),
+        'answered': answered,
+        'graded': graded,
+        'difficulty': _number(difficulty[column]),
+        'discrimination': _number(discrimination[column]),
+        'median_seconds': None,
+        'p90_seconds': None,
+    }
+    if column in timing:
+        median, p90, _ = timing[column]
+        item['median_seconds'], item['p90_seconds'] = round(median, 1), round(p90, 1)
+    if question_type in CHOICE_TYPES:
+        counts = totals.option_counts[column] if column < len(totals.option_counts) else np.zeros(1, dtype=np.int64)
+        options = question.get('options', [])
+        item['options'] = [
+            {
+                'id': option['id'],
+                'text': option['text'],
+                'correct': option['id'] in expected[1],
+                'count': int(counts[index]) if index < len(counts) else 0,
+                'share': _number(counts[index] / answered if index < len(counts) and answered else 0),
+            }
+            for index, option in enumerate(options)
+        ]
+        item['other'] = int(counts[len(options)]) if len(options) < len(counts) else 0
+
+    flags = []
+    if graded >= MIN_RESPONSES:
+        if item['difficulty'] > TOO_EASY:
+            flags.append('too_easy')
+        elif item['difficulty'] < TOO_HARD:
+            flags.append('too_hard')
+        if item['discrimination'] is not None and item['discrimination'] < LOW_DISCRIMINATION:
+            flags.append('low_discrimination')
+    item['flags'] = flags
+    return item
+
+
+def analyse_quiz(quiz_id, chunk_size=CHUNK_SIZE):
+    """Item analysis report of ``quiz_id`` over its submitted attempts, or None for an unknown quiz."""
+    payload = delivery_payload(quiz_id)
+    base = answer_key(quiz_id)
+    if payload is None or base is None:
+        return None
+    meta = {question['id']: {**question, 'source': 'quiz'} for question in payload['questions']}
+    key_entries = {entry[0]: entry for entry in base.questions}
+
+    totals = _Totals()
+    chunk = _new_chunk()
+    batch = []
+
+    def process(batch):
+        drawn = bank_questions({question_id for _, question_ids, _ in batch for question_id in question_ids or ()})
+        for question_id, (question, entry) in drawn.items():
+            meta.setdefault(question_id, {**question, 'source': 'bank'})
+            key_entries.setdefault(question_id, entry)
+        base_plan = _plan(totals, base, meta)
+        for answers, question_ids, times in batch:
+            # Attempts without drawn questions share the quiz's own plan
+            plan = _plan(totals, extend_key(base, question_ids, drawn), meta) if question_ids else base_plan
+            _add_attempt(plan, answers, times, chunk)
+        _flush(totals, chunk)
+
+    attempts = (
+        QuizAttempt.objects.filter(quiz_id=quiz_id, status='submitted')
+        .values_list('answers', 'question_ids', 'answer_times')
+    )
+    for row in attempts.iterator(chunk_size=chunk_size):
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            process(batch)
+            batch = []
+    if batch:
+        process(batch)
+
+    # Questions nobody has been presented yet still get a row
+    for question_id, entry in key_entries.items():
+        totals.column(entry, len(meta.get(question_id, {}).get('options', [])) if entry[1] in CHOICE_TYPES else 0)
+    totals.grow(len(totals.question_ids), 1)
+
+    difficulty = totals.difficulty()
+    discrimination = totals.discrimination()
+    timing = totals.time_percentiles()
+    count = totals.attempts
+    mean = totals.score_sum / count if count else 0.0
+    variance = totals.score_sq_sum / count - mean ** 2 if count else 0.0
+    return {
+        'quiz_id': str(quiz_id),
+        'attempts': count,
+        'average_score': round(mean, 1),
+        'score_stddev': round(float(np.sqrt(max(variance, 0.0))), 1),
+        'items': [
+            _item_report(totals, column, meta, key_entries[question_id], difficulty, discrimination, timing)
+            for column, question_id in enumerate(totals.question_ids)
+        ],
+    }
+
+
+def report_cache_key(quiz_id):
+    return f'quiz:item-analysis:{quiz_id}'
+
+
+def runs_in_background(quiz_id):
+    limit = getattr(settings, 'ITEM_ANALYSIS_SYNC_ATTEMPTS', 20000)
+    return QuizAttempt.objects.filter(quiz_id=quiz_id, status='submitted').count() > limit
+
+
+def report_job(quiz_id, user=None, refresh=False):
+    """
+    The ``item_analysis`` job serving ``quiz_id``'s report.
+
+    A pending or running job is reused; so is one completed within
+    ``REPORT_CACHE_SECONDS`` unless ``refresh``. Otherwise a new job is enqueued.
+    """
+    jobs = BackgroundJob.objects.filter(job_type='item_analysis', payload__quiz_id=str(quiz_id)).order_by('-created_at')
+    job = jobs.filter(status__in=('pending', 'running')).first()
+    if job is None and not refresh:
+        fresh = timezone.now() - timedelta(seconds=REPORT_CACHE_SECONDS)
+        job = jobs.filter(status='completed', finished_at__gte=fresh).first()
+    return job or enqueue_job('item_analysis', {'quiz_id': str(quiz_id)}, user=user)
+
+
+@register_job('item_analysis')
+def item_analysis_job(job):
+    """Analyse ``payload['quiz_id']``; the report is cached and returned as the job result."""
+    quiz_id = job.payload['quiz_id']
+    report = analyse_quiz(quiz_id)
+    cache.set(report_cache_key(quiz_id), report, REPORT_CACHE_SECONDS)
+    return report
@@ -0,0 +1,138 @@
+"""
+Background job runner.
+
+Jobs are persisted as ``BackgroundJob`` rows so their status can be polled and so a
+worker can pick them up again after a restart. By default a job starts on a daemon
+thread once the enqueuing transaction commits; with ``BACKGROUND_JOBS_IN_THREAD``
+disabled the web process only records the job and ``manage.py run_jobs`` executes it.
+
+A running job holds a lease (``BackgroundJob.locked_until``) that its worker renews
+every third of ``BACKGROUND_JOB_LEASE_SECONDS``; ``run_jobs --resume`` only takes over
+jobs whose lease has expired, so a job a live worker is executing never runs twice.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# job_type -> callable(job) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def register_job(job_type):
+    """Decorator registering the handler for ``job_type``."""
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        return func
+    return decorator
+
+
+def enqueue_job(job_type, payload, user=None):
+    """Persist a pending job and schedule it to start after the current transaction commits."""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f'Unknown job type: {job_type}')
+    job = BackgroundJob.objects.create(job_type=job_type, payload=payload, created_by=user)
+    if getattr(settings, 'BACKGROUND_JOBS_IN_THREAD', True):
+        transaction.on_commit(lambda: _start_thread(job.id))
+    return job
+
+
+def _start_thread(job_id):
+    thread = threading.Thread(target=_run_in_thread, args=(job_id,), name=f'job-{job_id}', daemon=True)
+    thread.start()
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def _lease():
+    return timedelta(seconds=getattr(settings, 'BACKGROUND_JOB_LEASE_SECONDS', 60))
+
+
+def claimable_jobs(resume=False, now=None):
+    """Pending jobs, plus with ``resume`` running jobs whose worker stopped renewing the lease."""
+    claimable = Q(status='pending')
+    if resume:
+        now = now or timezone.now()
+        claimable |= Q(status='running') & (Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+    return BackgroundJob.objects.filter(claimable)
+
+
+class _LeaseKeeper(threading.Thread):
+    """Renews a running job's lease until stopped."""
+
+    def __init__(self, job_id):
+        super().__init__(name=f'job-lease-{job_id}', daemon=True)
+        self.job_id = job_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = _lease().total_seconds() / 3
+        try:
+            while not self.stopped.wait(interval):
+                BackgroundJob.objects.filter(id=self.job_id, status='running').update(
+                    locked_until=timezone.now() + _lease()
+                )
+        except Exception:
+            logger.exception(f"Failed to renew the lease of background job {self.job_id}")
+        finally:
+            close_old_connections()
+
+
+def run_job(job_id, resume=False):
+    """
+    Claim and execute a job. Returns the job, or None if another worker already claimed it.
+
+    Pending jobs are always claimable; with ``resume`` a job left in ``running`` by a
+    worker that stopped renewing its lease (e.g. one that died) is claimed too, and its
+    handler continues from its saved progress.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked: a job another worker is claiming right now is simply not ours
+        job = claimable_jobs(resume, now).select_for_update(skip_locked=True).filter(id=job_id).first()
+        if job is None:
+            return None
+        BackgroundJob.objects.filter(id=job_id).update(status='running', started_at=now, locked_until=now + _lease())
+
+    keeper = _LeaseKeeper(job_id)
+    keeper.start()
+    try:
+        return _execute(job_id)
+    finally:
+        keeper.stopped.set()
+
+
+def _execute(job_id):
+    job = BackgroundJob.objects.get(id=job_id)
+    try:
+        result = JOB_HANDLERS[job.job_type](job)
+    except Exception as exc:
+        logger.exception(f"Background job {job.id} ({job.job_type}) failed")
+        job.status = 'failed'
+        job.error = str(exc)
+        job.finished_at = timezone.now()
+        job.locked_until = None
+        job.save(update_fields=['status', 'error', 'finished_at', 'locked_until', 'updated_at'])
+        return job
+
+    job.status = 'completed'
+    job.result = result
+    job.finished_at = timezone.now()
+    job.locked_until = None
+    job.save(update_fields=['status', 'result', 'finished_at', 'locked_until', 'updated_at'])
+    return job
@@ -0,0 +1,239 @@
+"""
+Leaderboard ranking engine.
+
+Points are ``completed_units * UNIT_POINTS + quiz_score_total``. A course's rows
+(``Leaderboard.course`` set) are rebuilt from its enrollments in a few batched
+statements, then ranked with a single ``DENSE_RANK()`` window update, so learners
+with equal points share a rank and every other row's rank stays consistent. The
+global rows (``course`` NULL) are a rollup of the course rows, ranked the same way.
+After recomputing some courses only the users whose course rows changed are rolled
+up again. Team standings rank the members' global rows with a window function at
+read time.
+
+Progress and quiz events only mark their course dirty. The scheduler recomputes the
+dirty courses once per ``LEADERBOARD_DEBOUNCE_SECONDS``, so a burst of events costs
+one recomputation instead of one per event.
+"""
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.functions import Coalesce, DenseRank
+from django.utils import timezone
+
+from .models import Course, Enrollment, Leaderboard, QuizScore, TeamMember
+from .rank_index import GLOBAL, course_scope, rank_indexes
+
+logger = logging.getLogger(__name__)
+
+UNIT_POINTS = 10
+BATCH_SIZE = 1000
+SCORE_FIELDS = ['total_points', 'completed_units', 'quiz_score_total', 'activity_points']
+
+
+def _store(entries, rows, course_id=None):
+    """
+    Make ``entries`` (one scope's leaderboard rows) match ``rows``.
+
+    ``rows`` yields ``(user_id, completed_units, quiz_score_total, activity_points)``.
+    Only changed rows are written; users missing from ``rows`` are removed. Points
+    changes are applied to this process's rank index once the transaction commits.
+    Returns the ids of the users whose rows were written or removed.
+    """
+    existing = {
+        user_id: (entry_id, scores)
+        for entry_id, user_id, *scores in entries.values_list('id', 'user_id', *SCORE_FIELDS)
+    }
+    now = timezone.now()
+    to_update = []
+    to_create = []
+    point_changes = []
+    changed_users = set()
+    for user_id, completed_units, quiz_score_total, activity_points in rows:
+        scores = [completed_units * UNIT_POINTS + quiz_score_total, completed_units, quiz_score_total, activity_points]
+        entry_id, stored = existing.pop(user_id, (None, None))
+        if entry_id is None:
+            to_create.append(Leaderboard(user_id=user_id, course_id=course_id, **dict(zip(SCORE_FIELDS, scores))))
+            point_changes.append((user_id, None, scores[0]))
+        elif stored != scores:
+            changed_users.add(user_id)
+            to_update.append(Leaderboard(id=entry_id, updated_at=now, **dict(zip(SCORE_FIELDS, scores))))
+            if stored[0] != scores[0]:
+                point_changes.append((user_id, stored[0], scores[0]))
+    point_changes += [(user_id, stored[0], None) for user_id, (_, stored) in existing.items()]
+
+    if point_changes:
+        scope = course_scope(course_id) if course_id else GLOBAL
+        transaction.on_commit(lambda: rank_indexes.apply(scope, point_changes))
+    if existing:
+        Leaderboard.objects.filter(id__in=[entry_id for entry_id, _ in existing.values()]).delete()
+    if to_update:
+        Leaderboard.objects.bulk_update(to_update, SCORE_FIELDS + ['updated_at'], batch_size=BATCH_SIZE)
+    if to_create:
+        Leaderboard.objects.bulk_create(to_create, batch_size=BATCH_SIZE)
+    return {change.user_id for change in to_create} | changed_users | set(existing)
+
+
+def _rank(course_id=None):
+    """
+    Dense-rank one scope by total_points in a single UPDATE ... FROM (window) statement.
+
+    ``position`` numbers the rows in the same order with ties broken by user id, so it
+    is unique within the scope and serves as the pagination key.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Leaderboard._meta.db_table)
+    if course_id is None:
+        scope, params = f"{qn('course_id')} IS NULL", []
+    else:
+        scope = f"{qn('course_id')} = %s"
+        params = [Course._meta.pk.get_db_prep_value(Course._meta.pk.to_python(course_id), connection)]
+    sql = (
+        f"UPDATE {table} SET {qn('rank')} = ranked.points_rank, {qn('position')} = ranked.place "
+        f"FROM (SELECT {qn('id')}, "
+        f"DENSE_RANK() OVER (ORDER BY {qn('total_points')} DESC) AS points_rank, "
+        f"ROW_NUMBER() OVER (ORDER BY {qn('total_points')} DESC, {qn('user_id')}) AS place "
+        f"FROM {table} WHERE {scope}) AS ranked "
+        f"WHERE {table}.{qn('id')} = ranked.{qn('id')} "
+        f"AND ({table}.{qn('rank')} <> ranked.points_rank OR {table}.{qn('position')} <> ranked.place)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+@transaction.atomic
+def recompute_course(course_id):
+    """Rebuild and rank the leaderboard rows of one course; returns the ids of the users whose rows changed."""
+    quiz_scores = (
+        QuizScore.objects.filter(user=OuterRef('user_id'), quiz__unit__course_id=course_id)
+        .order_by()
+        .values('user')
+        .annotate(total=Sum('score_total'))
+        .values('total')
+    )
+    rows = (
+        Enrollment.objects.filter(course_id=course_id)
+        .annotate(activity=Count('unit_progress'), quiz=Coalesce(Subquery(quiz_scores), Value(0)))
+        .values_list('user_id', 'completed_units', 'quiz', 'activity')
+    )
+    changed = _store(Leaderboard.objects.filter(course_id=course_id), rows, course_id)
+    _rank(course_id)
+    return changed
+
+
+def _global_rows(user_ids=None):
+    rows = Leaderboard.objects.filter(course__isnull=False)
+    if user_ids is not None:
+        rows = rows.filter(user_id__in=user_ids)
+    return (
+        rows.values('user_id')
+        .annotate(units=Sum('completed_units'), quiz=Sum('quiz_score_total'), activity=Sum('activity_points'))
+        .order_by()
+        .values_list('user_id', 'units', 'quiz', 'activity')
+    )
+
+
+@transaction.atomic
+def recompute_global(user_ids=None):
+    """
+    Roll the course rows up into the global (``course`` NULL) rows and rank them.
+
+    With ``user_ids`` only those users' rows are rolled up again, in batches; the
+    whole scope is re-ranked either way.
+    """
+    if user_ids is None:
+        _store(Leaderboard.objects.filter(course__isnull=True), _global_rows())
+    else:
+        user_ids = list(user_ids)
+        for start in range(0, len(user_ids), BATCH_SIZE):
+            batch = user_ids[start:start + BATCH_SIZE]
+            _store(Leaderboard.objects.filter(course__isnull=True, user_id__in=batch), _global_rows(batch))
+    _rank()
+
+
+def rebuild_leaderboards(course_ids=None):
+    """
+    Recompute the given courses and the global rows of the users they changed; returns courses done.
+
+    With no ``course_ids`` every course and the whole global scope are rebuilt.
+    """
+    rebuild_all = course_ids is None
+    if rebuild_all:
+        course_ids = Course.objects.values_list('id', flat=True)
+    done = 0
+    touched = set()
+    for course_id in course_ids:
+        touched |= recompute_course(course_id)
+        done += 1
+    recompute_global(None if rebuild_all else touched)
+    return done
+
+
+def team_standings(team_id):
+    """Global rows of ``team_id``'s members, dense-ranked within the team as ``team_rank``."""
+    members = TeamMember.objects.filter(team_id=team_id, user=OuterRef('user_id'))
+    return (
+        Leaderboard.objects.filter(Exists(members), course__isnull=True)
+        .select_related('user')
+        .annotate(team_rank=Window(DenseRank(), order_by=F('total_points').desc()))
+        .order_by('team_rank', 'id')
+    )
+
+
+class LeaderboardScheduler:
+    """Collects dirty course ids and recomputes them at most once per debounce interval."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+
+    def mark(self, course_ids):
+        interval = getattr(settings, 'LEADERBOARD_DEBOUNCE_SECONDS', 30)
+        with self._lock:
+            self._dirty.update(course_ids)
+            if interval > 0 and self._dirty and self._timer is None:
+                self._timer = threading.Timer(interval, self._fire)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def drain(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def flush(self):
+        """Recompute every dirty course and the global scope; returns the number of courses."""
+        dirty = self.drain()
+        if not dirty:
+            return 0
+        try:
+            return rebuild_leaderboards(dirty)
+        except Exception:
+            with self._lock:
+                self._dirty.update(dirty)
+            raise
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        close_old_connections()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Failed to recompute leaderboards")
+        finally:
+            close_old_connections()
+
+
+leaderboard_scheduler = LeaderboardScheduler()
+
+
+def schedule_recompute(course_ids):
+    """Mark courses dirty once the current transaction commits."""
+    course_ids = {course_id for course_id in course_ids if course_id}
+    if course_ids:
+        transaction.on_commit(lambda: leaderboard_scheduler.mark(course_ids))
@@ -0,0 +1,52 @@
+"""
+Bulk loaders for nested course data.
+
+The serializers walk reverse one-to-one relations (``unit.video_details`` ...) and
+``quiz_details.questions`` for every unit. These helpers fetch those rows in a fixed
+number of queries and store them in Django's relation caches, so serialization
+afterwards does not hit the database.
+"""
+
+from collections import defaultdict
+from django.db.models import prefetch_related_objects
+
+from .models import Unit
+
+
+def prefetch_unit_details(units):
+    """
+    Populate the detail relation caches of ``units``.
+
+    Each detail table is queried at most once, and only for units whose module_type
+    can have a row in it. Relations ruled out by the module_type are cached as missing,
+    so accessing them raises ``DoesNotExist`` without a query (DRF renders them as null).
+
+    Returns the units as a list.
+    """
+    units = list(units)
+    candidates = defaultdict(list)
+    for unit in units:
+        for relation in unit.detail_relations:
+            candidates[relation].append(unit.pk)
+
+    for relation in Unit.DETAIL_RELATIONS:
+        rel = Unit._meta.get_field(relation)
+        found = {}
+        if candidates[relation]:
+            queryset = rel.related_model.objects.filter(unit_id__in=candidates[relation])
+            if relation == 'quiz_details':
+                queryset = queryset.prefetch_related('questions')
+            found = {obj.unit_id: obj for obj in queryset}
+        for unit in units:
+            obj = found.get(unit.pk)
+            rel.set_cached_value(unit, obj)
+            if obj is not None:
+                rel.field.set_cached_value(obj, unit)
+    return units
+
+
+def prefetch_course_tree(course):
+    """Load a course's units with all detail rows and quiz questions in a fixed number of queries."""
+    prefetch_related_objects([course], 'units')
+    prefetch_unit_details(course.units.all())
+    return course
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-course enrollment counters from the enrollments table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', help='Limit the rebuild to these course ids')
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids'] or None
+        written = rebuild_counters(course_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt enrollment counters for {written} courses'))
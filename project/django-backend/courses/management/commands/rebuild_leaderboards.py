@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.leaderboard import rebuild_leaderboards
+
+
+class Command(BaseCommand):
+    help = 'Recompute leaderboard points and ranks for courses and the global scope'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', help='Limit the rebuild to these course ids')
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids'] or None
+        done = rebuild_leaderboards(course_ids)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed leaderboards for {done} courses'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from courses.quiz_scores import rebuild_quiz_scores
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-learner quiz score rollup (quiz_scores) from quiz attempts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='*', help='Limit the rebuild to these quiz ids')
+
+    def handle(self, *args, **options):
+        quiz_ids = options['quiz_ids'] or None
+        done = rebuild_quiz_scores(quiz_ids)
+        self.stdout.write(self.style.SUCCESS(f'Recomputed quiz scores for {done} quizzes'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Quiz
+from courses.regrade import CHUNK_SIZE, regrade_quiz
+
+
+class Command(BaseCommand):
+    help = 'Re-score quiz attempts against the current answer keys, streaming attempts in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('quiz_ids', nargs='+', help='Quizzes to regrade')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Attempts graded and written per batch')
+
+    def handle(self, *args, **options):
+        for quiz_id in options['quiz_ids']:
+            quiz = Quiz.objects.select_related('unit').filter(id=quiz_id).first()
+            if quiz is None:
+                raise CommandError(f'Quiz not found: {quiz_id}')
+
+            def report(totals, last_id):
+                self.stdout.write(f'{quiz_id}: {totals["processed"]} attempts processed, {totals["changed"]} changed')
+
+            totals = regrade_quiz(quiz, chunk_size=options['chunk_size'], on_chunk=report)
+            self.stdout.write(self.style.SUCCESS(
+                f'Regraded quiz {quiz_id}: {totals["processed"]} attempts, {totals["changed"]} changed'
+            ))
@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.jobs import claimable_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Execute pending background jobs (and, with --resume, jobs interrupted by a worker restart)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resume', action='store_true', help='Also pick up running jobs whose worker lease has expired')
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs')
+        parser.add_argument('--interval', type=float, default=5.0, help='Polling interval in seconds for --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            job_ids = list(claimable_jobs(options['resume']).order_by('created_at').values_list('id', flat=True))
+            for job_id in job_ids:
+                job = run_job(job_id, resume=options['resume'])
+                if job is not None:
+                    self.stdout.write(f'{job.id} {job.job_type}: {job.status}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.quiz_sessions import SWEEP_BATCH_SIZE, sweep_expired_attempts
+
+
+class Command(BaseCommand):
+    help = 'Auto-submit quiz sessions whose time limit (plus grace period) has passed, in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SWEEP_BATCH_SIZE, help='Attempts graded and written per batch')
+        parser.add_argument('--loop', action='store_true', help='Keep sweeping')
+        parser.add_argument('--interval', type=float, default=30.0, help='Seconds between sweeps for --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            swept = sweep_expired_attempts(batch_size=options['batch_size'])
+            if swept or not options['loop']:
+                self.stdout.write(self.style.SUCCESS(f'Submitted {swept} expired quiz attempts'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_background_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='progress',
+            field=models.JSONField(default=dict),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_counters(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    CourseEnrollmentCounter = apps.get_model('courses', 'CourseEnrollmentCounter')
+    rows = (
+        Enrollment.objects.values('course_id')
+        .annotate(
+            total_enrolled=Count('id'),
+            assigned=Count('id', filter=Q(status='assigned')),
+            in_progress=Count('id', filter=Q(status='in_progress')),
+            completed=Count('id', filter=Q(status='completed')),
+        )
+        .order_by()
+    )
+    CourseEnrollmentCounter.objects.bulk_create([CourseEnrollmentCounter(**row) for row in rows], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_background_job_progress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseEnrollmentCounter',
+            fields=[
+                ('course', models.OneToOneField(db_column='course_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='enrollment_counter', serialize=False, to='courses.course')),
+                ('total_enrolled', models.IntegerField(default=0)),
+                ('assigned', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'course_enrollment_counters',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
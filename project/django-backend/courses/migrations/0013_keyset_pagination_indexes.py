@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_course_enrollment_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['-submitted_at', '-id'], name='idx_submission_submitted'),
+        ),
+        migrations.AddIndex(
+            model_name='assignmentsubmission',
+            index=models.Index(fields=['user', '-submitted_at'], name='idx_submission_user_submitted'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['-assigned_at', '-id'], name='idx_enroll_assigned'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-assigned_at'], name='idx_enroll_user_assigned'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['course', '-assigned_at'], name='idx_enroll_course_assigned'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['-started_at', '-id'], name='idx_attempt_started'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['user', '-started_at'], name='idx_attempt_user_started'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:08
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('courses', '0013_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(fields=['primary_role', 'email', 'id'], name='idx_users_role_email'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='idx_users_email_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.text.Upper('first_name'), name='idx_users_first_name_upper'),
+        ),
+        migrations.AddIndex(
+            model_name='profile',
+            index=models.Index(django.db.models.functions.text.Upper('last_name'), name='idx_users_last_name_upper'),
+        ),
+    ]
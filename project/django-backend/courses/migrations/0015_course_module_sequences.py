@@ -0,0 +1,24 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_assignable_learner_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseModuleSequence',
+            fields=[
+                ('course', models.OneToOneField(db_column='course_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='module_sequence', serialize=False, to='courses.course')),
+                ('last_value', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'course_module_sequences',
+            },
+        ),
+    ]
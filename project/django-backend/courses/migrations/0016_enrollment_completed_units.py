@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:14
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_completed_units(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    UnitProgress = apps.get_model('courses', 'UnitProgress')
+    rows = (
+        UnitProgress.objects.filter(status='completed')
+        .values('enrollment_id')
+        .annotate(
+            completed=Count('id'),
+            completed_mandatory=Count('id', filter=Q(unit__is_mandatory=True)),
+        )
+        .order_by()
+    )
+    for row in rows.iterator():
+        Enrollment.objects.filter(pk=row['enrollment_id']).update(
+            completed_units=row['completed'],
+            completed_mandatory_units=row['completed_mandatory'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_course_module_sequences'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_mandatory_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_units',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_completed_units, migrations.RunPython.noop),
+    ]
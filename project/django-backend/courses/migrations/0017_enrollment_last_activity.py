@@ -0,0 +1,38 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:18
+
+from django.db import migrations, models
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_last_activity(apps, schema_editor):
+    Enrollment = apps.get_model('courses', 'Enrollment')
+    UnitProgress = apps.get_model('courses', 'UnitProgress')
+    latest = (
+        UnitProgress.objects.filter(enrollment=OuterRef('pk'))
+        .values('enrollment')
+        .annotate(at=Max(Coalesce('completed_at', 'started_at')))
+        .values('at')
+        .order_by()
+    )
+    Enrollment.objects.update(last_activity_at=Coalesce(Subquery(latest), F('completed_at'), F('started_at')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_enrollment_completed_units'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='last_activity_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['user', '-last_activity_at'], name='idx_enroll_user_activity'),
+        ),
+        migrations.RunPython(backfill_last_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:22
+
+from django.db import migrations, models
+
+
+def drop_duplicate_global_rows(apps, schema_editor):
+    Leaderboard = apps.get_model('courses', 'Leaderboard')
+    seen = set()
+    duplicates = []
+    for entry_id, user_id in Leaderboard.objects.filter(course__isnull=True).order_by('user_id', '-updated_at').values_list('id', 'user_id'):
+        if user_id in seen:
+            duplicates.append(entry_id)
+        seen.add(user_id)
+    Leaderboard.objects.filter(id__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0017_enrollment_last_activity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['course', 'rank', 'id'], name='idx_leaderboard_course_rank'),
+        ),
+        migrations.RunPython(drop_duplicate_global_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='leaderboard',
+            constraint=models.UniqueConstraint(condition=models.Q(('course__isnull', True)), fields=('user',), name='uq_leaderboard_global_user'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0018_leaderboard_ranking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='pending_review',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='points_earned',
+            field=models.IntegerField(default=0),
+        ),
+    ]
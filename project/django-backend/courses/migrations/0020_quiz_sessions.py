@@ -0,0 +1,75 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:34
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_attempt_counters(apps, schema_editor):
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    QuizAttemptCounter = apps.get_model('courses', 'QuizAttemptCounter')
+    counts = QuizAttempt.objects.values('user_id', 'quiz_id').annotate(n=Count('id')).order_by()
+    QuizAttemptCounter.objects.bulk_create(
+        [QuizAttemptCounter(user_id=row['user_id'], quiz_id=row['quiz_id'], started=row['n']) for row in counts.iterator()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0019_quiz_attempt_grading'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttemptCounter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('started', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'quiz_attempt_counters',
+            },
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='attempt_number',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='status',
+            field=models.CharField(choices=[('in_progress', 'In Progress'), ('submitted', 'Submitted')], default='submitted', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(condition=models.Q(('status', 'in_progress')), fields=['user', 'quiz'], name='idx_attempt_open_user_quiz'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(condition=models.Q(('status', 'in_progress')), fields=['expires_at', 'id'], name='idx_attempt_open_expiry'),
+        ),
+        migrations.AddField(
+            model_name='quizattemptcounter',
+            name='quiz',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_counters', to='courses.quiz'),
+        ),
+        migrations.AddField(
+            model_name='quizattemptcounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempt_counters', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='quizattemptcounter',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='uq_attempt_counter_user_quiz'),
+        ),
+        migrations.RunPython(backfill_attempt_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:37
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0020_quiz_sessions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='question_ids',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='QuestionBank',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='question_banks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'question_banks',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizBankDraw',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('order', models.IntegerField(default=0)),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_draws', to='courses.questionbank')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_draws', to='courses.quiz')),
+            ],
+            options={
+                'db_table': 'quiz_bank_draws',
+                'ordering': ['quiz', 'order'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BankQuestion',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('category', models.CharField(blank=True, default='', max_length=100)),
+                ('difficulty', models.CharField(blank=True, choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')], max_length=20, null=True)),
+                ('type', models.CharField(choices=[('multiple_choice', 'Multiple Choice'), ('multiple_answer', 'Multiple Answer'), ('true_false', 'True/False'), ('fill_blank', 'Fill in the Blank'), ('matching', 'Matching'), ('ordering', 'Ordering'), ('free_text', 'Free Text')], max_length=20)),
+                ('text', models.TextField()),
+                ('options', models.JSONField(default=list)),
+                ('correct_answer', models.JSONField(blank=True, null=True)),
+                ('points', models.IntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bank', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='courses.questionbank')),
+            ],
+            options={
+                'db_table': 'bank_questions',
+                'indexes': [models.Index(fields=['bank', 'category', 'id'], name='idx_bank_question_category')],
+            },
+        ),
+    ]
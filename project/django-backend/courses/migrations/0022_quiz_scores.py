@@ -0,0 +1,70 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:41
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_quiz_scores(apps, schema_editor):
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    QuizScore = apps.get_model('courses', 'QuizScore')
+    attempted_at = Coalesce('completed_at', 'started_at')
+    submitted = QuizAttempt.objects.filter(status='submitted')
+    latest = (
+        submitted.filter(user=OuterRef('user_id'), quiz=OuterRef('quiz_id'))
+        .order_by(attempted_at.desc(), '-id').values('score')[:1]
+    )
+    rows = (
+        submitted.values('user_id', 'quiz_id')
+        .annotate(
+            best=Max('score'), last=Subquery(latest), total=Sum('score'), n=Count('id'),
+            passes=Count('id', filter=Q(passed=True)), at=Max(attempted_at),
+        )
+        .order_by()
+    )
+    QuizScore.objects.bulk_create(
+        [
+            QuizScore(
+                user_id=row['user_id'], quiz_id=row['quiz_id'], best_score=row['best'], last_score=row['last'],
+                score_total=row['total'], attempt_count=row['n'], passed=row['passes'] > 0, last_attempt_at=row['at'],
+            )
+            for row in rows.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0021_question_banks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizScore',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('best_score', models.IntegerField(default=0)),
+                ('last_score', models.IntegerField(default=0)),
+                ('score_total', models.IntegerField(default=0)),
+                ('attempt_count', models.IntegerField(default=0)),
+                ('passed', models.BooleanField(default=False)),
+                ('last_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scores', to='courses.quiz')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'quiz_scores',
+                'indexes': [models.Index(fields=['quiz', '-best_score'], name='idx_quiz_score_best')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='quizscore',
+            constraint=models.UniqueConstraint(fields=('user', 'quiz'), name='uq_quiz_score_user_quiz'),
+        ),
+        migrations.RunPython(backfill_quiz_scores, migrations.RunPython.noop),
+    ]
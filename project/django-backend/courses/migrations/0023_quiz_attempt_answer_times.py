@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0022_quiz_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='answer_times',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
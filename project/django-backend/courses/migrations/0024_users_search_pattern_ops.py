@@ -0,0 +1,47 @@
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+SEARCH_COLUMNS = {
+    'email': 'idx_users_email_upper',
+    'first_name': 'idx_users_first_name_upper',
+    'last_name': 'idx_users_last_name_upper',
+}
+
+
+def _indexes(pattern_ops):
+    if pattern_ops:
+        from django.contrib.postgres.indexes import OpClass
+    return [
+        models.Index(OpClass(Upper(column), name='text_pattern_ops') if pattern_ops else Upper(column), name=name)
+        for column, name in SEARCH_COLUMNS.items()
+    ]
+
+
+def _swap(apps, schema_editor, pattern_ops):
+    # With a non-C collation PostgreSQL only serves LIKE 'prefix%' (istartswith) from
+    # text_pattern_ops indexes; SQLite has no operator classes and keeps the plain ones.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    profile = apps.get_model('courses', 'Profile')
+    for old, new in zip(_indexes(not pattern_ops), _indexes(pattern_ops)):
+        schema_editor.remove_index(profile, old)
+        schema_editor.add_index(profile, new)
+
+
+def use_pattern_ops(apps, schema_editor):
+    _swap(apps, schema_editor, True)
+
+
+def use_plain_indexes(apps, schema_editor):
+    _swap(apps, schema_editor, False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0023_quiz_attempt_answer_times'),
+    ]
+
+    operations = [
+        migrations.RunPython(use_pattern_ops, use_plain_indexes),
+    ]
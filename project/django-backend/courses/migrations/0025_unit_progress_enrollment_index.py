@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0024_users_search_pattern_ops'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='unitprogress',
+            index=models.Index(fields=['enrollment', 'id'], name='idx_progress_enrollment'),
+        ),
+    ]
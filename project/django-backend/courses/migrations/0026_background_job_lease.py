@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0025_unit_progress_enrollment_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='backgroundjob',
+            name='locked_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
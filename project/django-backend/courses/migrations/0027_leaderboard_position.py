@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:34
+
+from django.db import migrations, models
+
+
+def number_positions(apps, schema_editor):
+    # Same ordering as courses.leaderboard._rank, for every scope at once
+    qn = schema_editor.connection.ops.quote_name
+    table = qn('leaderboard')
+    schema_editor.execute(
+        f"UPDATE {table} SET {qn('position')} = ranked.place "
+        f"FROM (SELECT {qn('id')}, ROW_NUMBER() OVER ("
+        f"PARTITION BY {qn('course_id')} ORDER BY {qn('total_points')} DESC, {qn('user_id')}) AS place "
+        f"FROM {table}) AS ranked "
+        f"WHERE {table}.{qn('id')} = ranked.{qn('id')}"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0026_background_job_lease'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='leaderboard',
+            name='idx_leaderboard_course_rank',
+        ),
+        migrations.AddField(
+            model_name='leaderboard',
+            name='position',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(number_positions, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='leaderboard',
+            index=models.Index(fields=['course', 'position'], name='idx_leaderboard_course_pos'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-17 08:43
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0027_leaderboard_position'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='questionbank',
+            name='created_by',
+            field=models.ForeignKey(db_column='created_by', on_delete=django.db.models.deletion.CASCADE, related_name='question_banks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='questionbank',
+            name='id',
+            field=models.UUIDField(db_column='test_bank_id', default=uuid.uuid4, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterModelTable(
+            name='questionbank',
+            table='test_bank',
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Upper
 from django.utils import timezone
 import uuid
 
@@ -25,6 +26,14 @@ class Profile(AbstractUser):
 
     class Meta:
         db_table = 'users'
+        indexes = [
+            # assignable_learners: role filter + cursor ordering, and case-insensitive prefix search
+            # (PostgreSQL builds the Upper() indexes with text_pattern_ops, see migration 0024)
+            models.Index(fields=['primary_role', 'email', 'id'], name='idx_users_role_email'),
+            models.Index(Upper('email'), name='idx_users_email_upper'),
+            models.Index(Upper('first_name'), name='idx_users_first_name_upper'),
+            models.Index(Upper('last_name'), name='idx_users_last_name_upper'),
+        ]
 
     @property
     def full_name(self):
@@ -69,6 +78,28 @@ class Unit(models.Model):
         ('mixed', 'Mixed'),
     ]
 
+    # Reverse one-to-one accessors for the per-type detail tables.
+    DETAIL_RELATIONS = (
+        'video_details', 'audio_details', 'presentation_details', 'text_details', 'page_details',
+        'quiz_details', 'assignment_details', 'scorm_details', 'survey_details',
+    )
+
+    # Detail tables a module_type can have rows in (mirrors unitService.getUnitDetails on the
+    # frontend). Types missing here, such as 'mixed', may use any of DETAIL_RELATIONS.
+    MODULE_TYPE_DETAILS = {
+        'text': ('text_details',),
+        'video': ('video_details',),
+        'audio': ('audio_details',),
+        'presentation': ('presentation_details',),
+        'scorm': ('scorm_details',),
+        'xapi': ('scorm_details',),
+        'quiz': ('quiz_details',),
+        'test': ('quiz_details',),
+        'assignment': ('assignment_details',),
+        'survey': ('survey_details',),
+        'page': ('page_details',),
+    }
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_column='module_id')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='units', db_column='course_id')
     module_type = models.CharField(max_length=30, choices=MODULE_TYPES, db_column='module_type')
@@ -98,6 +129,21 @@ class Unit(models.Model):
     def order(self, value):
         self.sequence_order = value
 
+    @property
+    def detail_relations(self):
+        """Detail accessors that may hold data for this unit's module_type."""
+        return self.MODULE_TYPE_DETAILS.get(self.module_type, self.DETAIL_RELATIONS)
+
+
+class CourseModuleSequence(models.Model):
+    """Highest sequence_order handed out per course; see courses.module_order.allocate_sequence_order."""
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='module_sequence', db_column='course_id')
+    last_value = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'course_module_sequences'
+
 
 class VideoUnit(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -198,6 +244,60 @@ class Question(models.Model):
         ordering = ['quiz', 'order']
 
 
+class QuestionBank(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_column='test_bank_id')
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='question_banks', db_column='created_by')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'test_bank'
+
+
+class BankQuestion(models.Model):
+    """A question kept in a bank; quizzes draw them per attempt through ``QuizBankDraw``."""
+
+    DIFFICULTY_CHOICES = [
+        ('easy', 'Easy'),
+        ('medium', 'Medium'),
+        ('hard', 'Hard'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    bank = models.ForeignKey(QuestionBank, on_delete=models.CASCADE, related_name='questions')
+    category = models.CharField(max_length=100, blank=True, default='')
+    difficulty = models.CharField(max_length=20, choices=DIFFICULTY_CHOICES, blank=True, null=True)
+    type = models.CharField(max_length=20, choices=Question.QUESTION_TYPES)
+    text = models.TextField()
+    options = models.JSONField(default=list)
+    correct_answer = models.JSONField(blank=True, null=True)
+    points = models.IntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'bank_questions'
+        indexes = [
+            models.Index(fields=['bank', 'category', 'id'], name='idx_bank_question_category'),
+        ]
+
+
+class QuizBankDraw(models.Model):
+    """Draw ``count`` random questions from ``bank`` (limited to ``category`` if set) into each attempt."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='bank_draws')
+    bank = models.ForeignKey(QuestionBank, on_delete=models.CASCADE, related_name='quiz_draws')
+    category = models.CharField(max_length=100, blank=True, default='')
+    count = models.PositiveIntegerField(default=1)
+    order = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'quiz_bank_draws'
+        ordering = ['quiz', 'order']
+
+
 class Assignment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_column='assignment_id')
     unit = models.OneToOneField(Unit, on_delete=models.CASCADE, related_name='assignment_details', db_column='module_id')
@@ -254,13 +354,38 @@ class Enrollment(models.Model):
         default='assigned'
     )
     progress_percentage = models.IntegerField(default=0)
+    # Maintained incrementally from unit_progress by courses.progress
+    completed_units = models.IntegerField(default=0)
+    completed_mandatory_units = models.IntegerField(default=0)
     assigned_at = models.DateTimeField(default=timezone.now)
     started_at = models.DateTimeField(blank=True, null=True)
     completed_at = models.DateTimeField(blank=True, null=True)
+    # Latest unit progress or quiz attempt write, maintained by courses.progress
+    last_activity_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         db_table = 'enrollments'
         unique_together = ['course', 'user']
+        indexes = [
+            models.Index(fields=['-assigned_at', '-id'], name='idx_enroll_assigned'),
+            models.Index(fields=['user', '-assigned_at'], name='idx_enroll_user_assigned'),
+            models.Index(fields=['course', '-assigned_at'], name='idx_enroll_course_assigned'),
+            models.Index(fields=['user', '-last_activity_at'], name='idx_enroll_user_activity'),
+        ]
+
+
+class CourseEnrollmentCounter(models.Model):
+    """Per-course enrollment totals, kept in step with `enrollments` by courses.counters."""
+
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='enrollment_counter', db_column='course_id')
+    total_enrolled = models.IntegerField(default=0)
+    assigned = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'course_enrollment_counters'
 
 
 class UnitProgress(models.Model):
@@ -280,6 +405,10 @@ class UnitProgress(models.Model):
     class Meta:
         db_table = 'unit_progress'
         unique_together = ['enrollment', 'unit']
+        indexes = [
+            # UnitProgressPagination: an enrollment's rows together, id as tie-breaker
+            models.Index(fields=['enrollment', 'id'], name='idx_progress_enrollment'),
+        ]
 
 
 class AssignmentSubmission(models.Model):
@@ -302,20 +431,84 @@ class AssignmentSubmission(models.Model):
 
     class Meta:
         db_table = 'assignment_submissions'
+        indexes = [
+            models.Index(fields=['-submitted_at', '-id'], name='idx_submission_submitted'),
+            models.Index(fields=['user', '-submitted_at'], name='idx_submission_user_submitted'),
+        ]
 
 
 class QuizAttempt(models.Model):
+    STATUS_CHOICES = [
+        ('in_progress', 'In Progress'),
+        ('submitted', 'Submitted'),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempts')
     user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='quiz_attempts')
+    # Sessions (courses.quiz_sessions) stay in_progress until submitted or swept
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='submitted')
+    attempt_number = models.IntegerField(blank=True, null=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+    # Bank questions drawn for this attempt (courses.question_banks), on top of the quiz's own
+    question_ids = models.JSONField(blank=True, null=True)
     score = models.IntegerField(default=0)
     passed = models.BooleanField(default=False)
     answers = models.JSONField(default=dict)
+    # Seconds from started_at to each question's final answer, recorded by sessions
+    answer_times = models.JSONField(default=dict, blank=True)
+    # Written by courses.grading; free text answers leave the attempt pending review
+    points_earned = models.IntegerField(default=0)
+    pending_review = models.BooleanField(default=False)
     started_at = models.DateTimeField(default=timezone.now)
     completed_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         db_table = 'quiz_attempts'
+        indexes = [
+            models.Index(fields=['-started_at', '-id'], name='idx_attempt_started'),
+            models.Index(fields=['user', '-started_at'], name='idx_attempt_user_started'),
+            models.Index(fields=['user', 'quiz'], condition=models.Q(status='in_progress'), name='idx_attempt_open_user_quiz'),
+            models.Index(fields=['expires_at', 'id'], condition=models.Q(status='in_progress'), name='idx_attempt_open_expiry'),
+        ]
+
+
+class QuizScore(models.Model):
+    """Rollup of a learner's submitted attempts on one quiz; maintained by courses.quiz_scores."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='quiz_scores')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='scores')
+    best_score = models.IntegerField(default=0)
+    last_score = models.IntegerField(default=0)
+    score_total = models.IntegerField(default=0)
+    attempt_count = models.IntegerField(default=0)
+    passed = models.BooleanField(default=False)
+    last_attempt_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'quiz_scores'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='uq_quiz_score_user_quiz'),
+        ]
+        indexes = [
+            models.Index(fields=['quiz', '-best_score'], name='idx_quiz_score_best'),
+        ]
+
+
+class QuizAttemptCounter(models.Model):
+    """Attempts started per (user, quiz); see courses.quiz_sessions.allocate_attempt."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(Profile, on_delete=models.CASCADE, related_name='quiz_attempt_counters')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='attempt_counters')
+    started = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'quiz_attempt_counters'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'quiz'], name='uq_attempt_counter_user_quiz'),
+        ]
 
 
 class Leaderboard(models.Model):
@@ -327,11 +520,21 @@ class Leaderboard(models.Model):
     quiz_score_total = models.IntegerField(default=0)
     activity_points = models.IntegerField(default=0)
     rank = models.IntegerField(default=0)
+    # Unique place within the scope (rank order, ties by user id): the pagination key,
+    # since dense ranks repeat
+    position = models.IntegerField(default=0)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'leaderboard'
         unique_together = ['user', 'course']
+        constraints = [
+            # unique_together does not cover the global rows, whose course is NULL
+            models.UniqueConstraint(fields=['user'], condition=models.Q(course__isnull=True), name='uq_leaderboard_global_user'),
+        ]
+        indexes = [
+            models.Index(fields=['course', 'position'], name='idx_leaderboard_course_pos'),
+        ]
 
 
 class ModuleSequencing(models.Model):
@@ -441,3 +644,35 @@ class MediaMetadata(models.Model):
 
     class Meta:
         db_table = 'media_metadata'
+
+
+class BackgroundJob(models.Model):
+    """Long-running work (course duplication, bulk assignment) executed outside the request cycle."""
+
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, db_column='job_id')
+    job_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20, choices=STATUSES, default='pending')
+    payload = models.JSONField(default=dict)
+    # Handler-defined counters and resume position, committed together with each unit of work
+    progress = models.JSONField(default=dict)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    created_by = models.ForeignKey(Profile, on_delete=models.SET_NULL, null=True, blank=True, related_name='background_jobs')
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    # Lease of the worker executing a running job, renewed while it runs (courses.jobs)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'background_jobs'
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'created_at'], name='idx_background_jobs_status')]
@@ -0,0 +1,143 @@
+"""
+Module ordering within a course.
+
+Positions (``Unit.sequence_order``) are spaced ``SEQUENCE_GAP`` apart, so placing a
+module between two neighbours only rewrites that module's row. A full reorder is
+applied with a constant number of statements: every position is first shifted into
+a negative range that cannot collide with ``uq_module_sequence``, then a single
+``CASE`` update writes the final, evenly spaced positions.
+
+New modules get their position from a per-course allocator row
+(``CourseModuleSequence``) that is advanced atomically in one upsert statement, so
+authors adding modules to the same course concurrently never collide.
+"""
+
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from .models import Course, Unit, CourseModuleSequence
+
+SEQUENCE_GAP = 1024
+
+
+def allocate_sequence_order(course_id):
+    """
+    Reserve the next free position at the end of a course in a single round trip.
+
+    The allocator row is created on first use from the course's current maximum
+    position; afterwards each call advances it by ``SEQUENCE_GAP`` under the row lock.
+    """
+    allocator = CourseModuleSequence._meta
+    unit = Unit._meta
+    qn = connection.ops.quote_name
+    course_id = _db_course_id(course_id)
+    sql = (
+        f"INSERT INTO {qn(allocator.db_table)} ({qn('course_id')}, {qn('last_value')}) "
+        f"VALUES (%s, (SELECT COALESCE(MAX({qn('sequence_order')}), 0) FROM {qn(unit.db_table)} "
+        f"WHERE {qn('course_id')} = %s) + %s) "
+        f"ON CONFLICT ({qn('course_id')}) DO UPDATE "
+        f"SET {qn('last_value')} = {qn(allocator.db_table)}.{qn('last_value')} + %s "
+        f"RETURNING {qn('last_value')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [course_id, course_id, SEQUENCE_GAP, SEQUENCE_GAP])
+        return cursor.fetchone()[0]
+
+
+def reserve_sequence_order(course_id, position):
+    """Make sure the allocator never hands out ``position`` or anything below it again (one statement)."""
+    table = connection.ops.quote_name(CourseModuleSequence._meta.db_table)
+    qn = connection.ops.quote_name
+    # SQLite spells GREATEST as the two-argument scalar MAX
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    sql = (
+        f"INSERT INTO {table} ({qn('course_id')}, {qn('last_value')}) VALUES (%s, %s) "
+        f"ON CONFLICT ({qn('course_id')}) DO UPDATE "
+        f"SET {qn('last_value')} = {greatest}({table}.{qn('last_value')}, %s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [_db_course_id(course_id), position, position])
+
+
+def _db_course_id(course_id):
+    return CourseModuleSequence._meta.pk.get_db_prep_value(Course._meta.pk.to_python(course_id), connection)
+
+
+def _lock_course(course):
+    # Serialize concurrent reorders of the same course (no-op on SQLite)
+    Course.objects.select_for_update().filter(pk=course.pk).values_list('pk', flat=True).first()
+
+
+def _apply_order(course, module_ids, current):
+    """Write gap-spaced positions for ``module_ids``; ``current`` maps id -> sequence_order."""
+    lowest = min(min(current.values()), 0)
+    highest = max(current.values())
+    units = Unit.objects.filter(course=course)
+    # Every shifted value is below both the old minimum and zero, so no row collides mid-update
+    units.update(sequence_order=F('sequence_order') - (highest - lowest) - 1)
+    units.update(sequence_order=Case(
+        *[When(id=module_id, then=Value((index + 1) * SEQUENCE_GAP)) for index, module_id in enumerate(module_ids)],
+        default=F('sequence_order'),
+        output_field=IntegerField(),
+    ))
+    reserve_sequence_order(course.pk, len(module_ids) * SEQUENCE_GAP)
+    return {module_id: (index + 1) * SEQUENCE_GAP for index, module_id in enumerate(module_ids)}
+
+
+@transaction.atomic
+def reorder_modules(course, module_ids):
+    """
+    Reorder all of ``course``'s modules to follow ``module_ids``.
+
+    ``module_ids`` must list every module of the course exactly once. Returns
+    ``{module_id: sequence_order}``. Raises ``ValidationError`` otherwise.
+    """
+    _lock_course(course)
+    current = dict(Unit.objects.filter(course=course).values_list('id', 'sequence_order'))
+    try:
+        ordered = [Unit._meta.pk.to_python(module_id) for module_id in module_ids]
+    except ValidationError:
+        raise ValidationError('module_ids must be a list of module ids')
+    if len(set(ordered)) != len(ordered):
+        raise ValidationError('module_ids contains duplicates')
+    if set(ordered) != set(current):
+        raise ValidationError('module_ids must list every module of the course exactly once')
+    if not ordered:
+        return {}
+    return _apply_order(course, ordered, current)
+
+
+@transaction.atomic
+def move_module(unit, after_id=None):
+    """
+    Place ``unit`` directly after the module ``after_id`` (or first when ``after_id`` is None).
+
+    Normally only ``unit``'s row changes, taking the midpoint of the gap; when the gap is
+    exhausted the whole course is renumbered. Returns the unit's new sequence_order.
+    """
+    course = unit.course
+    _lock_course(course)
+    ordered = list(Unit.objects.filter(course=course).order_by('sequence_order').values_list('id', 'sequence_order'))
+    current = dict(ordered)
+    others = [module_id for module_id, _ in ordered if module_id != unit.pk]
+    if after_id is None:
+        index = 0
+    else:
+        after_id = Unit._meta.pk.to_python(after_id)
+        if after_id not in current or after_id == unit.pk:
+            raise ValidationError('after_id must be another module of the same course')
+        index = others.index(after_id) + 1
+
+    lower = current[others[index - 1]] if index > 0 else 0
+    upper = current[others[index]] if index < len(others) else lower + 2 * SEQUENCE_GAP
+    if upper - lower > 1:
+        position = (lower + upper) // 2
+        Unit.objects.filter(pk=unit.pk).update(sequence_order=position)
+        if index == len(others):
+            reserve_sequence_order(course.pk, position)
+    else:
+        others.insert(index, unit.pk)
+        position = _apply_order(course, others, current)[unit.pk]
+    unit.sequence_order = position
+    return position
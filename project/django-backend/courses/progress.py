@@ -0,0 +1,242 @@
+"""
+Incremental enrollment progress.
+
+``Enrollment.progress_percentage``, ``status``, ``started_at`` and ``completed_at``
+follow the learner's ``UnitProgress`` rows. Rather than rescanning every progress
+row, each change adjusts the enrollment's ``completed_units`` /
+``completed_mandatory_units`` counters and re-derives the rest from the course's
+unit totals, costing a fixed number of queries per enrollment touched. Adding or
+deleting a unit, or changing its ``is_mandatory``, changes the totals of every
+enrollment in its course, so ``recount_enrollments`` recomputes them all from their progress rows in one aggregate and batched updates.
+
+An enrollment is completed when every mandatory unit is completed and the share of
+completed units reaches ``Course.passing_criteria`` percent.
+
+``Enrollment.last_activity_at`` is bumped by progress and quiz attempt writes. It is
+only rewritten once per ``ACTIVITY_RESOLUTION``, so frequent writes such as media
+heartbeats do not turn into an enrollment update each.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .counters import apply_counter_deltas, status_change_deltas
+from .leaderboard import schedule_recompute
+from .models import Enrollment, QuizScore, Unit, UnitProgress
+
+ACTIVE_STATUSES = ('in_progress', 'completed')
+ACTIVITY_RESOLUTION = timedelta(minutes=1)
+BATCH_SIZE = 500
+
+
+def _stale_activity(when):
+    return Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=when - ACTIVITY_RESOLUTION)
+
+
+def record_activity(enrollment_ids, when=None):
+    """Set ``last_activity_at`` on the given enrollments in one statement."""
+    enrollment_ids = set(enrollment_ids)
+    if not enrollment_ids:
+        return
+    when = when or timezone.now()
+    Enrollment.objects.filter(_stale_activity(when), pk__in=enrollment_ids).update(last_activity_at=when)
+
+
+def record_quiz_activity(user_id, course_id, when=None):
+    """Set ``last_activity_at`` on the user's enrollment in the course a quiz attempt belongs to."""
+    when = when or timezone.now()
+    Enrollment.objects.filter(_stale_activity(when), user_id=user_id, course_id=course_id).update(last_activity_at=when)
+
+
+@transaction.atomic
+def apply_progress_changes(changes):
+    """
+    Fold unit progress changes into their enrollments.
+
+    ``changes`` is an iterable of ``(enrollment_id, unit_id, old_status, new_status)``;
+    ``old_status`` is None for new rows and ``new_status`` is None for deleted ones.
+    Enrollments with nothing to update are left unlocked; the rest are locked with one
+    query and written with one batched update.
+    """
+    by_enrollment = defaultdict(list)
+    for enrollment_id, unit_id, old_status, new_status in changes:
+        by_enrollment[enrollment_id].append((unit_id, old_status, new_status))
+    if not by_enrollment:
+        return
+    unit_ids = {unit_id for items in by_enrollment.values() for unit_id, _, _ in items}
+    units = {unit_id: (is_mandatory, course_id) for unit_id, is_mandatory, course_id
+             in Unit.objects.filter(id__in=unit_ids).values_list('id', 'is_mandatory', 'course_id')}
+
+    deltas = {}
+    counted, starting = [], []
+    for enrollment_id, items in by_enrollment.items():
+        completed_delta = mandatory_delta = 0
+        active = False
+        for unit_id, old_status, new_status in items:
+            change = int(new_status == 'completed') - int(old_status == 'completed')
+            completed_delta += change
+            if unit_id in units and units[unit_id][0]:
+                mandatory_delta += change
+            active = active or new_status in ACTIVE_STATUSES
+        deltas[enrollment_id] = (completed_delta, mandatory_delta, active)
+        if completed_delta or mandatory_delta:
+            counted.append(enrollment_id)
+        elif active:
+            # Only matters if this is the enrollment's first activity
+            starting.append(enrollment_id)
+
+    if counted or starting:
+        _write_enrollments(counted, starting, deltas)
+    schedule_recompute(
+        units[unit_id][1] for items in by_enrollment.values() for unit_id, old_status, new_status in items
+        if unit_id in units and old_status != new_status
+    )
+
+
+def _write_enrollments(counted, starting, deltas):
+    enrollments = list(
+        Enrollment.objects.select_for_update().select_related('course')
+        .filter(Q(pk__in=counted) | Q(pk__in=starting, started_at__isnull=True))
+        .order_by('pk')
+    )
+    totals = {
+        row['course_id']: row for row in
+        Unit.objects.filter(course_id__in={enrollment.course_id for enrollment in enrollments})
+        .values('course_id').annotate(total=Count('id'), mandatory=Count('id', filter=Q(is_mandatory=True)))
+    }
+    fields = ['completed_units', 'completed_mandatory_units', 'progress_percentage', 'status', 'started_at', 'completed_at']
+    status_deltas = defaultdict(lambda: defaultdict(int))
+    for enrollment in enrollments:
+        completed_delta, mandatory_delta, active = deltas[enrollment.pk]
+        old_status = enrollment.status
+        enrollment.completed_units = max(enrollment.completed_units + completed_delta, 0)
+        enrollment.completed_mandatory_units = max(enrollment.completed_mandatory_units + mandatory_delta, 0)
+        course_totals = totals.get(enrollment.course_id, {'total': 0, 'mandatory': 0})
+        refresh_enrollment_state(enrollment, course_totals['total'], course_totals['mandatory'], active)
+        for status, delta in status_change_deltas(old_status, enrollment.status).items():
+            status_deltas[enrollment.course_id][status] += delta
+    # Bulk writes skip the Enrollment signals, so the course counters are adjusted here
+    Enrollment.objects.bulk_update(enrollments, fields, batch_size=BATCH_SIZE)
+    for course_id, course_deltas in status_deltas.items():
+        apply_counter_deltas(course_id, **course_deltas)
+
+
+def refresh_enrollment_state(enrollment, total_units, mandatory_units, active=False):
+    """Derive progress_percentage, status and timestamps from the enrollment's counters."""
+    now = timezone.now()
+    if total_units:
+        enrollment.progress_percentage = min(round(100 * enrollment.completed_units / total_units), 100)
+    else:
+        enrollment.progress_percentage = 0
+
+    if (active or enrollment.completed_units) and enrollment.started_at is None:
+        enrollment.started_at = now
+
+    done = (
+        total_units > 0
+        and enrollment.completed_mandatory_units >= mandatory_units
+        and enrollment.progress_percentage >= enrollment.course.passing_criteria
+    )
+    if done:
+        if enrollment.status != 'completed':
+            enrollment.status = 'completed'
+            enrollment.completed_at = now
+    else:
+        if enrollment.status == 'completed':
+            enrollment.completed_at = None
+        if enrollment.started_at is not None:
+            enrollment.status = 'in_progress'
+
+
+@transaction.atomic
+def recount_enrollments(course_id):
+    """Recompute the unit counters and state of every enrollment in ``course_id``; returns rows changed."""
+    totals = Unit.objects.filter(course_id=course_id).aggregate(
+        total=Count('id'), mandatory=Count('id', filter=Q(is_mandatory=True))
+    )
+    completed = Q(unit_progress__status='completed')
+    enrollments = (
+        Enrollment.objects.filter(course_id=course_id).select_related('course')
+        .annotate(
+            done=Count('unit_progress', filter=completed),
+            done_mandatory=Count('unit_progress', filter=completed & Q(unit_progress__unit__is_mandatory=True)),
+        )
+    )
+    fields = ['completed_units', 'completed_mandatory_units', 'progress_percentage', 'status', 'started_at', 'completed_at']
+    changed = []
+    deltas = defaultdict(int)
+    for enrollment in enrollments.iterator(chunk_size=BATCH_SIZE):
+        before = [getattr(enrollment, field) for field in fields]
+        enrollment.completed_units = enrollment.done
+        enrollment.completed_mandatory_units = enrollment.done_mandatory
+        refresh_enrollment_state(enrollment, totals['total'], totals['mandatory'])
+        if [getattr(enrollment, field) for field in fields] != before:
+            changed.append(enrollment)
+            for status, delta in status_change_deltas(before[3], enrollment.status).items():
+                deltas[status] += delta
+    # Bulk writes skip the Enrollment signals, so the course counters are adjusted here
+    Enrollment.objects.bulk_update(changed, fields, batch_size=BATCH_SIZE)
+    apply_counter_deltas(course_id, **deltas)
+    schedule_recompute([course_id])
+    return len(changed)
+
+
+@transaction.atomic
+def sync_quiz_progress(quiz, user_ids):
+    """
+    Bring the quiz unit's ``UnitProgress`` of ``user_ids`` in line with their ``QuizScore`` rows.
+
+    The unit is completed once any attempt passed (in progress otherwise) and its score
+    is the best attempt score. Rows are written in batches and the enrollments follow
+    through ``apply_progress_changes``. Returns the number of progress rows written.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    attempts = {
+        user_id: (best, passed)
+        for user_id, best, passed in QuizScore.objects.filter(quiz=quiz, user_id__in=user_ids)
+        .values_list('user_id', 'best_score', 'passed')
+    }
+    enrollments = dict(
+        Enrollment.objects.filter(course_id=quiz.unit.course_id, user_id__in=list(attempts)).values_list('user_id', 'id')
+    )
+    existing = {
+        progress.enrollment_id: progress
+        for progress in UnitProgress.objects.select_for_update().filter(unit_id=quiz.unit_id, enrollment_id__in=enrollments.values())
+    }
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    changes = []
+    for user_id, enrollment_id in enrollments.items():
+        best, passed = attempts[user_id]
+        progress = existing.get(enrollment_id)
+        if progress is None:
+            progress = UnitProgress(enrollment_id=enrollment_id, unit_id=quiz.unit_id, started_at=now, status=None)
+            to_create.append(progress)
+        elif progress.score == best and (progress.status == 'completed') == passed:
+            continue
+        else:
+            to_update.append(progress)
+        old_status = progress.status
+        if passed:
+            progress.status = 'completed'
+            progress.completed_at = progress.completed_at or now
+        elif old_status in (None, 'completed', 'not_started'):
+            progress.status = 'in_progress'
+            progress.completed_at = None
+        progress.score = best
+        changes.append((enrollment_id, quiz.unit_id, old_status, progress.status))
+
+    if to_update:
+        UnitProgress.objects.bulk_update(to_update, ['status', 'score', 'completed_at'])
+    if to_create:
+        UnitProgress.objects.bulk_create(to_create)
+    apply_progress_changes(changes)
+    return len(to_update) + len(to_create)
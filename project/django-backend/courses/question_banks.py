@@ -0,0 +1,160 @@
+"""
+Question banks and per-attempt random draws.
+
+A quiz's ``QuizBankDraw`` rows ask for "N random questions from bank X (in category
+Y)". The ids of every bank/category are kept in the cache as one packed, id-sorted
+byte string (16 bytes per question), so drawing N questions picks N random
+positions and slices them out: O(N) whatever the bank size, with no
+``ORDER BY random()`` and no query. The arrays are keyed by a per-bank version
+stamp that moves whenever one of the bank's questions changes, so they are rebuilt
+lazily on the next draw.
+
+Drawn question ids are stored on the attempt (``QuizAttempt.question_ids``). Each
+bank question's delivery payload and compiled answer key are cached together, and
+an attempt's answer key is the quiz's own key extended with its drawn questions.
+Questions deleted from a bank after being drawn are dropped from the attempt.
+"""
+
+import hashlib
+import random
+import uuid
+
+from django.core.cache import cache
+
+from .delivery import delivery_seed, question_payload
+from .grading import AnswerKey, answer_keys, compile_question
+from .models import BankQuestion
+
+BANK_CACHE_TIMEOUT = 24 * 3600
+ID_WIDTH = 16
+
+
+def _version_key(bank_id):
+    return f'question-bank:version:{bank_id}'
+
+
+def _ids_key(bank_id, version, category):
+    category = hashlib.md5(category.encode()).hexdigest() if category else ''
+    return f'question-bank:ids:{bank_id}:{version}:{category}'
+
+
+def _question_key(question_id):
+    return f'question-bank:question:{question_id}'
+
+
+def bump_bank_version(bank_id):
+    version = uuid.uuid4().hex
+    cache.set(_version_key(bank_id), version, None)
+    return version
+
+
+def bank_version(bank_id):
+    version = cache.get(_version_key(bank_id))
+    if version is None:
+        version = bump_bank_version(bank_id)
+    return version
+
+
+def invalidate_bank_question(question):
+    cache.delete(_question_key(question.pk))
+    bump_bank_version(question.bank_id)
+
+
+def bank_question_ids(bank_id, category=''):
+    """Packed ids of ``bank_id``'s questions (only ``category`` if given), sorted by id."""
+    key = _ids_key(bank_id, bank_version(bank_id), category)
+    ids = cache.get(key)
+    if ids is None:
+        questions = BankQuestion.objects.filter(bank_id=bank_id)
+        if category:
+            questions = questions.filter(category=category)
+        ids = b''.join(
+            question_id.bytes for question_id in questions.order_by('id').values_list('id', flat=True).iterator(chunk_size=5000)
+        )
+        cache.set(key, ids, BANK_CACHE_TIMEOUT)
+    return ids
+
+
+def draw_question_ids(draws, seed):
+    """
+    Ids drawn for ``draws`` (``[bank_id, category, count]`` rules) from ``seed``.
+
+    A question is drawn at most once even if several rules cover it; a rule asking
+    for more questions than its bank holds gets all of them.
+    """
+    rng = random.Random(seed)
+    chosen = []
+    seen = set()
+    for bank_id, category, count in draws:
+        ids = bank_question_ids(bank_id, category)
+        size = len(ids) // ID_WIDTH
+        # At most len(seen) of the sampled positions can be duplicates of earlier rules
+        taken = 0
+        for position in rng.sample(range(size), min(size, count + len(seen))):
+            if taken == count:
+                break
+            question_id = ids[position * ID_WIDTH:(position + 1) * ID_WIDTH]
+            if question_id not in seen:
+                seen.add(question_id)
+                chosen.append(str(uuid.UUID(bytes=question_id)))
+                taken += 1
+    return chosen
+
+
+def draw_seed(quiz_id, user_id, attempt_id):
+    return delivery_seed(quiz_id, user_id, f'draw:{attempt_id}')
+
+
+def bank_questions(question_ids):
+    """Cached ``{question_id: (payload, compiled key)}`` for ``question_ids`` (deleted ones omitted)."""
+    question_ids = {str(question_id) for question_id in question_ids}
+    cached = cache.get_many([_question_key(question_id) for question_id in question_ids])
+    entries = {
+        question_id: cached[_question_key(question_id)]
+        for question_id in question_ids if _question_key(question_id) in cached
+    }
+    missing = question_ids - set(entries)
+    if missing:
+        fresh = {
+            str(question.id): (question_payload(question), compile_question(question))
+            for question in BankQuestion.objects.filter(id__in=missing).only(
+                'id', 'type', 'text', 'options', 'correct_answer', 'points',
+            )
+        }
+        cache.set_many({_question_key(question_id): entry for question_id, entry in fresh.items()}, BANK_CACHE_TIMEOUT)
+        entries.update(fresh)
+    return entries
+
+
+def attempt_payload(payload, question_ids, entries=None):
+    """Delivery ``payload`` of a quiz with the attempt's drawn questions appended."""
+    if not question_ids:
+        return payload
+    entries = entries if entries is not None else bank_questions(question_ids)
+    drawn = [entries[question_id][0] for question_id in question_ids if question_id in entries]
+    return {**payload, 'questions': payload['questions'] + drawn}
+
+
+def extend_key(key, question_ids, entries):
+    """``key`` plus the compiled keys of the drawn ``question_ids`` found in ``entries``."""
+    if key is None or not question_ids:
+        return key
+    drawn = [entries[question_id][1] for question_id in question_ids if question_id in entries]
+    return AnswerKey(key.quiz_id, key.passing_score, key.questions + tuple(drawn))
+
+
+def attempt_answer_key(quiz_id, question_ids=None):
+    key = answer_keys([quiz_id]).get(str(quiz_id))
+    if not question_ids:
+        return key
+    return extend_key(key, question_ids, bank_questions(question_ids))
+
+
+def attempt_answer_keys(attempts):
+    """``{attempt.pk: AnswerKey}`` for ``attempts`` with one cache lookup per kind of key."""
+    keys = answer_keys({attempt.quiz_id for attempt in attempts})
+    entries = bank_questions({question_id for attempt in attempts for question_id in attempt.question_ids or ()})
+    return {
+        attempt.pk: extend_key(keys.get(str(attempt.quiz_id)), attempt.question_ids, entries)
+        for attempt in attempts
+    }
@@ -0,0 +1,115 @@
+"""
+Per-learner quiz score rollup.
+
+``QuizScore`` holds one row per (user, quiz) with the best, last and summed scores,
+the number of submitted attempts and whether any attempt passed. Unit progress,
+leaderboards and learner reports read it with indexed lookups instead of
+aggregating ``quiz_attempts``.
+
+Submitting an attempt folds it into the row with a single upsert in the same
+transaction (``record_attempt``). Changes that can lower a figure (regrades, edited
+or deleted attempts) recompute the affected rows from their attempts
+(``refresh_quiz_scores``); ``manage.py rebuild_quiz_scores`` recomputes whole quizzes.
+Attempts still in progress are not counted.
+"""
+
+import uuid
+
+from django.db import connection
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Quiz, QuizAttempt, QuizScore
+
+BATCH_SIZE = 500
+ROLLUP_FIELDS = ['best_score', 'last_score', 'score_total', 'attempt_count', 'passed', 'last_attempt_at']
+
+
+def record_attempt(attempt):
+    """Fold one newly submitted ``attempt`` into its (user, quiz) row in a single statement."""
+    qn = connection.ops.quote_name
+    table = qn(QuizScore._meta.db_table)
+    # SQLite spells GREATEST as the two-argument scalar MAX
+    greatest = 'MAX' if connection.vendor == 'sqlite' else 'GREATEST'
+    columns = ['id', 'user_id', 'quiz_id'] + ROLLUP_FIELDS
+    sql = (
+        f"INSERT INTO {table} ({', '.join(qn(column) for column in columns)}) "
+        f"VALUES ({', '.join(['%s'] * len(columns))}) "
+        f"ON CONFLICT ({qn('user_id')}, {qn('quiz_id')}) DO UPDATE SET "
+        f"{qn('best_score')} = {greatest}({table}.{qn('best_score')}, excluded.{qn('best_score')}), "
+        f"{qn('last_score')} = excluded.{qn('last_score')}, "
+        f"{qn('score_total')} = {table}.{qn('score_total')} + excluded.{qn('score_total')}, "
+        f"{qn('attempt_count')} = {table}.{qn('attempt_count')} + 1, "
+        f"{qn('passed')} = {table}.{qn('passed')} OR excluded.{qn('passed')}, "
+        f"{qn('last_attempt_at')} = excluded.{qn('last_attempt_at')}"
+    )
+    uuid_field = QuizScore._meta.pk
+    params = [
+        uuid_field.get_db_prep_value(uuid.uuid4(), connection),
+        uuid_field.get_db_prep_value(uuid.UUID(str(attempt.user_id)), connection),
+        uuid_field.get_db_prep_value(uuid.UUID(str(attempt.quiz_id)), connection),
+        attempt.score, attempt.score, attempt.score, 1, bool(attempt.passed),
+        QuizScore._meta.get_field('last_attempt_at').get_db_prep_value(attempt.completed_at or attempt.started_at, connection),
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def _rollup_rows(attempts):
+    """``attempts`` (submitted) grouped per (user, quiz) with every rollup figure."""
+    attempted_at = Coalesce('completed_at', 'started_at')
+    latest = (
+        QuizAttempt.objects.filter(user=OuterRef('user_id'), quiz=OuterRef('quiz_id'), status='submitted')
+        .order_by(attempted_at.desc(), '-id')
+        .values('score')[:1]
+    )
+    return (
+        attempts.values('user_id', 'quiz_id')
+        .annotate(
+            best_score=Max('score'),
+            last_score=Subquery(latest),
+            score_total=Sum('score'),
+            attempt_count=Count('id'),
+            passes=Count('id', filter=Q(passed=True)),
+            last_attempt_at=Max(attempted_at),
+        )
+        .order_by()
+    )
+
+
+def refresh_quiz_scores(quiz_id, user_ids):
+    """Recompute the rows of ``user_ids`` on ``quiz_id`` from their attempts; returns rows kept."""
+    user_ids = list(user_ids)
+    kept = 0
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        attempts = QuizAttempt.objects.filter(quiz_id=quiz_id, user_id__in=batch, status='submitted')
+        rows = [
+            QuizScore(
+                user_id=row['user_id'], quiz_id=row['quiz_id'], passed=row['passes'] > 0,
+                **{field: row[field] for field in ROLLUP_FIELDS if field != 'passed'},
+            )
+            for row in _rollup_rows(attempts)
+        ]
+        QuizScore.objects.filter(quiz_id=quiz_id, user_id__in=batch).exclude(
+            user_id__in=[row.user_id for row in rows],
+        ).delete()
+        if rows:
+            QuizScore.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['user', 'quiz'], update_fields=ROLLUP_FIELDS,
+            )
+        kept += len(rows)
+    return kept
+
+
+def rebuild_quiz_scores(quiz_ids=None):
+    """Recompute every row of the given quizzes (all quizzes by default); returns quizzes done."""
+    if quiz_ids is None:
+        quiz_ids = Quiz.objects.values_list('id', flat=True)
+    done = 0
+    for quiz_id in quiz_ids:
+        user_ids = set(QuizAttempt.objects.filter(quiz_id=quiz_id).values_list('user_id', flat=True).distinct())
+        user_ids |= set(QuizScore.objects.filter(quiz_id=quiz_id).values_list('user_id', flat=True))
+        refresh_quiz_scores(quiz_id, user_ids)
+        done += 1
+    return done
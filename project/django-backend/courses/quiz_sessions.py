@@ -0,0 +1,340 @@
+"""
+Quiz-taking sessions: start, autosave, submit.
+
+Starting a session takes an attempt from the learner's per-(user, quiz) counter
+(``QuizAttemptCounter``) in one upsert that only advances while the count is below
+``Quiz.attempts_allowed``, so the limit holds under concurrent starts without
+counting ``quiz_attempts`` rows. Timed quizzes get ``expires_at`` from
+``Quiz.time_limit`` (minutes), and questions drawn from the quiz's question banks
+are fixed on the attempt when it starts.
+
+Autosaves are merged in memory per attempt (later answers to a question replace
+earlier ones, and the time of each question's final answer is kept for item
+analysis in ``QuizAttempt.answer_times``) and written once per ``QUIZ_AUTOSAVE_FLUSH_SECONDS`` with one locking
+read and one batched update, instead of a write per keystroke. Submitting grades the
+stored, buffered and submitted answers together; answers arriving after the deadline
+(plus ``QUIZ_SUBMIT_GRACE_SECONDS``) are ignored. ``sweep_expired_attempts`` (run by
+``manage.py sweep_quiz_attempts``) auto-submits expired sessions in batches.
+
+Each worker process has its own autosave buffer, so clients should send their
+answers with the submit request too; the grace period should exceed the flush
+interval so that buffered answers are written before the sweeper grades them.
+"""
+
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection, models, transaction
+from django.utils import timezone
+
+from .delivery import delivery_payload
+from .grading import GRADED_FIELDS, grade
+from .leaderboard import schedule_recompute
+from .models import Enrollment, Quiz, QuizAttempt, QuizAttemptCounter
+from .progress import sync_quiz_progress
+from .question_banks import attempt_answer_key, attempt_answer_keys, draw_question_ids, draw_seed
+from .quiz_scores import refresh_quiz_scores
+
+logger = logging.getLogger(__name__)
+
+SESSION_CACHE_TIMEOUT = 3600
+SWEEP_BATCH_SIZE = 500
+SUBMITTED_FIELDS = GRADED_FIELDS + ['answers', 'answer_times', 'status', 'completed_at']
+
+
+class AttemptsExhausted(Exception):
+    """The learner has used every attempt the quiz allows."""
+
+
+def _grace():
+    return timedelta(seconds=getattr(settings, 'QUIZ_SUBMIT_GRACE_SECONDS', 30))
+
+
+def _db_uuid(value):
+    return models.UUIDField().get_db_prep_value(uuid.UUID(str(value)), connection)
+
+
+def allocate_attempt(user_id, quiz):
+    """
+    Take the next attempt number of ``user_id`` on ``quiz`` in a single statement.
+
+    Returns the number, or None when ``attempts_allowed`` (if positive) is used up.
+    """
+    counter = QuizAttemptCounter._meta
+    qn = connection.ops.quote_name
+    table = qn(counter.db_table)
+    limited = bool(quiz.attempts_allowed and quiz.attempts_allowed > 0)
+    sql = (
+        f"INSERT INTO {table} ({qn('id')}, {qn('user_id')}, {qn('quiz_id')}, {qn('started')}) "
+        f"VALUES (%s, %s, %s, 1) "
+        f"ON CONFLICT ({qn('user_id')}, {qn('quiz_id')}) DO UPDATE "
+        f"SET {qn('started')} = {table}.{qn('started')} + 1 "
+    )
+    params = [_db_uuid(uuid.uuid4()), _db_uuid(user_id), _db_uuid(quiz.pk)]
+    if limited:
+        sql += f"WHERE {table}.{qn('started')} < %s "
+        params.append(quiz.attempts_allowed)
+    sql += f"RETURNING {qn('started')}"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def attempts_used(user_id, quiz_id):
+    return QuizAttemptCounter.objects.filter(user_id=user_id, quiz_id=quiz_id).values_list('started', flat=True).first() or 0
+
+
+def _session_key(attempt_id):
+    return f'quiz-session:{attempt_id}'
+
+
+def _remember(attempt):
+    cache.set(_session_key(attempt.pk), (str(attempt.user_id), attempt.expires_at), SESSION_CACHE_TIMEOUT)
+
+
+def open_session(attempt_id):
+    """``(user_id, expires_at)`` of an in-progress attempt, or None; cached so autosaves skip the database."""
+    session = cache.get(_session_key(attempt_id))
+    if session is None:
+        attempt = QuizAttempt.objects.filter(pk=attempt_id, status='in_progress').only('id', 'user_id', 'expires_at').first()
+        if attempt is None:
+            return None
+        _remember(attempt)
+        session = (str(attempt.user_id), attempt.expires_at)
+    return session
+
+
+def accepts_answers(expires_at, now=None):
+    return expires_at is None or (now or timezone.now()) <= expires_at + _grace()
+
+
+def start_attempt(user, quiz):
+    """
+    Resume ``user``'s open session on ``quiz`` or start a new one.
+
+    An open session past its deadline is submitted first. Raises ``AttemptsExhausted``
+    when no attempt is left.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Concurrent starts queue on the enrollment, so the second one resumes the first one's session
+        Enrollment.objects.select_for_update().filter(user=user, course_id=quiz.unit.course_id).values_list('id', flat=True).first()
+        attempt = QuizAttempt.objects.filter(user=user, quiz=quiz, status='in_progress').order_by('-started_at').first()
+        if attempt is not None:
+            if accepts_answers(attempt.expires_at, now):
+                return attempt
+            submit_attempt(attempt, now=now)
+
+        attempt_id = uuid.uuid4()
+        draws = delivery_payload(quiz.pk)['bank_draws']
+        question_ids = draw_question_ids(draws, draw_seed(quiz.pk, user.pk, attempt_id)) if draws else None
+        number = allocate_attempt(user.pk, quiz)
+        if number is not None:
+            attempt = QuizAttempt.objects.create(
+                id=attempt_id, quiz=quiz, user=user, status='in_progress', attempt_number=number, started_at=now,
+                expires_at=now + timedelta(minutes=quiz.time_limit) if quiz.time_limit else None,
+                question_ids=question_ids,
+            )
+    # Raised after the commit so that an expired session submitted above stays submitted
+    if number is None:
+        raise AttemptsExhausted()
+    _remember(attempt)
+    return attempt
+
+
+class AutosaveBuffer:
+    """Thread-safe map of attempt_id -> {question_id: (latest buffered answer, epoch seconds)}."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._thread = None
+
+    def add(self, attempt_id, answers, at=None):
+        at = at if at is not None else time.time()
+        with self._lock:
+            entries = self._pending.setdefault(str(attempt_id), {})
+            for question_id, answer in answers.items():
+                entries[str(question_id)] = (answer, at)
+        self._ensure_flusher()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def take(self, attempt_id):
+        """Remove and return the entries buffered for one attempt."""
+        with self._lock:
+            return self._pending.pop(str(attempt_id), {})
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending):
+        # Older answers go back underneath anything buffered since the drain
+        with self._lock:
+            for attempt_id, answers in pending.items():
+                self._pending[attempt_id] = {**answers, **self._pending.get(attempt_id, {})}
+
+    def flush(self):
+        """Write all buffered answers; returns the number of attempts updated."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        try:
+            return write_autosaves(pending)
+        except Exception:
+            self.restore(pending)
+            raise
+
+    def _ensure_flusher(self):
+        interval = getattr(settings, 'QUIZ_AUTOSAVE_FLUSH_SECONDS', 10)
+        if interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, args=(interval,), name='quiz-autosave-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self, interval):
+        while True:
+            time.sleep(interval)
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush quiz autosaves")
+            finally:
+                close_old_connections()
+
+
+autosave_buffer = AutosaveBuffer()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        autosave_buffer.flush()
+    except Exception:
+        logger.exception("Failed to flush quiz autosaves on exit")
+
+
+def write_autosaves(pending):
+    """Merge buffered ``{attempt_id: entries}`` into in-progress attempts; returns attempts updated."""
+    items = list(pending.items())
+    written = 0
+    for start in range(0, len(items), SWEEP_BATCH_SIZE):
+        written += _write_autosave_batch(dict(items[start:start + SWEEP_BATCH_SIZE]))
+    return written
+
+
+@transaction.atomic
+def _write_autosave_batch(pending):
+    attempts = list(
+        QuizAttempt.objects.select_for_update()
+        .filter(id__in=list(pending), status='in_progress')
+        .only('id', 'answers', 'answer_times', 'started_at')
+    )
+    for attempt in attempts:
+        _merge(attempt, pending[str(attempt.id)])
+    # Answers buffered for attempts submitted meanwhile are dropped
+    QuizAttempt.objects.bulk_update(attempts, ['answers', 'answer_times'])
+    return len(attempts)
+
+
+def _merge(attempt, entries):
+    """Apply buffered ``{question_id: (answer, epoch seconds)}`` to ``attempt``'s answers and times."""
+    answers = dict(attempt.answers) if isinstance(attempt.answers, dict) else {}
+    times = dict(attempt.answer_times) if isinstance(attempt.answer_times, dict) else {}
+    started = attempt.started_at.timestamp()
+    for question_id, (answer, at) in entries.items():
+        answers[question_id] = answer
+        times[question_id] = round(max(at - started, 0), 1)
+    attempt.answers = answers
+    attempt.answer_times = times
+
+
+def submit_attempt(attempt, answers=None, now=None):
+    """
+    Grade and close ``attempt`` with its stored, buffered and given ``answers``.
+
+    Answers given after the deadline and grace period are ignored. Submitting an
+    attempt that is already closed returns it unchanged.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        attempt = QuizAttempt.objects.select_for_update().select_related('quiz__unit').get(pk=attempt.pk)
+        buffered = autosave_buffer.take(attempt.pk)
+        if attempt.status != 'in_progress':
+            return attempt
+        _merge(attempt, buffered)
+        if answers and accepts_answers(attempt.expires_at, now):
+            # Only answers that differ from the autosaved ones were given now
+            _merge(attempt, {
+                str(question_id): (answer, now.timestamp())
+                for question_id, answer in answers.items() if attempt.answers.get(str(question_id)) != answer
+            })
+        result = grade(attempt_answer_key(attempt.quiz_id, attempt.question_ids), attempt.answers)
+        for field in GRADED_FIELDS:
+            setattr(attempt, field, result[field])
+        attempt.status = 'submitted'
+        attempt.completed_at = min(now, attempt.expires_at) if attempt.expires_at else now
+        attempt.save(update_fields=SUBMITTED_FIELDS)
+        sync_quiz_progress(attempt.quiz, [attempt.user_id])
+    cache.delete(_session_key(attempt.pk))
+    return attempt
+
+
+def sweep_expired_attempts(batch_size=SWEEP_BATCH_SIZE, now=None):
+    """Auto-submit sessions past their deadline and grace period in batches; returns how many."""
+    cutoff = (now or timezone.now()) - _grace()
+    swept = 0
+    while True:
+        count = _sweep_batch(cutoff, batch_size)
+        swept += count
+        if count < batch_size:
+            return swept
+
+
+@transaction.atomic
+def _sweep_batch(cutoff, batch_size):
+    ids = list(
+        QuizAttempt.objects.filter(status='in_progress', expires_at__lt=cutoff)
+        .order_by('expires_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return 0
+    attempts = list(
+        QuizAttempt.objects.select_for_update().filter(id__in=ids, status='in_progress')
+        .only('id', 'quiz_id', 'user_id', 'answers', 'answer_times', 'question_ids', 'started_at', 'expires_at', *GRADED_FIELDS)
+    )
+    keys = attempt_answer_keys(attempts)
+    users_by_quiz = {}
+    for attempt in attempts:
+        _merge(attempt, autosave_buffer.take(attempt.pk))
+        key = keys[attempt.pk]
+        if key is not None:
+            result = grade(key, attempt.answers)
+            for field in GRADED_FIELDS:
+                setattr(attempt, field, result[field])
+        attempt.status = 'submitted'
+        attempt.completed_at = attempt.expires_at
+        users_by_quiz.setdefault(attempt.quiz_id, set()).add(attempt.user_id)
+    QuizAttempt.objects.bulk_update(attempts, SUBMITTED_FIELDS)
+
+    # Bulk writes skip the QuizAttempt signals, so propagate scores, progress and leaderboards here
+    quizzes = Quiz.objects.select_related('unit').in_bulk(list(users_by_quiz))
+    for quiz_id, user_ids in users_by_quiz.items():
+        refresh_quiz_scores(quiz_id, user_ids)
+        sync_quiz_progress(quizzes[quiz_id], user_ids)
+    schedule_recompute({quiz.unit.course_id for quiz in quizzes.values()})
+    cache.delete_many([_session_key(attempt.pk) for attempt in attempts])
+    return len(ids)
@@ -0,0 +1,275 @@
+"""
+In-process order-statistic index over leaderboard scopes.
+
+Each scope (a course, a team or the global board) is held as two parallel,
+array-backed columns sorted by ``(-total_points, user_id)``: packed 64-bit points
+and packed 16-byte user ids, plus the sorted distinct point values. Rank-of-user,
+top-K and "who is around me" are binary searches and slices, O(log n) plus the
+size of the answer, instead of a sort or window scan per request. A 1M-user scope
+takes about 24 MB, and at most ``LEADERBOARD_INDEX_MAX_SCOPES`` scopes are kept
+(least recently used scopes are dropped and reloaded on demand).
+
+Indexes are loaded lazily from the ``leaderboard`` table, patched in place when
+this process recomputes points (``courses.leaderboard``) and reloaded when the
+scope's version stamp in the cache moves, i.e. when another process changed it.
+Ranks are dense, matching ``Leaderboard.rank``.
+"""
+
+import logging
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Exists, OuterRef
+
+from .models import Leaderboard, TeamMember
+
+logger = logging.getLogger(__name__)
+
+ID_WIDTH = 16
+GLOBAL = ('global', None)
+
+
+def course_scope(course_id):
+    return ('course', str(course_id))
+
+
+def team_scope(team_id):
+    return ('team', str(team_id))
+
+
+def _version_key(scope):
+    return f'leaderboard:index-version:{scope[0]}:{scope[1]}'
+
+
+def bump_version(scope):
+    """Record that ``scope`` changed; returns the new version stamp."""
+    version = uuid.uuid4().hex
+    cache.set(_version_key(scope), version, None)
+    return version
+
+
+def current_version(scope):
+    version = cache.get(_version_key(scope))
+    if version is None:
+        version = bump_version(scope)
+    return version
+
+
+def _scope_entries(scope):
+    kind, key = scope
+    entries = Leaderboard.objects.filter(course__isnull=True) if kind != 'course' else Leaderboard.objects.filter(course_id=key)
+    if kind == 'team':
+        entries = entries.filter(Exists(TeamMember.objects.filter(team_id=key, user=OuterRef('user_id'))))
+    return entries
+
+
+class ScopeIndex:
+    """Sorted (points desc, user id asc) columns for one scope."""
+
+    def __init__(self, version=None):
+        self.version = version
+        self._neg_points = array('q')
+        self._ids = bytearray()
+        self._distinct = array('q')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._neg_points)
+
+    @classmethod
+    def load(cls, scope, version=None):
+        index = cls(version)
+        rows = []
+        entries = _scope_entries(scope).order_by('-total_points', 'user_id').values_list('total_points', 'user_id')
+        for points, user_id in entries.iterator(chunk_size=5000):
+            rows.append((-points, user_id.bytes))
+            if len(rows) >= 5000:
+                index._extend(rows)
+                rows = []
+        index._extend(rows)
+        # Streamed in index order; the database's uuid collation is not guaranteed to be byte
+        # order though, so fall back to sorting once if it differs
+        if not index._is_sorted():
+            index._resort()
+        return index
+
+    def _extend(self, rows):
+        for neg_points, user_bytes in rows:
+            self._neg_points.append(neg_points)
+            self._ids += user_bytes
+            if not self._distinct or self._distinct[-1] != neg_points:
+                self._distinct.append(neg_points)
+
+    def _is_sorted(self):
+        previous = None
+        for position, neg_points in enumerate(self._neg_points):
+            key = (neg_points, self._id_at(position))
+            if previous is not None and key < previous:
+                return False
+            previous = key
+        return True
+
+    def _resort(self):
+        rows = sorted(zip(self._neg_points, (self._id_at(i) for i in range(len(self)))))
+        self._neg_points, self._ids, self._distinct = array('q'), bytearray(), array('q')
+        self._extend(rows)
+
+    def _id_at(self, position):
+        return bytes(self._ids[position * ID_WIDTH:(position + 1) * ID_WIDTH])
+
+    def _locate(self, neg_points, user_bytes):
+        """Position of (neg_points, user_bytes), or where it would be inserted."""
+        lo = bisect_left(self._neg_points, neg_points)
+        hi = bisect_right(self._neg_points, neg_points, lo)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id_at(mid) < user_bytes:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _dense_rank(self, neg_points):
+        return bisect_left(self._distinct, neg_points) + 1
+
+    def _entry(self, position):
+        neg_points = self._neg_points[position]
+        return {
+            'user_id': str(uuid.UUID(bytes=self._id_at(position))),
+            'total_points': -neg_points,
+            'rank': self._dense_rank(neg_points),
+            'position': position + 1,
+        }
+
+    def _remove(self, points, user_bytes):
+        neg_points = -points
+        position = self._locate(neg_points, user_bytes)
+        if position >= len(self) or self._neg_points[position] != neg_points or self._id_at(position) != user_bytes:
+            return False
+        del self._neg_points[position]
+        del self._ids[position * ID_WIDTH:(position + 1) * ID_WIDTH]
+        still_present = (
+            (position < len(self) and self._neg_points[position] == neg_points)
+            or (position > 0 and self._neg_points[position - 1] == neg_points)
+        )
+        if not still_present:
+            del self._distinct[bisect_left(self._distinct, neg_points)]
+        return True
+
+    def _insert(self, points, user_bytes):
+        neg_points = -points
+        position = self._locate(neg_points, user_bytes)
+        distinct_at = bisect_left(self._distinct, neg_points)
+        if distinct_at == len(self._distinct) or self._distinct[distinct_at] != neg_points:
+            self._distinct.insert(distinct_at, neg_points)
+        self._neg_points.insert(position, neg_points)
+        self._ids[position * ID_WIDTH:position * ID_WIDTH] = user_bytes
+
+    def apply(self, changes):
+        """Apply ``(user_id, old_points, new_points)`` changes; None means absent. Returns False if out of sync."""
+        with self._lock:
+            for user_id, old_points, new_points in changes:
+                user_bytes = uuid.UUID(str(user_id)).bytes
+                if old_points is not None and not self._remove(old_points, user_bytes):
+                    return False
+                if new_points is not None:
+                    self._insert(new_points, user_bytes)
+        return True
+
+    def rank_of(self, user_id, points):
+        """Entry for ``user_id`` currently holding ``points``, or None if not in the scope."""
+        user_bytes = uuid.UUID(str(user_id)).bytes
+        with self._lock:
+            position = self._locate(-points, user_bytes)
+            if position < len(self) and self._id_at(position) == user_bytes:
+                return self._entry(position)
+        return None
+
+    def top(self, k):
+        with self._lock:
+            return [self._entry(position) for position in range(min(k, len(self)))]
+
+    def window(self, position, before, after):
+        """Entries from ``before`` above to ``after`` below the 1-based ``position``."""
+        with self._lock:
+            start = max(position - 1 - before, 0)
+            stop = min(position + after, len(self))
+            return [self._entry(i) for i in range(start, stop)]
+
+
+class RankIndexRegistry:
+    """LRU of loaded scope indexes, kept fresh through the cached version stamps."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+
+    def get(self, scope):
+        versions = (current_version(scope),)
+        if scope[0] == 'team':
+            # Team boards are built from the global rows
+            versions += (current_version(GLOBAL),)
+        with self._lock:
+            index = self._indexes.get(scope)
+            if index is not None and index.version == versions:
+                self._indexes.move_to_end(scope)
+                return index
+        index = ScopeIndex.load(scope, versions)
+        with self._lock:
+            self._indexes[scope] = index
+            self._indexes.move_to_end(scope)
+            while len(self._indexes) > getattr(settings, 'LEADERBOARD_INDEX_MAX_SCOPES', 32):
+                self._indexes.popitem(last=False)
+        return index
+
+    def apply(self, scope, changes):
+        """Patch a loaded index with points changes made by this process and bump the scope version."""
+        with self._lock:
+            index = self._indexes.get(scope)
+        fresh = index is not None and index.version is not None and index.version[0] == cache.get(_version_key(scope))
+        version = bump_version(scope)
+        if fresh and index.apply(changes):
+            index.version = (version,)
+        else:
+            self.discard(scope)
+
+    def discard(self, scope):
+        with self._lock:
+            self._indexes.pop(scope, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def warm(self, scopes):
+        for scope in scopes:
+            self.get(scope)
+
+
+rank_indexes = RankIndexRegistry()
+
+
+def warm_on_startup():
+    """Load the global board and the largest course boards in a background thread."""
+    def run():
+        close_old_connections()
+        try:
+            limit = getattr(settings, 'LEADERBOARD_INDEX_MAX_SCOPES', 32) - 1
+            largest = (
+                Leaderboard.objects.filter(course__isnull=False)
+                .values('course_id').annotate(n=Count('id')).order_by('-n')
+                .values_list('course_id', flat=True)[:limit]
+            )
+            rank_indexes.warm([GLOBAL] + [course_scope(course_id) for course_id in largest])
+        except Exception:
+            logger.exception("Failed to warm leaderboard rank indexes")
+        finally:
+            close_old_connections()
+
+    threading.Thread(target=run, name='rank-index-warmup', daemon=True).start()
@@ -0,0 +1,112 @@
+"""
+Bulk regrading of quiz attempts.
+
+After a quiz's answer key changes, its attempts are streamed in id order with a
+server-side cursor (``QuerySet.iterator``), re-scored in memory against the freshly
+compiled key, and only the attempts whose grade changed are written back with one
+batched update per chunk. Each chunk then refreshes the affected learners' score
+rollups and quiz unit progress (and so their enrollments); the course leaderboard
+is recomputed once at the end. Memory use is bounded by the chunk size, whatever the number of attempts.
+
+Large quizzes run as a ``regrade_quiz`` background job that records the last
+attempt id of every chunk, so ``manage.py run_jobs --resume`` continues where an
+interrupted worker stopped.
+"""
+
+from django.db import transaction
+
+from .grading import GRADED_FIELDS, answer_key, grade, invalidate_answer_key
+from .jobs import register_job
+from .leaderboard import rebuild_leaderboards
+from .models import Quiz, QuizAttempt
+from .progress import sync_quiz_progress
+from .question_banks import bank_questions, extend_key
+from .quiz_scores import refresh_quiz_scores
+
+CHUNK_SIZE = 2000
+
+
+def _write_chunk(quiz, key, attempts):
+    """Re-score ``attempts``; write and propagate the changed ones. Returns how many changed."""
+    changed = []
+    drawn = bank_questions({question_id for attempt in attempts for question_id in attempt.question_ids or ()})
+    for attempt in attempts:
+        result = grade(extend_key(key, attempt.question_ids, drawn), attempt.answers)
+        if any(getattr(attempt, field) != result[field] for field in GRADED_FIELDS):
+            for field in GRADED_FIELDS:
+                setattr(attempt, field, result[field])
+            changed.append(attempt)
+    if changed:
+        QuizAttempt.objects.bulk_update(changed, GRADED_FIELDS, batch_size=CHUNK_SIZE)
+        user_ids = {attempt.user_id for attempt in changed}
+        refresh_quiz_scores(quiz.pk, user_ids)
+        sync_quiz_progress(quiz, user_ids)
+    return len(changed)
+
+
+def regrade_quiz(quiz, after=None, chunk_size=CHUNK_SIZE, on_chunk=None, rank=True):
+    """
+    Regrade every submitted attempt of ``quiz`` (with id greater than ``after`` when resuming).
+
+    Open sessions are graded when they are submitted (``courses.quiz_sessions``).
+
+    ``on_chunk(totals, last_id)`` is called in each chunk's transaction; with ``rank``
+    the course leaderboard is recomputed if any grade changed. Returns
+    ``{'processed': n, 'changed': n}``.
+    """
+    invalidate_answer_key(quiz.pk)
+    key = answer_key(quiz.pk)
+    attempts = (
+        QuizAttempt.objects.filter(quiz=quiz, status='submitted')
+        .only('id', 'quiz_id', 'user_id', 'answers', 'question_ids', *GRADED_FIELDS)
+        .order_by('id')
+    )
+    if after:
+        attempts = attempts.filter(id__gt=after)
+
+    totals = {'processed': 0, 'changed': 0}
+    chunk = []
+
+    def flush():
+        # The checkpoint commits with the chunk, so a resumed run neither repeats nor skips it
+        with transaction.atomic():
+            changed = _write_chunk(quiz, key, chunk)
+            if on_chunk is not None:
+                on_chunk({'processed': totals['processed'] + len(chunk), 'changed': totals['changed'] + changed}, chunk[-1].id)
+        totals['processed'] += len(chunk)
+        totals['changed'] += changed
+
+    for attempt in attempts.iterator(chunk_size=chunk_size):
+        chunk.append(attempt)
+        if len(chunk) >= chunk_size:
+            flush()
+            chunk = []
+    if chunk:
+        flush()
+
+    if rank and totals['changed']:
+        rebuild_leaderboards([quiz.unit.course_id])
+    return totals
+
+
+@register_job('regrade_quiz')
+def regrade_quiz_job(job):
+    """Regrade ``payload['quiz_id']``; ``job.progress`` holds processed/changed and the last attempt id."""
+    quiz = Quiz.objects.select_related('unit').get(id=job.payload['quiz_id'])
+    progress = job.progress or {'total': QuizAttempt.objects.filter(quiz=quiz, status='submitted').count(), 'processed': 0, 'changed': 0, 'cursor': None}
+    done = {'processed': progress['processed'], 'changed': progress['changed']}
+
+    def save_progress(totals, last_id):
+        progress.update(
+            processed=done['processed'] + totals['processed'],
+            changed=done['changed'] + totals['changed'],
+            cursor=str(last_id),
+        )
+        job.progress = progress
+        job.save(update_fields=['progress', 'updated_at'])
+
+    regrade_quiz(quiz, after=progress['cursor'], on_chunk=save_progress, rank=False)
+    # Also covers changes written before an interruption
+    if progress['changed']:
+        rebuild_leaderboards([quiz.unit.course_id])
+    return {'processed': progress['processed'], 'changed': progress['changed']}
@@ -0,0 +1,139 @@
+"""
+Server-side reports.
+
+Report figures are computed by the database in a single aggregate query, so the
+response size does not depend on how many enrollments or attempts a course has.
+"""
+
+from datetime import datetime, time
+
+from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count, FloatField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Course, Profile, QuizAttempt, QuizScore, TeamMember
+
+
+def parse_report_bound(value, label, end=False):
+    """Parse a ``YYYY-MM-DD`` or ISO datetime query value; dates cover the whole day."""
+    if not value:
+        return None
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            parsed = datetime.combine(day, time.max if end else time.min)
+    except ValueError:
+        raise ValidationError(f'{label} must be a date (YYYY-MM-DD) or ISO datetime')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _report_filters(prefix, date_field, date_from, date_to, team_id):
+    """Build a Q over ``prefix``-relative fields for the date range and team filters."""
+    q = Q()
+    if date_from:
+        q &= Q(**{f'{prefix}{date_field}__gte': date_from})
+    if date_to:
+        q &= Q(**{f'{prefix}{date_field}__lte': date_to})
+    if team_id:
+        members = TeamMember.objects.filter(team_id=team_id).values('user_id')
+        q &= Q(**{f'{prefix}user_id__in': members})
+    return q
+
+
+def course_report(course, date_from=None, date_to=None, team_id=None):
+    """
+    Totals, per-status counts, average progress and average quiz score for ``course``.
+
+    Enrollments are filtered on ``assigned_at`` and submitted quiz attempts on
+    ``started_at``; ``team_id`` restricts both to members of that team. Without a
+    date range the quiz figures come from the ``QuizScore`` rollup.
+    """
+    enrollments = _report_filters('enrollments__', 'assigned_at', date_from, date_to, team_id)
+    if date_from or date_to:
+        source = QuizAttempt.objects.filter(
+            _report_filters('', 'started_at', date_from, date_to, team_id), status='submitted',
+        )
+        score_avg, attempt_count = Avg('score'), Count('id')
+    else:
+        source = QuizScore.objects.filter(_report_filters('', None, None, None, team_id))
+        score_avg = Cast(Sum('score_total'), FloatField()) / NullIf(Sum('attempt_count'), 0)
+        attempt_count = Sum('attempt_count')
+    attempts = source.filter(quiz__unit__course=OuterRef('pk')).order_by().values('quiz__unit__course')
+    row = (
+        Course.objects.filter(pk=course.pk)
+        .annotate(
+            total_enrollments=Count('enrollments', filter=enrollments),
+            assigned=Count('enrollments', filter=enrollments & Q(enrollments__status='assigned')),
+            in_progress=Count('enrollments', filter=enrollments & Q(enrollments__status='in_progress')),
+            completed=Count('enrollments', filter=enrollments & Q(enrollments__status='completed')),
+            average_progress=Coalesce(
+                Avg('enrollments__progress_percentage', filter=enrollments), Value(0.0), output_field=FloatField(),
+            ),
+            average_score=Coalesce(
+                Subquery(attempts.annotate(avg=score_avg).values('avg')), Value(0.0), output_field=FloatField(),
+            ),
+            quiz_attempts=Coalesce(Subquery(attempts.annotate(n=attempt_count).values('n')), Value(0)),
+        )
+        .values('total_enrollments', 'assigned', 'in_progress', 'completed', 'average_progress', 'average_score', 'quiz_attempts')
+        .get()
+    )
+    total = row['total_enrollments']
+    return {
+        'course_id': str(course.pk),
+        'course_title': course.title,
+        'total_enrollments': total,
+        'assigned': row['assigned'],
+        'in_progress': row['in_progress'],
+        'completed': row['completed'],
+        'completion_rate': round(100 * row['completed'] / total) if total else 0,
+        'average_progress': round(row['average_progress']),
+        'average_score': round(row['average_score']),
+        'quiz_attempts': row['quiz_attempts'],
+    }
+
+
+def learner_reports(users=None):
+    """
+    Annotate ``users`` (a Profile queryset, all profiles by default) with report figures.
+
+    Each row carries courses_enrolled, courses_completed, average_progress,
+    total_quiz_score and last_activity, all computed in the same query; quiz scores
+    come from a correlated subquery over the ``QuizScore`` rollup so they do not
+    multiply the enrollment join.
+    """
+    users = Profile.objects.all() if users is None else users
+    scores = (
+        QuizScore.objects.filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(total=Sum('score_total'))
+        .values('total')
+    )
+    return users.annotate(
+        courses_enrolled=Count('enrollments'),
+        courses_completed=Count('enrollments', filter=Q(enrollments__status='completed')),
+        average_progress=Coalesce(Avg('enrollments__progress_percentage'), Value(0.0), output_field=FloatField()),
+        total_quiz_score=Coalesce(Subquery(scores), Value(0)),
+        last_activity=Max('enrollments__last_activity_at'),
+    )
+
+
+def learner_report_data(user):
+    """Serialize a profile annotated by ``learner_reports``."""
+    return {
+        'user_id': str(user.pk),
+        'user_name': user.full_name,
+        'email': user.email,
+        'courses_enrolled': user.courses_enrolled,
+        'courses_completed': user.courses_completed,
+        'average_progress': round(user.average_progress),
+        'total_quiz_score': user.total_quiz_score,
+        'last_activity': user.last_activity.isoformat() if user.last_activity else None,
+    }
@@ -0,0 +1,94 @@
+"""
+Module sequencing rule updates.
+
+A PUT of a course's rule set is applied as a diff against the stored rules: only
+inserted, changed and removed rules are written, with batched statements inside one
+transaction, so a failed update never leaves a half-deleted rule set.
+"""
+
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Unit, ModuleSequencing
+
+RULE_FIELDS = ('preceding_module_id', 'drip_feed_rule', 'drip_feed_delay_days', 'prerequisite_completed')
+
+
+def _parse_uuid(value, label):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        raise ValidationError(f'{label} is not a valid id: {value}')
+
+
+def _normalize_rules(rules):
+    """Return ``{module_id: {field: value}}`` for the submitted rules."""
+    normalized = {}
+    for rule in rules:
+        if not isinstance(rule, dict) or not rule.get('module_id'):
+            raise ValidationError('Each rule requires a module_id')
+        module_id = _parse_uuid(rule['module_id'], 'module_id')
+        if module_id in normalized:
+            raise ValidationError(f'Duplicate rule for module {module_id}')
+        preceding = rule.get('preceding_module_id')
+        try:
+            delay_days = int(rule.get('drip_feed_delay_days') or 0)
+        except (TypeError, ValueError):
+            raise ValidationError(f"drip_feed_delay_days must be an integer for module {module_id}")
+        normalized[module_id] = {
+            'preceding_module_id': _parse_uuid(preceding, 'preceding_module_id') if preceding else None,
+            'drip_feed_rule': rule.get('drip_feed_rule', 'none'),
+            'drip_feed_delay_days': delay_days,
+            'prerequisite_completed': bool(rule.get('prerequisite_completed', False)),
+        }
+    return normalized
+
+
+def replace_sequencing_rules(course, rules):
+    """
+    Make ``rules`` the complete rule set of ``course``.
+
+    Every referenced module must belong to the course (checked with one lookup).
+    Returns ``{'created': [...], 'updated': [...], 'deleted': [...]}`` of sequence ids.
+    Raises ``ValidationError`` for malformed rules or unknown modules.
+    """
+    wanted = _normalize_rules(rules)
+    referenced = set(wanted)
+    referenced.update(r['preceding_module_id'] for r in wanted.values() if r['preceding_module_id'])
+    known = set(Unit.objects.filter(course=course, id__in=referenced).values_list('id', flat=True))
+    missing = referenced - known
+    if missing:
+        raise ValidationError(f"Modules not found in this course: {', '.join(sorted(str(m) for m in missing))}")
+
+    now = timezone.now()
+    with transaction.atomic():
+        existing = {rule.module_id: rule for rule in ModuleSequencing.objects.select_for_update().filter(course=course)}
+
+        to_delete = [rule.sequence_id for module_id, rule in existing.items() if module_id not in wanted]
+        to_update = []
+        to_create = []
+        for module_id, values in wanted.items():
+            rule = existing.get(module_id)
+            if rule is None:
+                to_create.append(ModuleSequencing(course=course, module_id=module_id, **values))
+            elif any(getattr(rule, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(rule, field, value)
+                rule.updated_at = now
+                to_update.append(rule)
+
+        if to_delete:
+            ModuleSequencing.objects.filter(sequence_id__in=to_delete).delete()
+        if to_update:
+            ModuleSequencing.objects.bulk_update(to_update, RULE_FIELDS + ('updated_at',))
+        if to_create:
+            ModuleSequencing.objects.bulk_create(to_create)
+
+    return {
+        'created': [str(rule.sequence_id) for rule in to_create],
+        'updated': [str(rule.sequence_id) for rule in to_update],
+        'deleted': [str(sequence_id) for sequence_id in to_delete],
+    }
@@ -3,7 +3,8 @@ from .models import (
     Profile, Course, Unit, VideoUnit, AudioUnit, PresentationUnit,
     TextUnit, PageUnit, Quiz, Question, Assignment, ScormPackage,
     Survey, Enrollment, UnitProgress, AssignmentSubmission,
-    QuizAttempt, Leaderboard, MediaMetadata
+    QuizAttempt, Leaderboard, MediaMetadata, BackgroundJob, CourseEnrollmentCounter,
+    QuestionBank, BankQuestion, QuizBankDraw
 )
 
 
@@ -56,6 +57,37 @@ class QuestionSerializer(serializers.ModelSerializer):
         model = Question
         fields = '__all__'
 
+    def to_representation(self, instance):
+        # Grading is server-side (courses.grading): only trainers see the answers, here and
+        # wherever questions are nested (quizzes, units, course details)
+        data = super().to_representation(instance)
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if not (getattr(user, 'is_superuser', False) or getattr(user, 'primary_role', '') == 'trainer'):
+            data.pop('correct_answer', None)
+        return data
+
+
+class QuestionBankSerializer(serializers.ModelSerializer):
+    question_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = QuestionBank
+        fields = '__all__'
+        read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
+
+
+class BankQuestionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BankQuestion
+        fields = '__all__'
+
+
+class QuizBankDrawSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = QuizBankDraw
+        fields = '__all__'
+
 
 class QuizSerializer(serializers.ModelSerializer):
     questions = QuestionSerializer(many=True, read_only=True)
@@ -111,12 +143,16 @@ class UnitSerializer(serializers.ModelSerializer):
         validators = []
 
     def validate(self, attrs):
-        """Ensure sequence_order is unique per course and provide a clear error."""
+        """Ensure sequence_order is unique per course and provide a clear error.
+
+        Creates skip the lookup: UnitViewSet.create allocates free positions and reports
+        conflicts on explicit ones from the uq_module_sequence constraint.
+        """
         course = attrs.get('course')
         seq = attrs.get('sequence_order')
 
-        # Only validate when both course and sequence_order are present
-        if course is not None and seq is not None:
+        # Only validate updates where both course and sequence_order are present
+        if self.instance is not None and course is not None and seq is not None:
             qs = Unit.objects.filter(course=course, sequence_order=seq)
             if self.instance:
                 qs = qs.exclude(pk=self.instance.pk)
@@ -128,7 +164,8 @@ class UnitSerializer(serializers.ModelSerializer):
 
 class CourseSerializer(serializers.ModelSerializer):
     created_by_name = serializers.CharField(source='created_by.full_name', read_only=True)
-    units_count = serializers.IntegerField(source='units.count', read_only=True)
+    units_count = serializers.SerializerMethodField()
+    enrollment_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = Course
@@ -136,6 +173,25 @@ class CourseSerializer(serializers.ModelSerializer):
         # created_by is set server-side in perform_create; mark it read-only so clients don't need to provide it
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by']
 
+    def get_units_count(self, obj):
+        # CourseViewSet annotates units_count; fall back to a COUNT for instances built elsewhere
+        units_count = getattr(obj, 'units_count', None)
+        if units_count is None:
+            return obj.units.count()
+        return units_count
+
+    def get_enrollment_counts(self, obj):
+        try:
+            counter = obj.enrollment_counter
+        except CourseEnrollmentCounter.DoesNotExist:
+            return {'total_enrolled': 0, 'assigned': 0, 'in_progress': 0, 'completed': 0}
+        return {
+            'total_enrolled': counter.total_enrolled,
+            'assigned': counter.assigned,
+            'in_progress': counter.in_progress,
+            'completed': counter.completed,
+        }
+
 
 class CourseDetailSerializer(serializers.ModelSerializer):
     units = UnitSerializer(many=True, read_only=True)
@@ -177,6 +233,11 @@ class QuizAttemptSerializer(serializers.ModelSerializer):
     class Meta:
         model = QuizAttempt
         fields = '__all__'
+        # Graded server-side from `answers`; sessions are managed by courses.quiz_sessions
+        read_only_fields = [
+            'score', 'passed', 'points_earned', 'pending_review', 'status', 'attempt_number', 'expires_at',
+            'question_ids', 'answer_times',
+        ]
 
 
 class LeaderboardSerializer(serializers.ModelSerializer):
@@ -192,3 +253,9 @@ class MediaMetadataSerializer(serializers.ModelSerializer):
     class Meta:
         model = MediaMetadata
         fields = '__all__'
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BackgroundJob
+        fields = '__all__'
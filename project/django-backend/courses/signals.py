@@ -0,0 +1,197 @@
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .counters import enrollment_created, enrollment_status_changed, enrollment_deleted
+from .delivery import invalidate_delivery_payload
+from .grading import invalidate_answer_key
+from .leaderboard import schedule_recompute
+from .models import (
+    Profile, Course, Enrollment, Unit, UnitProgress, Quiz, Question, QuizAttempt, TeamMember, BankQuestion, QuizBankDraw,
+)
+from .progress import apply_progress_changes, recount_enrollments, record_activity, record_quiz_activity
+from .question_banks import invalidate_bank_question
+from .quiz_scores import record_attempt, refresh_quiz_scores
+from .rank_index import bump_version, team_scope
+from .stats import invalidate_total_learners
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    # primary_role may have changed; drop the cached trainee total
+    invalidate_total_learners()
+
+
+@receiver(post_init, sender=Enrollment)
+def remember_enrollment_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred status field is not loaded here
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=Enrollment)
+def load_enrollment_status(sender, instance, **kwargs):
+    if instance._counted_status is None and not instance._state.adding:
+        instance._counted_status = (
+            Enrollment.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Enrollment)
+def enrollment_saved(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        enrollment_created(instance)
+    elif update_fields is None or 'status' in update_fields:
+        enrollment_status_changed(instance, instance._counted_status)
+    else:
+        return
+    instance._counted_status = instance.status
+
+
+@receiver(pre_delete, sender=Enrollment)
+def reload_enrollment_status(sender, instance, origin=None, **kwargs):
+    # A long-lived instance may be stale (unit progress moves the status); querysets load fresh rows
+    if origin is instance:
+        stored = Enrollment.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        if stored is not None:
+            instance._counted_status = stored
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_removed(sender, instance, origin=None, **kwargs):
+    # A deleted course takes its counter row with it; recreating it would break the foreign key
+    if getattr(origin, 'model', type(origin)) is not Course:
+        # The stored status, which may differ from unsaved changes on the instance
+        status = instance._counted_status
+        enrollment_deleted(instance, status if status is not None else instance.status)
+    schedule_recompute([instance.course_id])
+
+
+@receiver(post_init, sender=UnitProgress)
+def remember_progress_status(sender, instance, **kwargs):
+    instance._tracked_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=UnitProgress)
+def load_progress_status(sender, instance, **kwargs):
+    if instance._tracked_status is None and not instance._state.adding:
+        instance._tracked_status = (
+            UnitProgress.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=UnitProgress)
+def progress_saved(sender, instance, created, update_fields=None, **kwargs):
+    record_activity([instance.enrollment_id])
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    old_status = None if created else instance._tracked_status
+    apply_progress_changes([(instance.enrollment_id, instance.unit_id, old_status, instance.status)])
+    instance._tracked_status = instance.status
+
+
+@receiver(post_delete, sender=UnitProgress)
+def progress_removed(sender, instance, origin=None, **kwargs):
+    # Rows removed by deleting their enrollment or unit are not progress changes
+    if getattr(origin, 'model', type(origin)) is not UnitProgress:
+        return
+    status = instance._tracked_status
+    apply_progress_changes([(instance.enrollment_id, instance.unit_id, status if status is not None else instance.status, None)])
+
+
+@receiver(pre_save, sender=Unit)
+def load_unit_mandatory(sender, instance, update_fields=None, **kwargs):
+    # The stored value: another instance of the unit may have changed it since this one was loaded
+    instance._counted_mandatory = None
+    if not instance._state.adding and (update_fields is None or 'is_mandatory' in update_fields):
+        instance._counted_mandatory = (
+            Unit.objects.filter(pk=instance.pk).values_list('is_mandatory', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Unit)
+def unit_saved(sender, instance, created, **kwargs):
+    # A new unit or a changed is_mandatory moves every enrollment's totals in the course
+    stored = instance._counted_mandatory
+    if created or (stored is not None and stored != instance.is_mandatory):
+        recount_enrollments(instance.course_id)
+
+
+@receiver(post_delete, sender=Unit)
+def unit_removed(sender, instance, origin=None, **kwargs):
+    # The unit's progress rows went with it (see progress_removed); a deleted course takes its enrollments too
+    if getattr(origin, 'model', type(origin)) is not Course:
+        recount_enrollments(instance.course_id)
+
+
+@receiver(post_init, sender=QuizAttempt)
+def remember_attempt_status(sender, instance, **kwargs):
+    instance._scored_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=QuizAttempt)
+def load_attempt_status(sender, instance, **kwargs):
+    if instance._scored_status is None and not instance._state.adding:
+        instance._scored_status = (
+            QuizAttempt.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=QuizAttempt)
+def attempt_scored(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not {'score', 'passed', 'status'} & set(update_fields):
+        return
+    # A fresh submission only adds to the rollup; edits of a submitted attempt may lower it
+    if instance.status == 'submitted' and (created or instance._scored_status != 'submitted'):
+        record_attempt(instance)
+    elif 'submitted' in (instance.status, instance._scored_status):
+        refresh_quiz_scores(instance.quiz_id, [instance.user_id])
+    instance._scored_status = instance.status
+
+
+@receiver(post_delete, sender=QuizAttempt)
+def attempt_unscored(sender, instance, origin=None, **kwargs):
+    # Rollup rows of a deleted quiz or learner go with it
+    if getattr(origin, 'model', type(origin)) is QuizAttempt and instance.status == 'submitted':
+        refresh_quiz_scores(instance.quiz_id, [instance.user_id])
+
+
+@receiver(post_save, sender=QuizAttempt)
+@receiver(post_delete, sender=QuizAttempt)
+def attempt_changed(sender, instance, **kwargs):
+    course_id = Quiz.objects.filter(pk=instance.quiz_id).values_list('unit__course_id', flat=True).first()
+    if kwargs.get('signal') is post_save:
+        record_quiz_activity(instance.user_id, course_id)
+    schedule_recompute([course_id])
+
+
+@receiver(post_save, sender=TeamMember)
+@receiver(post_delete, sender=TeamMember)
+def team_membership_changed(sender, instance, **kwargs):
+    # Team rank indexes are built from the membership; make loaded ones reload
+    bump_version(team_scope(instance.team_id))
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def quiz_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.pk)
+    invalidate_delivery_payload(instance.pk)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def question_changed(sender, instance, **kwargs):
+    invalidate_answer_key(instance.quiz_id)
+    invalidate_delivery_payload(instance.quiz_id)
+
+
+@receiver(post_save, sender=BankQuestion)
+@receiver(post_delete, sender=BankQuestion)
+def bank_question_changed(sender, instance, **kwargs):
+    invalidate_bank_question(instance)
+
+
+@receiver(post_save, sender=QuizBankDraw)
+@receiver(post_delete, sender=QuizBankDraw)
+def bank_draw_changed(sender, instance, **kwargs):
+    invalidate_delivery_payload(instance.quiz_id)
@@ -0,0 +1,27 @@
+"""
+Enrollment statistics.
+
+Per-status enrollment counts are read from the denormalized counters in
+courses.counters. The org-wide trainee total is cached, because it changes rarely
+but is requested by every stats call.
+"""
+
+from django.core.cache import cache
+
+from .models import Profile
+
+TOTAL_LEARNERS_CACHE_KEY = 'courses:total_learners'
+TOTAL_LEARNERS_CACHE_TIMEOUT = 300
+
+
+def total_learners():
+    """Number of trainees in the org, served from cache."""
+    return cache.get_or_set(
+        TOTAL_LEARNERS_CACHE_KEY,
+        lambda: Profile.objects.filter(primary_role='trainee').count(),
+        TOTAL_LEARNERS_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_total_learners():
+    cache.delete(TOTAL_LEARNERS_CACHE_KEY)
@@ -1,6 +1,12 @@
+from datetime import timedelta
+from unittest import mock
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APIClient
-from courses.models import Profile, Course, Team, TeamMember, Enrollment
+from courses.jobs import run_job
+from courses.models import Profile, Course, Team, TeamMember, Enrollment, BackgroundJob
 
 class AssignFlowTest(TestCase):
     def setUp(self):
@@ -32,3 +38,73 @@ class AssignFlowTest(TestCase):
         # Expect 2 enrollments created
         self.assertEqual(data.get('created'), 2)
         self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 2)
+
+    def test_assign_skips_existing_and_duplicate_learners(self):
+        Enrollment.objects.create(course=self.course, user=self.learner1, assigned_by=self.trainer)
+        learner3 = Profile.objects.create_user(username='learner3', email='learner3@example.com', password='password')
+        client = APIClient()
+        client.force_authenticate(user=self.trainer)
+        payload = {
+            'user_ids': [str(self.learner2.id), str(learner3.id), 'not-a-uuid'],
+            'team_ids': [str(self.team.team_id)],
+        }
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.post(f'/api/trainer/v1/course/{self.course.id}/assign/', payload, format='json')
+        self.assertEqual(resp.status_code, 200)
+        # learner1 was already enrolled, learner2 is listed directly and via the team
+        self.assertEqual(resp.json().get('created'), 2)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+        self.assertLessEqual(len(ctx.captured_queries), 8)
+
+    def test_async_assign_reports_progress_and_resumes(self):
+        learner3 = Profile.objects.create_user(username='learner3', email='learner3@example.com', password='password')
+        Enrollment.objects.create(course=self.course, user=self.learner2, assigned_by=self.trainer)
+        client = APIClient()
+        client.force_authenticate(user=self.trainer)
+        payload = {'user_ids': [str(learner3.id)], 'team_ids': [str(self.team.team_id)], 'async': True}
+        resp = client.post(f'/api/trainer/v1/course/{self.course.id}/assign/', payload, format='json')
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()['job_id']
+
+        # Simulate a worker that died after handling the first learner
+        first_id = min([self.learner1.id, self.learner2.id, learner3.id], key=str)
+        job = BackgroundJob.objects.get(id=job_id)
+        job.status = 'running'
+        job.progress = {'total': 3, 'processed': 1, 'created': 0, 'skipped': 1, 'cursor': str(first_id)}
+        job.save()
+        Enrollment.objects.get_or_create(course=self.course, user_id=first_id, defaults={'assigned_by': self.trainer})
+
+        with mock.patch('courses.assignment.BATCH_SIZE', 1):
+            self.assertIsNone(run_job(job_id))
+            # A worker still renewing its lease keeps the job
+            BackgroundJob.objects.filter(id=job_id).update(locked_until=timezone.now() + timedelta(seconds=30))
+            self.assertIsNone(run_job(job_id, resume=True))
+            BackgroundJob.objects.filter(id=job_id).update(locked_until=timezone.now() - timedelta(seconds=1))
+            run_job(job_id, resume=True)
+
+        data = client.get(f'/api/jobs/{job_id}/').json()
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual(data['progress']['processed'], 3)
+        self.assertEqual(data['progress']['created'] + data['progress']['skipped'], 3)
+        self.assertEqual(Enrollment.objects.filter(course=self.course).count(), 3)
+
+    def test_assignable_learners_search_team_and_cursor(self):
+        self.learner1.first_name, self.learner1.last_name = 'Ada', 'Lovelace'
+        self.learner1.save()
+        outsider = Profile.objects.create_user(username='learner3', email='zed@example.com', password='password', first_name='Adam')
+        enrolled = Profile.objects.create_user(username='learner4', email='ada4@example.com', password='password')
+        Enrollment.objects.create(course=self.course, user=enrolled)
+        client = APIClient()
+        client.force_authenticate(user=self.trainer)
+        url = f'/api/trainer/v1/course/{self.course.id}/assignable_learners/'
+
+        emails = lambda resp: [row['email'] for row in resp.json()['results']]
+        self.assertEqual(emails(client.get(url, {'search': 'ada'})), ['learner1@example.com', 'zed@example.com'])
+        self.assertEqual(emails(client.get(url, {'search': 'ada love'})), ['learner1@example.com'])
+        self.assertEqual(emails(client.get(url, {'search': 'ada', 'team_id': str(self.team.team_id)})), ['learner1@example.com'])
+
+        first = client.get(url, {'page_size': 2}).json()
+        self.assertEqual([row['email'] for row in first['results']], ['learner1@example.com', 'learner2@example.com'])
+        second = client.get(first['next']).json()
+        self.assertEqual([row['email'] for row in second['results']], ['zed@example.com'])
+        self.assertIsNone(second['next'])
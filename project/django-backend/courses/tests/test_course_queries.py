@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit, VideoUnit, TextUnit, Quiz, Question
+
+
+class CourseListQueryCountTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password', first_name='Tina', last_name='Trainer')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def _add_courses(self, count):
+        for i in range(count):
+            course = Course.objects.create(title=f'Course {i}', created_by=self.trainer)
+            for seq in range(3):
+                Unit.objects.create(course=course, module_type='text', title=f'Unit {seq}', sequence_order=seq)
+
+    def _count_list_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries), resp.json()
+
+    def test_list_query_count_does_not_grow_with_rows(self):
+        for url in ('/api/courses/', '/api/trainer/v1/course/'):
+            Course.objects.all().delete()
+            self._add_courses(2)
+            small, _ = self._count_list_queries(url)
+            self._add_courses(10)
+            large, data = self._count_list_queries(url)
+            self.assertEqual(small, large, url)
+            self.assertEqual(data['count'], 12)
+            self.assertTrue(all(row['units_count'] == 3 for row in data['results']))
+            self.assertTrue(all(row['created_by_name'] == 'Tina Trainer' for row in data['results']))
+
+
+class CourseDetailQueryCountTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='Tree', created_by=self.trainer)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+        self.next_seq = 0
+
+    def _add_modules(self, count):
+        for _ in range(count):
+            seq = self.next_seq
+            self.next_seq += 1
+            video = Unit.objects.create(course=self.course, module_type='video', title=f'V{seq}', sequence_order=seq * 3)
+            VideoUnit.objects.create(unit=video, duration=60)
+            text = Unit.objects.create(course=self.course, module_type='text', title=f'T{seq}', sequence_order=seq * 3 + 1)
+            TextUnit.objects.create(unit=text, content='hello')
+            quiz_unit = Unit.objects.create(course=self.course, module_type='quiz', title=f'Q{seq}', sequence_order=seq * 3 + 2)
+            quiz = Quiz.objects.create(unit=quiz_unit)
+            Question.objects.create(quiz=quiz, type='true_false', text='?', correct_answer=True, order=0)
+            Question.objects.create(quiz=quiz, type='true_false', text='??', correct_answer=False, order=1)
+
+    def _retrieve(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(f'/api/trainer/v1/course/{self.course.id}/')
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries), resp.json()
+
+    def test_retrieve_query_count_is_fixed(self):
+        self._add_modules(1)
+        small, _ = self._retrieve()
+        self._add_modules(6)
+        large, data = self._retrieve()
+        self.assertEqual(small, large)
+        self.assertEqual(len(data['units']), 21)
+        quiz_units = [u for u in data['units'] if u['module_type'] == 'quiz']
+        self.assertTrue(all(len(u['quiz_details']['questions']) == 2 for u in quiz_units))
+        text_units = [u for u in data['units'] if u['module_type'] == 'text']
+        self.assertTrue(all(u['text_details']['content'] == 'hello' and u['video_details'] is None for u in text_units))
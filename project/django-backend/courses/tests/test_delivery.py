@@ -0,0 +1,78 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.grading import answer_key, grade
+from courses.models import Profile, Course, Unit, Quiz, Question, Enrollment
+
+
+class QuizDeliveryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=unit, randomize_questions=True)
+        for i in range(8):
+            Question.objects.create(
+                quiz=self.quiz, type='multiple_choice', text=f'Q{i}', options=['a', 'b', 'c', 'd'], correct_answer='c', order=i,
+            )
+        self.ordering = Question.objects.create(
+            quiz=self.quiz, type='ordering', text='Sort', correct_answer=['one', 'two', 'three'], order=9,
+        )
+        Enrollment.objects.create(course=course, user=self.learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learner)
+        self.url = f'/api/quizzes/{self.quiz.id}/deliver/'
+
+    def order(self, data):
+        return [question['id'] for question in data['questions']]
+
+    def test_payload_is_cached_answer_free_and_seeded(self):
+        first = self.client.get(self.url, {'attempt_id': 'a1'}).json()
+        self.assertNotIn('correct_answer', str(first))
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get(self.url, {'attempt_id': 'a1'}).json()
+        # Only the enrollment check; the questions come from the cache
+        self.assertFalse(any('questions' in query['sql'] for query in ctx.captured_queries))
+        self.assertEqual(self.order(first), self.order(again))
+        self.assertEqual(first['questions'][0]['options'], again['questions'][0]['options'])
+
+        other = self.client.get(self.url, {'attempt_id': 'a2'}).json()
+        self.assertNotEqual(
+            (self.order(first), [q['options'] for q in first['questions']]),
+            (self.order(other), [q['options'] for q in other['questions']]),
+        )
+
+        # Answers given by option id grade correctly whatever the shown order
+        answers = {}
+        for question in first['questions']:
+            if question['type'] == 'ordering':
+                answers[question['id']] = ['one', 'two', 'three']
+            else:
+                answers[question['id']] = next(o['id'] for o in question['options'] if o['text'] == 'c')
+        self.assertEqual(grade(answer_key(self.quiz.id), answers)['score'], 100)
+
+    def test_changes_invalidate_and_outsiders_are_rejected(self):
+        self.client.get(self.url)
+        self.ordering.text = 'Sort these'
+        self.ordering.save()
+        texts = [question['text'] for question in self.client.get(self.url).json()['questions']]
+        self.assertIn('Sort these', texts)
+
+        outsider = Profile.objects.create_user(username='outsider', email='outsider@example.com', password='password')
+        self.client.force_authenticate(user=outsider)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_quiz_and_question_endpoints_hide_answers_from_learners(self):
+        urls = [f'/api/quizzes/{self.quiz.id}/', f'/api/questions/?quiz_id={self.quiz.id}', f'/api/courses/{self.quiz.unit.course_id}/']
+        for url in urls:
+            self.assertNotIn('correct_answer', str(self.client.get(url).json()))
+        trainer = self.quiz.unit.course.created_by
+        trainer.primary_role = 'trainer'
+        trainer.save()
+        self.client.force_authenticate(user=trainer)
+        for url in urls:
+            self.assertIn('correct_answer', str(self.client.get(url).json()))
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.jobs import run_job
+from courses.models import (
+    Profile, Course, Unit, VideoUnit, TextUnit, Quiz, Question, Survey,
+    ModuleSequencing, BackgroundJob, QuestionBank, QuizBankDraw
+)
+
+
+class DuplicateCourseTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='Compliance', status='published', created_by=self.trainer)
+        video = Unit.objects.create(course=self.course, module_type='video', title='Intro', sequence_order=0)
+        VideoUnit.objects.create(unit=video, video_url='https://example.com/v.mp4', required_watch_percentage=80)
+        text = Unit.objects.create(course=self.course, module_type='text', title='Reading', sequence_order=1)
+        TextUnit.objects.create(unit=text, content='policy')
+        survey = Unit.objects.create(course=self.course, module_type='survey', title='Feedback', sequence_order=2)
+        Survey.objects.create(unit=survey, questions=[{'q': 'ok?'}])
+        quiz_unit = Unit.objects.create(course=self.course, module_type='quiz', title='Check', sequence_order=3)
+        quiz = Quiz.objects.create(unit=quiz_unit, passing_score=80)
+        Question.objects.create(quiz=quiz, type='true_false', text='Safe?', correct_answer=True, order=0)
+        Question.objects.create(quiz=quiz, type='multiple_choice', text='Pick', options=['a', 'b'], correct_answer='a', order=1)
+        bank = QuestionBank.objects.create(name='Bank', created_by=self.trainer)
+        QuizBankDraw.objects.create(quiz=quiz, bank=bank, category='safety', count=3)
+        ModuleSequencing.objects.create(course=self.course, module=text, preceding_module=video, prerequisite_completed=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def assertCopied(self, dup):
+        self.assertNotEqual(dup.id, self.course.id)
+        self.assertEqual(dup.title, 'Compliance (copy)')
+        self.assertEqual(dup.status, 'draft')
+        units = {u.title: u for u in dup.units.all()}
+        self.assertEqual(set(units), {'Intro', 'Reading', 'Feedback', 'Check'})
+        self.assertEqual(units['Intro'].video_details.required_watch_percentage, 80)
+        self.assertEqual(units['Reading'].text_details.content, 'policy')
+        self.assertEqual(units['Feedback'].survey_details.questions, [{'q': 'ok?'}])
+        self.assertEqual(list(units['Check'].quiz_details.questions.values_list('text', flat=True)), ['Safe?', 'Pick'])
+        draw = QuizBankDraw.objects.get(quiz=units['Check'].quiz_details)
+        self.assertEqual((draw.category, draw.count), ('safety', 3))
+        rule = ModuleSequencing.objects.get(course=dup)
+        self.assertEqual(rule.module_id, units['Reading'].id)
+        self.assertEqual(rule.preceding_module_id, units['Intro'].id)
+        # the original is untouched
+        self.assertEqual(Question.objects.filter(quiz__unit__course=self.course).count(), 2)
+
+    def test_duplicate_copies_every_subtype_and_rule(self):
+        resp = self.client.post(f'/api/trainer/v1/course/{self.course.id}/duplicate/', {}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['units']), 4)
+        self.assertCopied(Course.objects.get(id=resp.json()['id']))
+
+    def test_duplicate_as_background_job(self):
+        resp = self.client.post(f'/api/trainer/v1/course/{self.course.id}/duplicate/', {'async': True}, format='json')
+        self.assertEqual(resp.status_code, 202)
+        job_id = resp.json()['job_id']
+        self.assertEqual(BackgroundJob.objects.get(id=job_id).status, 'pending')
+
+        run_job(job_id)
+        resp = self.client.get(f'/api/trainer/v1/jobs/{job_id}/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()['status'], 'completed')
+        self.assertCopied(Course.objects.get(id=resp.json()['result']['course_id']))
@@ -0,0 +1,98 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.counters import read_counters
+from courses.models import Profile, Course, Enrollment, CourseEnrollmentCounter
+
+
+class EnrollmentStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.learners = []
+        for i in range(4):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            self.learners.append(learner)
+        self.course_a = Course.objects.create(title='A', created_by=self.trainer)
+        self.course_b = Course.objects.create(title='B', created_by=self.trainer)
+        Enrollment.objects.create(course=self.course_a, user=self.learners[0], status='completed')
+        Enrollment.objects.create(course=self.course_a, user=self.learners[1], status='in_progress')
+        Enrollment.objects.create(course=self.course_a, user=self.learners[2], status='assigned')
+        Enrollment.objects.create(course=self.course_b, user=self.learners[0], status='assigned')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def test_single_course_stats(self):
+        resp = self.client.get(f'/api/courses/{self.course_a.id}/enrollment_stats/')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json(), {
+            'total_enrolled': 3, 'assigned': 1, 'in_progress': 1, 'completed': 1, 'total_learners': 4,
+        })
+
+    def test_many_courses_in_one_round_trip(self):
+        url = f'/api/trainer/v1/course/enrollment-stats/?course_ids={self.course_a.id},{self.course_b.id}'
+        self.client.get(url)  # warm the learner total cache
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        courses = resp.json()['courses']
+        self.assertEqual(courses[str(self.course_a.id)]['total_enrolled'], 3)
+        self.assertEqual(courses[str(self.course_b.id)], {'total_enrolled': 1, 'assigned': 1, 'in_progress': 0, 'completed': 0})
+
+    def test_learner_total_cache_is_invalidated(self):
+        self.assertEqual(self.client.get(f'/api/courses/{self.course_a.id}/enrollment_stats/').json()['total_learners'], 4)
+        Profile.objects.create_user(username='learner9', email='learner9@example.com', password='password')
+        self.assertEqual(self.client.get(f'/api/courses/{self.course_a.id}/enrollment_stats/').json()['total_learners'], 5)
+
+
+class EnrollmentCounterTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.learners = [
+            Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            for i in range(3)
+        ]
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def counts(self):
+        return read_counters([self.course.id])[str(self.course.id)]
+
+    def test_counters_follow_single_and_bulk_writes(self):
+        enrollment = Enrollment.objects.create(course=self.course, user=self.learners[0])
+        resp = self.client.post('/api/enrollments/bulk_create/', {
+            'course_id': str(self.course.id), 'user_ids': [str(u.id) for u in self.learners],
+        }, format='json')
+        self.assertEqual(resp.json()['created'], 2)
+        self.assertEqual(self.counts(), {'total_enrolled': 3, 'assigned': 3, 'in_progress': 0, 'completed': 0})
+
+        enrollment.status = 'completed'
+        enrollment.save()
+        Enrollment.objects.filter(user=self.learners[1]).delete()
+        self.assertEqual(self.counts(), {'total_enrolled': 2, 'assigned': 1, 'in_progress': 0, 'completed': 1})
+
+        row = self.client.get('/api/courses/').json()['results'][0]
+        self.assertEqual(row['enrollment_counts']['completed'], 1)
+
+    def test_rebuild_command_recomputes_counters(self):
+        Enrollment.objects.create(course=self.course, user=self.learners[0], status='in_progress')
+        CourseEnrollmentCounter.objects.all().update(total_enrolled=99)
+        call_command('rebuild_enrollment_counters', stdout=StringIO())
+        self.assertEqual(self.counts(), {'total_enrolled': 1, 'assigned': 0, 'in_progress': 1, 'completed': 0})
+
+    def test_deleting_course_drops_its_counters(self):
+        for learner in self.learners:
+            Enrollment.objects.create(course=self.course, user=learner)
+        self.course.delete()
+        self.assertFalse(CourseEnrollmentCounter.objects.exists())
+        connection.check_constraints()
@@ -0,0 +1,75 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.grading import answer_key, grade, grade_attempts
+from courses.models import Profile, Course, Unit, Quiz, Question, QuizAttempt
+
+
+class GradingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=unit, passing_score=60)
+        spec = [
+            ('multiple_choice', ['Paris', 'Rome'], 'Paris', 2),
+            ('multiple_answer', ['2', '3', '4'], [0, 'Three'], 2),
+            ('true_false', [], 'true', 1),
+            ('fill_blank', [], ['colour', 'color'], 1),
+            ('matching', [], {'a': '1', 'b': '2'}, 2),
+            ('ordering', ['low', 'mid', 'high'], ['low', 'mid', 'high'], 2),
+        ]
+        self.questions = [
+            Question.objects.create(quiz=self.quiz, type=qtype, text=f'Q{i}', options=options, correct_answer=correct, points=points, order=i)
+            for i, (qtype, options, correct, points) in enumerate(spec)
+        ]
+        self.correct = {
+            str(self.questions[0].id): 0,
+            str(self.questions[1].id): ['three', '2'],
+            str(self.questions[2].id): True,
+            str(self.questions[3].id): ' Color ',
+            str(self.questions[4].id): [['B', '2'], ['a', '1']],
+            str(self.questions[5].id): [0, 'Mid', 2],
+        }
+
+    def test_every_question_type(self):
+        key = answer_key(self.quiz.id)
+        result = grade(key, self.correct)
+        self.assertEqual((result['score'], result['passed'], result['points_earned']), (100, True, 10))
+
+        wrong = dict(self.correct)
+        wrong[str(self.questions[1].id)] = ['2']
+        wrong[str(self.questions[5].id)] = ['mid', 'low', 'high']
+        wrong[str(self.questions[2].id)] = 'maybe'
+        result = grade(key, wrong)
+        self.assertEqual((result['score'], result['passed']), (50, False))
+        self.assertEqual(result['results'][str(self.questions[1].id)], False)
+
+    def test_free_text_is_pending_and_key_is_recompiled_on_change(self):
+        self.assertEqual(grade(answer_key(self.quiz.id), self.correct)['points_possible'], 10)
+        free = Question.objects.create(quiz=self.quiz, type='free_text', text='Why?', points=5, order=9)
+        result = grade(answer_key(self.quiz.id), {**self.correct, str(free.id): 'Because'})
+        self.assertEqual((result['score'], result['passed'], result['pending_review']), (67, False, True))
+        self.assertIsNone(result['results'][str(free.id)])
+
+    def test_batch_grading_needs_no_queries_once_compiled(self):
+        attempts = [QuizAttempt(quiz=self.quiz, user=self.learner, answers=self.correct) for _ in range(50)]
+        answer_key(self.quiz.id)
+        with CaptureQueriesContext(connection) as ctx:
+            grade_attempts(attempts)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertTrue(all(attempt.score == 100 and attempt.passed for attempt in attempts))
+
+    def test_client_supplied_scores_are_ignored(self):
+        client = APIClient()
+        client.force_authenticate(user=self.learner)
+        resp = client.post('/api/quiz-attempts/', {
+            'quiz': str(self.quiz.id), 'user': str(self.learner.id), 'score': 100, 'passed': True,
+            'answers': {str(self.questions[0].id): 'Paris'},
+        }, format='json')
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual((resp.json()['score'], resp.json()['passed'], resp.json()['points_earned']), (20, False, 2))
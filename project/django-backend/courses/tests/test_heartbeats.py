@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.heartbeats import heartbeat_buffer
+from courses.models import Profile, Course, Unit, VideoUnit, Enrollment, UnitProgress
+
+
+@override_settings(PROGRESS_HEARTBEAT_FLUSH_SECONDS=0)
+class HeartbeatBufferTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        heartbeat_buffer.drain()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        self.video = Unit.objects.create(course=course, module_type='video', title='V', sequence_order=0)
+        VideoUnit.objects.create(unit=self.video, required_watch_percentage=80)
+        self.audio = Unit.objects.create(course=course, module_type='audio', title='A', sequence_order=1)
+        self.enrollment = Enrollment.objects.create(course=course, user=self.learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learner)
+
+    def beat(self, unit, pct):
+        return self.client.post('/api/unit-progress/heartbeat/', {
+            'enrollment_id': str(self.enrollment.id), 'unit_id': str(unit.id), 'watch_percentage': pct,
+        }, format='json')
+
+    def test_heartbeats_coalesce_and_never_lower_progress(self):
+        self.beat(self.video, 10)
+        with CaptureQueriesContext(connection) as ctx:
+            for pct in (30, 50, 40):
+                self.assertEqual(self.beat(self.video, pct).status_code, 202)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.beat(self.audio, 90)
+        self.assertEqual(heartbeat_buffer.flush(), 2)
+
+        video = UnitProgress.objects.get(unit=self.video)
+        self.assertEqual((video.watch_percentage, video.status), (50, 'in_progress'))
+        self.beat(self.video, 20)
+        heartbeat_buffer.flush()
+        self.assertEqual(UnitProgress.objects.get(unit=self.video).watch_percentage, 50)
+
+        self.beat(self.video, 85)
+        self.beat(self.audio, 100)
+        heartbeat_buffer.flush()
+        self.assertEqual(
+            set(UnitProgress.objects.values_list('status', flat=True)), {'completed'}
+        )
+
+    def test_rejects_other_learners_enrollments(self):
+        other = Profile.objects.create_user(username='learner2', email='learner2@example.com', password='password')
+        self.client.force_authenticate(user=other)
+        resp = self.beat(self.video, 50)
+        self.assertEqual(resp.json(), {'buffered': 0, 'rejected': 1})
+        self.assertEqual(heartbeat_buffer.flush(), 0)
+
+    def test_heartbeats_for_deleted_rows_are_dropped(self):
+        other = Profile.objects.create_user(username='learner2', email='learner2@example.com', password='password')
+        stale = Enrollment.objects.create(course=self.video.course, user=other)
+        heartbeat_buffer.add(stale.id, self.video.id, 40)
+        self.beat(self.video, 30)
+        stale.delete()
+        self.audio.delete()
+        heartbeat_buffer.add(self.enrollment.id, self.audio.id, 60)
+        self.assertEqual(heartbeat_buffer.flush(), 1)
+        self.assertEqual(len(heartbeat_buffer), 0)
+        self.assertEqual(UnitProgress.objects.get().watch_percentage, 30)
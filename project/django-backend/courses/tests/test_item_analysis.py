@@ -0,0 +1,128 @@
+import random
+import statistics
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from courses.grading import answer_key, grade
+from courses.item_analysis import analyse_quiz
+from courses.jobs import run_job
+from courses.models import Profile, Course, Unit, Quiz, Question, QuizAttempt
+
+
+@override_settings(LEADERBOARD_DEBOUNCE_SECONDS=0)
+class ItemAnalysisTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trainer = Profile.objects.create_user(
+            username='trainer1', email='trainer1@example.com', password='password', primary_role='trainer',
+        )
+        course = Course.objects.create(title='A', created_by=self.trainer)
+        unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=unit, attempts_allowed=0)
+        self.easy = Question.objects.create(quiz=self.quiz, type='multiple_choice', text='Easy', options=['a', 'b', 'c'], correct_answer='a', order=1)
+        self.split = Question.objects.create(quiz=self.quiz, type='multiple_choice', text='Split', options=['x', 'y'], correct_answer='y', points=2, order=2)
+        self.truth = Question.objects.create(quiz=self.quiz, type='true_false', text='Truth', correct_answer=True, order=3)
+        self.essay = Question.objects.create(quiz=self.quiz, type='free_text', text='Essay', order=4)
+
+        self.split_correct = []
+        self.rest = []
+        for i in range(30):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            split_ok, truth_ok = i % 3 != 0, i % 2 == 0
+            answers = {
+                str(self.easy.id): 0,
+                str(self.split.id): 1 if split_ok else 'zzz' if i == 3 else 0,
+                str(self.truth.id): truth_ok,
+            }
+            QuizAttempt.objects.create(
+                quiz=self.quiz, user=learner, answers=answers, answer_times={str(self.easy.id): 10.0 + i},
+            )
+            self.split_correct.append(int(split_ok))
+            self.rest.append(1 + int(truth_ok))
+
+    def test_statistics(self):
+        report = analyse_quiz(self.quiz.id, chunk_size=7)
+        self.assertEqual(report['attempts'], 30)
+        items = {item['question_id']: item for item in report['items']}
+
+        easy = items[str(self.easy.id)]
+        self.assertEqual((easy['difficulty'], easy['flags']), (1.0, ['too_easy']))
+        self.assertEqual([option['count'] for option in easy['options']], [30, 0, 0])
+        self.assertEqual((easy['median_seconds'], easy['p90_seconds']), (24.5, 36.1))
+
+        split = items[str(self.split.id)]
+        self.assertEqual(split['difficulty'], 0.667)
+        self.assertEqual(split['discrimination'], round(statistics.correlation(self.split_correct, self.rest), 3))
+        self.assertEqual([option['count'] for option in split['options']], [9, 20])
+        self.assertEqual(split['other'], 1)
+        self.assertTrue(split['options'][1]['correct'])
+
+        essay = items[str(self.essay.id)]
+        self.assertEqual((essay['graded'], essay['difficulty'], essay['answered']), (0, None, 0))
+
+    def test_endpoint_requires_course_trainer(self):
+        client = APIClient()
+        client.force_authenticate(user=Profile.objects.get(username='learner0'))
+        url = f'/api/quizzes/{self.quiz.id}/item-analysis/'
+        self.assertEqual(client.get(url).status_code, 403)
+        client.force_authenticate(user=self.trainer)
+        self.assertEqual(client.get(url).json()['attempts'], 30)
+
+    def test_vectorized_grading_matches_grade(self):
+        rng = random.Random(3)
+        QuizAttempt.objects.all().delete()
+        questions = [
+            self.easy, self.split, self.truth, self.essay,
+            Question.objects.create(quiz=self.quiz, type='multiple_answer', text='Many', options=['p', 'q', 'r'], correct_answer=['p', 'r'], order=5),
+            Question.objects.create(quiz=self.quiz, type='ordering', text='Order', options=['1', '2', '3'], correct_answer=['1', '2', '3'], order=6),
+            Question.objects.create(quiz=self.quiz, type='fill_blank', text='Fill', correct_answer=['Paris'], order=7),
+            Question.objects.create(quiz=self.quiz, type='matching', text='Match', correct_answer={'a': '1', 'b': '2'}, order=8),
+        ]
+        choices = {
+            'multiple_choice': [0, 1, 2, 'a', 'y', 'zzz', [0], []],
+            'multiple_answer': [['p', 'r'], [0, 2, 2], ['r', 'p'], [0], [0, 1, 2], ['x'], [], 'p'],
+            'true_false': [True, False, 'true', 'no', 'maybe', [], [True], 1],
+            'free_text': ['words'],
+            'ordering': [['1', '2', '3'], ['2', '1', '3'], [0, 1, 2], ['1', '2']],
+            'fill_blank': ['Paris', ' paris ', 'Rome', ['Paris'], 5],
+            'matching': [{'a': '1', 'b': '2'}, {'a': '2', 'b': '1'}, [['a', '1'], ['b', '2']], 'nope'],
+        }
+        attempts = []
+        for i in range(60):
+            answers = {
+                str(question.id): rng.choice(choices[question.type])
+                for question in questions if rng.random() < 0.85
+            }
+            attempts.append(QuizAttempt(quiz=self.quiz, user_id=Profile.objects.get(username=f'learner{i % 30}').id, answers=answers))
+        QuizAttempt.objects.bulk_create(attempts)
+
+        cache.clear()
+        key = answer_key(self.quiz.id)
+        graded = [grade(key, attempt.answers) for attempt in attempts]
+        report = analyse_quiz(self.quiz.id, chunk_size=17)
+        self.assertEqual(report['average_score'], round(statistics.fmean(result['score'] for result in graded), 1))
+        for item in report['items']:
+            outcomes = [result['results'][item['question_id']] for result in graded]
+            if outcomes[0] is None:
+                self.assertIsNone(item['difficulty'])
+            else:
+                self.assertEqual(item['difficulty'], round(statistics.fmean(outcomes), 3), item['type'])
+
+    @override_settings(ITEM_ANALYSIS_SYNC_ATTEMPTS=10, BACKGROUND_JOBS_IN_THREAD=False)
+    def test_large_quizzes_are_analysed_in_a_job(self):
+        client = APIClient()
+        client.force_authenticate(user=self.trainer)
+        url = f'/api/quizzes/{self.quiz.id}/item-analysis/'
+        resp = client.get(url)
+        self.assertEqual((resp.status_code, resp.json()['status']), (202, 'pending'))
+        job_id = resp.json()['job_id']
+        # Polling reuses the queued job
+        self.assertEqual(client.get(url).json()['job_id'], job_id)
+
+        run_job(job_id)
+        self.assertEqual(client.get(url).json()['attempts'], 30)
+        # Served from the finished job when this process has no cached copy
+        cache.clear()
+        self.assertEqual(client.get(url).json()['attempts'], 30)
+        self.assertNotEqual(client.get(url, {'refresh': 'true'}).json()['job_id'], job_id)
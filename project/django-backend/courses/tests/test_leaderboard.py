@@ -0,0 +1,116 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from courses.leaderboard import leaderboard_scheduler, rebuild_leaderboards
+from courses.models import Profile, Course, Unit, Quiz, Enrollment, UnitProgress, QuizAttempt, Leaderboard, Team, TeamMember
+
+
+@override_settings(LEADERBOARD_DEBOUNCE_SECONDS=0)
+class LeaderboardRankingTest(TestCase):
+    def setUp(self):
+        leaderboard_scheduler.drain()
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        self.other = Course.objects.create(title='B', created_by=self.trainer)
+        self.units = [
+            Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=i) for i in range(3)
+        ]
+        quiz_unit = Unit.objects.create(course=self.other, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=quiz_unit)
+        self.learners = [
+            Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            for i in range(3)
+        ]
+        self.enrollments = [Enrollment.objects.create(course=self.course, user=learner) for learner in self.learners]
+        for learner in self.learners:
+            Enrollment.objects.create(course=self.other, user=learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def complete(self, learner_index, count):
+        for unit in self.units[:count]:
+            UnitProgress.objects.create(enrollment=self.enrollments[learner_index], unit=unit, status='completed')
+
+    def ranks(self, course=None):
+        rows = Leaderboard.objects.filter(course=course).order_by('rank', 'user__username')
+        return [(row.user.username, row.total_points, row.rank) for row in rows]
+
+    def test_dense_ranks_per_course_and_global(self):
+        self.complete(0, 2)
+        self.complete(1, 2)
+        self.complete(2, 1)
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.learners[2], score=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            UnitProgress.objects.create(enrollment=self.enrollments[2], unit=self.units[2], status='in_progress')
+        self.assertIn(self.course.id, leaderboard_scheduler.drain())
+
+        rebuild_leaderboards()
+        self.assertEqual(self.ranks(self.course), [('learner0', 20, 1), ('learner1', 20, 1), ('learner2', 10, 2)])
+        self.assertEqual(self.ranks(self.other), [('learner2', 30, 1), ('learner0', 0, 2), ('learner1', 0, 2)])
+        self.assertEqual(self.ranks(), [('learner2', 40, 1), ('learner0', 20, 2), ('learner1', 20, 2)])
+        self.assertEqual(Leaderboard.objects.get(course=self.course, user=self.learners[2]).activity_points, 2)
+
+        # Removing a learner re-ranks everyone else in the scope
+        self.enrollments[0].delete()
+        UnitProgress.objects.create(enrollment=self.enrollments[1], unit=self.units[2], status='completed')
+        rebuild_leaderboards([self.course.id])
+        self.assertEqual(self.ranks(self.course), [('learner1', 30, 1), ('learner2', 10, 2)])
+
+    def test_scheduler_coalesces_bursts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.complete(0, 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            QuizAttempt.objects.create(quiz=self.quiz, user=self.learners[1], score=50)
+        self.assertEqual(leaderboard_scheduler.flush(), 2)
+        self.assertEqual(leaderboard_scheduler.flush(), 0)
+        self.assertEqual(self.ranks()[0], ('learner1', 50, 1))
+
+    def test_viewset_pages_and_team_scope(self):
+        self.complete(0, 1)
+        self.complete(1, 3)
+        rebuild_leaderboards()
+        team = Team.objects.create(team_name='Ops')
+        TeamMember.objects.create(team=team, user=self.learners[0])
+        TeamMember.objects.create(team=team, user=self.learners[2])
+
+        resp = self.client.get('/api/leaderboard/', {'course_id': str(self.course.id), 'page_size': 2})
+        data = resp.json()
+        self.assertEqual([row['rank'] for row in data['results']], [1, 2])
+        self.assertEqual(data['results'][0]['user_name'], self.learners[1].full_name)
+        self.assertEqual([row['rank'] for row in self.client.get(data['next']).json()['results']], [3])
+
+        rows = self.client.get('/api/leaderboard/team/', {'team_id': str(team.team_id)}).json()
+        self.assertEqual([(row['user'], row['team_rank'], row['rank']) for row in rows],
+                         [(str(self.learners[0].id), 1, 2), (str(self.learners[2].id), 2, 3)])
+
+        self.assertEqual(self.client.post('/api/leaderboard/recompute/', {'course_id': str(self.course.id)}, format='json').status_code, 200)
+
+    def test_pages_seek_through_tied_ranks(self):
+        for i in range(12):
+            learner = Profile.objects.create_user(username=f'tied{i}', email=f'tied{i}@example.com', password='password')
+            Enrollment.objects.create(course=self.course, user=learner)
+        rebuild_leaderboards([self.course.id])
+        url = f'/api/leaderboard/?course_id={self.course.id}&page_size=4'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend(data['results'])
+            url = data['next']
+        self.assertEqual(len({row['user'] for row in seen}), 15)
+        self.assertEqual([row['position'] for row in seen], list(range(1, 16)))
+        # Everyone ties on zero points
+        self.assertEqual({row['rank'] for row in seen}, {1})
+
+    def test_course_recompute_rolls_up_only_changed_users(self):
+        self.complete(0, 1)
+        self.complete(1, 1)
+        rebuild_leaderboards()
+        # A global row the next recompute must leave alone, since learner0's course rows do not change
+        Leaderboard.objects.filter(course__isnull=True, user=self.learners[0]).update(total_points=5)
+        UnitProgress.objects.create(enrollment=self.enrollments[1], unit=self.units[1], status='completed')
+        rebuild_leaderboards([self.course.id])
+        self.assertEqual(self.ranks(), [('learner1', 20, 1), ('learner0', 5, 2), ('learner2', 0, 3)])
+
+        resp = self.client.get('/api/leaderboard/')
+        self.assertEqual({row['course'] for row in resp.json()['results']}, {None})
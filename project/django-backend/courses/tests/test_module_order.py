@@ -0,0 +1,101 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit
+
+
+class ModuleReorderTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        self.units = [
+            Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=i)
+            for i in range(5)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def titles(self):
+        return list(Unit.objects.filter(course=self.course).order_by('sequence_order').values_list('title', flat=True))
+
+    def reorder(self, units):
+        return self.client.post(
+            f'/api/trainer/v1/course/{self.course.id}/modules/reorder/',
+            {'module_ids': [str(u.id) for u in units]}, format='json'
+        )
+
+    def test_reorder_uses_constant_statements(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.reorder(list(reversed(self.units)))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.titles(), ['U4', 'U3', 'U2', 'U1', 'U0'])
+        small = len(ctx.captured_queries)
+
+        self.units += [
+            Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=10000 + i)
+            for i in range(5, 30)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.reorder(self.units).status_code, 200)
+        self.assertEqual(len(ctx.captured_queries), small)
+        self.assertEqual(self.titles(), [f'U{i}' for i in range(30)])
+
+    def test_reorder_requires_every_module_once(self):
+        self.assertEqual(self.reorder(self.units[:-1]).status_code, 400)
+        self.assertEqual(self.reorder(self.units + self.units[:1]).status_code, 400)
+        self.assertEqual(self.titles(), ['U0', 'U1', 'U2', 'U3', 'U4'])
+
+    def test_move_touches_one_row_when_gap_allows(self):
+        self.reorder(self.units)
+        before = dict(Unit.objects.values_list('id', 'sequence_order'))
+        resp = self.client.post(f'/api/trainer/module/{self.units[4].id}/move/', {'after_id': str(self.units[0].id)}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.titles(), ['U0', 'U4', 'U1', 'U2', 'U3'])
+        after = dict(Unit.objects.values_list('id', 'sequence_order'))
+        self.assertEqual([uid for uid in before if before[uid] != after[uid]], [self.units[4].id])
+
+    def test_move_renumbers_when_gap_is_exhausted(self):
+        # positions 0..4 leave no room in between
+        resp = self.client.post(f'/api/trainer/module/{self.units[3].id}/move/', {'after_id': None}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.titles(), ['U3', 'U0', 'U1', 'U2', 'U4'])
+
+
+class UnitSequenceAllocationTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def create_unit(self, **extra):
+        return self.client.post('/api/units/', {'course': str(self.course.id), 'title': 'U', 'module_type': 'text', **extra}, format='json')
+
+    def test_create_allocates_increasing_positions_without_aggregates(self):
+        Unit.objects.create(course=self.course, module_type='text', title='legacy', sequence_order=3)
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.create_unit()
+        self.assertEqual(first.status_code, 201)
+        self.assertFalse(any('MAX(' in q['sql'].upper() and 'INSERT' not in q['sql'].upper() for q in ctx.captured_queries))
+        second = self.create_unit()
+        explicit = self.create_unit(sequence_order=50000)
+        third = self.create_unit()
+        positions = [r.json()['sequence_order'] for r in (first, second, explicit, third)]
+        self.assertEqual(positions[:2], [3 + 1024, 3 + 2048])
+        self.assertGreater(positions[3], 50000)
+        self.assertEqual(self.create_unit(sequence_order=50000).status_code, 400)
+
+    def test_update_reserves_the_new_position(self):
+        first = self.create_unit().json()
+        second = self.create_unit().json()
+        resp = self.client.patch(f'/api/units/{second["id"]}/', {'order': second['sequence_order'] + 1024}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        third = self.create_unit()
+        self.assertEqual(third.status_code, 201)
+        self.assertGreater(third.json()['sequence_order'], second['sequence_order'] + 1024)
+        self.assertLess(first['sequence_order'], second['sequence_order'])
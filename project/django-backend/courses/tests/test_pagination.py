@@ -0,0 +1,47 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit, Enrollment, UnitProgress
+
+
+class EnrollmentCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        now = timezone.now()
+        for i in range(7):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            # two learners share a timestamp to exercise the tie-breaker
+            Enrollment.objects.create(course=self.course, user=learner, assigned_at=now - timedelta(minutes=min(i, 5)))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        url = f'/api/enrollments/?course_id={self.course.id}&page_size=3'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            seen.extend(data['results'])
+            url = data['next']
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len({row['id'] for row in seen}), 7)
+        assigned = [row['assigned_at'] for row in seen]
+        self.assertEqual(assigned, sorted(assigned, reverse=True))
+
+    def test_unit_progress_pages_group_rows_by_enrollment(self):
+        units = [Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=i) for i in range(2)]
+        for enrollment in Enrollment.objects.all():
+            for unit in units:
+                UnitProgress.objects.create(enrollment=enrollment, unit=unit)
+        url = '/api/unit-progress/?page_size=4'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen.extend((row['enrollment'], row['id']) for row in data['results'])
+            url = data['next']
+        self.assertEqual(len(set(seen)), 14)
+        self.assertEqual(seen, sorted(seen))
@@ -0,0 +1,135 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from courses.counters import read_counters
+from courses.heartbeats import heartbeat_buffer
+from courses.progress import apply_progress_changes
+from courses.models import Profile, Course, Unit, VideoUnit, Enrollment, UnitProgress
+
+
+class EnrollmentProgressTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        heartbeat_buffer.drain()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        self.course = Course.objects.create(title='A', created_by=trainer, passing_criteria=50)
+        self.required = Unit.objects.create(course=self.course, module_type='text', title='R', sequence_order=1, is_mandatory=True)
+        self.optional = [
+            Unit.objects.create(course=self.course, module_type='text', title=f'O{i}', sequence_order=i + 2, is_mandatory=False)
+            for i in range(3)
+        ]
+        self.enrollment = Enrollment.objects.create(course=self.course, user=self.learner)
+
+    def refresh(self):
+        self.enrollment.refresh_from_db()
+        return self.enrollment
+
+    def counts(self):
+        return read_counters([self.course.id])[str(self.course.id)]
+
+    def test_completion_requires_mandatory_units_and_passing_share(self):
+        first = UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[0], status='in_progress')
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('in_progress', 0))
+        self.assertIsNotNone(self.enrollment.started_at)
+
+        first.status = 'completed'
+        first.save()
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[1], status='completed')
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('in_progress', 50))
+
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.required, status='completed')
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('completed', 75))
+        self.assertIsNotNone(self.enrollment.completed_at)
+        self.assertEqual(self.counts()['completed'], 1)
+
+        first.delete()
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('completed', 50))
+        UnitProgress.objects.filter(unit=self.required).delete()
+        self.assertEqual((self.refresh().status, self.enrollment.completed_mandatory_units), ('in_progress', 0))
+        self.assertIsNone(self.enrollment.completed_at)
+        self.assertEqual(self.counts(), {'total_enrolled': 1, 'assigned': 0, 'in_progress': 1, 'completed': 0})
+
+    def test_deleting_enrollment_keeps_counters_consistent(self):
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.required, status='completed')
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[0], status='completed')
+        self.assertEqual(self.refresh().status, 'completed')
+        self.enrollment.delete()
+        self.assertEqual(self.counts(), {'total_enrolled': 0, 'assigned': 0, 'in_progress': 0, 'completed': 0})
+
+    def test_deleting_units_recounts_enrollments(self):
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.required, status='completed')
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[0], status='completed')
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('completed', 50))
+        Unit.objects.filter(id__in=[self.required.id, self.optional[0].id]).delete()
+        self.assertEqual(
+            (self.refresh().status, self.enrollment.completed_units, self.enrollment.progress_percentage),
+            ('in_progress', 0, 0),
+        )
+        self.assertEqual(self.counts(), {'total_enrolled': 1, 'assigned': 0, 'in_progress': 1, 'completed': 0})
+
+    def test_adding_a_unit_recounts_enrollments(self):
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.required, status='completed')
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[0], status='completed')
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('completed', 50))
+        Unit.objects.create(course=self.course, module_type='text', title='New', sequence_order=9, is_mandatory=False)
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('in_progress', 40))
+        self.assertEqual(self.counts(), {'total_enrolled': 1, 'assigned': 0, 'in_progress': 1, 'completed': 0})
+
+    def test_changing_is_mandatory_recounts_enrollments(self):
+        for unit in (self.required, *self.optional[:2]):
+            UnitProgress.objects.create(enrollment=self.enrollment, unit=unit, status='completed')
+        self.assertEqual(self.refresh().status, 'completed')
+
+        unit = Unit.objects.get(pk=self.optional[2].pk)
+        unit.is_mandatory = True
+        unit.save()
+        self.assertEqual((self.refresh().status, self.enrollment.completed_mandatory_units), ('in_progress', 1))
+        self.assertEqual(self.counts()['completed'], 0)
+
+        # Saving other fields leaves the enrollments alone
+        unit.title = 'Renamed'
+        unit.save(update_fields=['title'])
+        self.assertEqual(self.refresh().status, 'in_progress')
+        self.optional[2].is_mandatory = False
+        self.optional[2].save()
+        self.assertEqual((self.refresh().status, self.enrollment.completed_mandatory_units), ('completed', 1))
+        self.assertEqual(self.counts()['completed'], 1)
+
+    def test_changes_lock_and_write_enrollments_in_one_batch(self):
+        others = []
+        for i in range(3):
+            learner = Profile.objects.create_user(username=f'other{i}', email=f'other{i}@example.com', password='password')
+            others.append(Enrollment.objects.create(course=self.course, user=learner))
+        UnitProgress.objects.create(enrollment=self.enrollment, unit=self.optional[0], status='in_progress')
+        changes = [
+            (enrollment.id, unit.id, None, 'completed')
+            for enrollment in others for unit in (self.required, self.optional[0])
+        ]
+        # Already started and nothing completed: the locking read skips it and nothing is written
+        changes.append((self.enrollment.id, self.optional[1].id, None, 'in_progress'))
+        with CaptureQueriesContext(connection) as ctx:
+            apply_progress_changes(changes)
+        reads = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('SELECT') and 'FROM "enrollments"' in query['sql']]
+        writes = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('UPDATE "enrollments"')]
+        self.assertEqual((len(reads), len(writes)), (1, 1))
+        self.assertIn('"started_at" IS NULL', reads[0])
+        self.assertNotIn(self.enrollment.id.hex, writes[0])
+        self.assertEqual(
+            {(e.status, e.completed_units, e.progress_percentage) for e in Enrollment.objects.filter(id__in=[e.id for e in others])},
+            {('completed', 2, 50)},
+        )
+        self.assertEqual(self.counts(), {'total_enrolled': 4, 'assigned': 0, 'in_progress': 1, 'completed': 3})
+
+    @override_settings(PROGRESS_HEARTBEAT_FLUSH_SECONDS=0)
+    def test_heartbeat_flush_updates_enrollment(self):
+        VideoUnit.objects.create(unit=self.required, required_watch_percentage=80)
+        heartbeat_buffer.add(self.enrollment.id, self.required.id, 40)
+        heartbeat_buffer.add(self.enrollment.id, self.optional[0].id, 100)
+        heartbeat_buffer.flush()
+        self.assertEqual((self.refresh().status, self.enrollment.completed_units), ('in_progress', 1))
+
+        heartbeat_buffer.add(self.enrollment.id, self.required.id, 85)
+        heartbeat_buffer.flush()
+        self.assertEqual((self.refresh().status, self.enrollment.progress_percentage), ('completed', 50))
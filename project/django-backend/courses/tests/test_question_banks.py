@@ -0,0 +1,79 @@
+import uuid
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.models import (
+    Profile, Course, Unit, Quiz, Question, Enrollment, QuizAttempt, QuestionBank, BankQuestion, QuizBankDraw,
+)
+from courses.question_banks import ID_WIDTH, bank_question_ids, draw_question_ids
+
+
+@override_settings(QUIZ_AUTOSAVE_FLUSH_SECONDS=0, LEADERBOARD_DEBOUNCE_SECONDS=0)
+class QuestionBankTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=unit, attempts_allowed=0)
+        self.fixed = Question.objects.create(quiz=self.quiz, type='true_false', text='Fixed', correct_answer=True)
+        self.bank = QuestionBank.objects.create(name='Bank', created_by=trainer)
+        BankQuestion.objects.bulk_create([
+            BankQuestion(
+                bank=self.bank, category='algebra' if i % 2 else 'geometry', type='multiple_choice',
+                text=f'B{i}', options=['x', 'y'], correct_answer='y',
+            )
+            for i in range(40)
+        ])
+        QuizBankDraw.objects.create(quiz=self.quiz, bank=self.bank, category='algebra', count=3, order=1)
+        QuizBankDraw.objects.create(quiz=self.quiz, bank=self.bank, count=2, order=2)
+        Enrollment.objects.create(course=course, user=self.learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learner)
+
+    def test_draws_come_from_cached_id_arrays(self):
+        draws = [[str(self.bank.id), 'algebra', 3], [str(self.bank.id), '', 2]]
+        self.assertEqual(len(bank_question_ids(self.bank.id, 'algebra')), 20 * ID_WIDTH)
+        with CaptureQueriesContext(connection) as ctx:
+            drawn = draw_question_ids(draws, seed=1)
+        self.assertEqual(len(ctx.captured_queries), 1)  # only the uncached whole-bank array
+        self.assertEqual(len(set(drawn)), 5)
+        algebra = set(BankQuestion.objects.filter(category='algebra').values_list('id', flat=True))
+        self.assertTrue(all(uuid.UUID(qid) in algebra for qid in drawn[:3]))
+        self.assertEqual(draw_question_ids(draws, seed=1), drawn)
+
+        # Changing the bank moves its version, so the arrays are rebuilt
+        BankQuestion.objects.create(bank=self.bank, category='algebra', type='true_false', text='New', correct_answer=False)
+        self.assertEqual(len(bank_question_ids(self.bank.id, 'algebra')), 21 * ID_WIDTH)
+
+    def test_session_delivers_and_grades_drawn_questions(self):
+        data = self.client.post(f'/api/quizzes/{self.quiz.id}/start/').json()
+        attempt = QuizAttempt.objects.get(id=data['attempt']['id'])
+        self.assertEqual(len(attempt.question_ids), 5)
+        delivered = {question['id']: question for question in data['quiz']['questions']}
+        self.assertEqual(set(delivered), {str(self.fixed.id), *attempt.question_ids})
+        self.assertNotIn('correct_answer', str(data['quiz']))
+
+        # A reload of the attempt shows the same questions
+        again = self.client.get(f'/api/quizzes/{self.quiz.id}/deliver/', {'attempt_id': str(attempt.id)}).json()
+        self.assertEqual(set(q['id'] for q in again['questions']), set(delivered))
+
+        answers = {str(self.fixed.id): True}
+        answers.update({qid: 1 for qid in attempt.question_ids[:4]})
+        result = self.client.post(f'/api/quiz-attempts/{attempt.id}/submit/', {'answers': answers}, format='json').json()
+        self.assertEqual((result['points_earned'], result['score']), (5, 83))
+
+    def test_bank_questions_are_trainer_only(self):
+        for url in ('/api/question-banks/', '/api/bank-questions/', '/api/quiz-bank-draws/'):
+            self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.post('/api/question-banks/', {'name': 'Mine'}, format='json').status_code, 403)
+        self.bank.created_by.primary_role = 'trainer'
+        self.bank.created_by.save()
+        self.client.force_authenticate(user=self.bank.created_by)
+        self.assertEqual(self.client.get('/api/bank-questions/', {'bank_id': str(self.bank.id)}).json()['count'], 40)
+        self.assertEqual(self.client.get('/api/question-banks/').json()['results'][0]['question_count'], 40)
+        self.assertEqual(self.client.get('/api/quiz-bank-draws/', {'quiz_id': str(self.quiz.id)}).json()['count'], 2)
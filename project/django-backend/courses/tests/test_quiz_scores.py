@@ -0,0 +1,48 @@
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from courses.models import Profile, Course, Unit, Quiz, QuizAttempt, QuizScore
+
+
+@override_settings(LEADERBOARD_DEBOUNCE_SECONDS=0)
+class QuizScoreRollupTest(TestCase):
+    def setUp(self):
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=unit)
+
+    def score(self):
+        row = QuizScore.objects.filter(user=self.learner, quiz=self.quiz).first()
+        if row is None:
+            return None
+        return (row.best_score, row.last_score, row.score_total, row.attempt_count, row.passed)
+
+    def test_rollup_follows_attempts(self):
+        first = QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, score=80, passed=True)
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, score=40)
+        # Sessions only count once submitted
+        session = QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, status='in_progress')
+        self.assertEqual(self.score(), (80, 40, 120, 2, True))
+
+        session.score = 60
+        session.status = 'submitted'
+        session.save()
+        self.assertEqual(self.score(), (80, 60, 180, 3, True))
+
+        # A lowered grade is recomputed from the attempts
+        first.score, first.passed = 50, False
+        first.save()
+        self.assertEqual(self.score(), (60, 60, 150, 3, False))
+
+        QuizAttempt.objects.filter(score__lt=60).delete()
+        self.assertEqual(self.score(), (60, 60, 60, 1, False))
+        QuizAttempt.objects.all().delete()
+        self.assertIsNone(self.score())
+
+    def test_rebuild_command(self):
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, score=70, passed=True)
+        QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, score=90, passed=True)
+        QuizScore.objects.all().delete()
+        call_command('rebuild_quiz_scores', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self.score(), (90, 90, 160, 2, True))
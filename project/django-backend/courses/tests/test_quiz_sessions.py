@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit, Quiz, Question, Enrollment, QuizAttempt, UnitProgress
+from courses.quiz_sessions import autosave_buffer
+
+
+@override_settings(QUIZ_AUTOSAVE_FLUSH_SECONDS=0, LEADERBOARD_DEBOUNCE_SECONDS=0)
+class QuizSessionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        autosave_buffer.drain()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.learner = Profile.objects.create_user(username='learner1', email='learner1@example.com', password='password')
+        course = Course.objects.create(title='A', created_by=trainer)
+        self.unit = Unit.objects.create(course=course, module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=self.unit, time_limit=10, attempts_allowed=2, passing_score=50)
+        self.q1 = Question.objects.create(quiz=self.quiz, type='multiple_choice', text='Q1', options=['a', 'b'], correct_answer='b', order=1)
+        self.q2 = Question.objects.create(quiz=self.quiz, type='true_false', text='Q2', correct_answer=True, order=2)
+        self.enrollment = Enrollment.objects.create(course=course, user=self.learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learner)
+
+    def start(self):
+        return self.client.post(f'/api/quizzes/{self.quiz.id}/start/')
+
+    def test_session_autosave_and_submit(self):
+        response = self.start()
+        self.assertEqual(response.status_code, 201)
+        attempt_id = response.json()['attempt']['id']
+        self.assertEqual(response.json()['attempt']['status'], 'in_progress')
+        self.assertNotIn('correct_answer', str(response.json()['quiz']))
+        # Starting again resumes the open session
+        self.assertEqual(self.start().json()['attempt']['id'], attempt_id)
+
+        url = f'/api/quiz-attempts/{attempt_id}/'
+        with CaptureQueriesContext(connection) as ctx:
+            for answer in ('a', 'b'):
+                self.assertEqual(self.client.post(url + 'autosave/', {'answers': {str(self.q1.id): answer}}, format='json').status_code, 202)
+        # Session owner and deadline come from the cache; nothing is written per autosave
+        self.assertFalse(any('quiz_attempts' in query['sql'] for query in ctx.captured_queries))
+        self.assertEqual(autosave_buffer.flush(), 1)
+        self.assertEqual(QuizAttempt.objects.get(id=attempt_id).answers, {str(self.q1.id): 'b'})
+
+        self.client.post(url + 'autosave/', {'answers': {str(self.q2.id): 'false'}}, format='json')
+        data = self.client.post(url + 'submit/', {'answers': {str(self.q2.id): True}}, format='json').json()
+        self.assertEqual((data['status'], data['score'], data['passed']), ('submitted', 100, True))
+        self.assertEqual(UnitProgress.objects.get(enrollment=self.enrollment, unit=self.unit).status, 'completed')
+        self.assertEqual(self.client.post(url + 'autosave/', {'answers': {}}, format='json').status_code, 404)
+
+    def test_attempt_limit_and_expiry(self):
+        first = self.start().json()['attempt']['id']
+        self.client.post(f'/api/quiz-attempts/{first}/submit/', format='json')
+        second = self.start().json()['attempt']['id']
+        self.assertEqual(QuizAttempt.objects.get(id=second).attempt_number, 2)
+        # Past the deadline the answers are refused and the session is swept
+        QuizAttempt.objects.filter(id=second).update(expires_at=timezone.now() - timedelta(minutes=5))
+        QuizAttempt.objects.filter(id=second).update(answers={str(self.q1.id): 'b'})
+        cache.clear()
+        autosave = self.client.post(f'/api/quiz-attempts/{second}/autosave/', {'answers': {str(self.q2.id): True}}, format='json')
+        self.assertEqual(autosave.status_code, 409)
+        self.assertEqual(self.start().status_code, 409)
+
+        attempt = QuizAttempt.objects.get(id=second)
+        self.assertEqual((attempt.status, attempt.score), ('submitted', 50))
+        self.assertEqual(attempt.completed_at, attempt.expires_at)
+
+    def test_sweeper_submits_expired_sessions_in_batches(self):
+        other = Profile.objects.create_user(username='learner2', email='learner2@example.com', password='password')
+        Enrollment.objects.create(course=self.unit.course, user=other)
+        expired = timezone.now() - timedelta(minutes=5)
+        for user in (self.learner, other):
+            QuizAttempt.objects.create(quiz=self.quiz, user=user, status='in_progress', expires_at=expired, answers={str(self.q2.id): True})
+        live = QuizAttempt.objects.create(quiz=self.quiz, user=self.learner, status='in_progress', expires_at=timezone.now() + timedelta(minutes=5))
+
+        call_command('sweep_quiz_attempts', batch_size=1, stdout=open('/dev/null', 'w'))
+        self.assertEqual(
+            sorted(QuizAttempt.objects.values_list('status', 'score')),
+            [('in_progress', 0), ('submitted', 50), ('submitted', 50)],
+        )
+        self.assertEqual(QuizAttempt.objects.get(id=live.id).status, 'in_progress')
+        self.assertEqual(UnitProgress.objects.filter(unit=self.unit, score=50).count(), 2)
+
+    def test_learners_cannot_bypass_sessions(self):
+        attempt_id = self.start().json()['attempt']['id']
+        url = f'/api/quiz-attempts/{attempt_id}/'
+        self.assertEqual(self.client.post(url + 'submit/', format='json').json()['score'], 0)
+        right = {str(self.q1.id): 'b', str(self.q2.id): True}
+        self.assertEqual(self.client.patch(url, {'answers': right}, format='json').status_code, 403)
+        self.assertEqual(QuizAttempt.objects.get(id=attempt_id).score, 0)
+        # Direct creates have no deadline, so timed quizzes refuse them
+        resp = self.client.post('/api/quiz-attempts/', {
+            'quiz': str(self.quiz.id), 'user': str(self.learner.id), 'answers': right,
+        }, format='json')
+        self.assertEqual(resp.status_code, 403)
+        self.assertEqual(QuizAttempt.objects.count(), 1)
+
+    def test_concurrent_starts_queue_on_the_enrollment(self):
+        lock = mock.patch.object(Enrollment.objects, 'select_for_update', wraps=Enrollment.objects.select_for_update)
+        with lock as select_for_update:
+            attempt_id = self.start().json()['attempt']['id']
+        select_for_update.assert_called_once_with()
+        # The second start runs after the first commits, so it finds and resumes that session
+        self.assertEqual(self.start().json()['attempt']['id'], attempt_id)
+        self.assertEqual(QuizAttempt.objects.filter(status='in_progress').count(), 1)
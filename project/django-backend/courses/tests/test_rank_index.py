@@ -0,0 +1,96 @@
+import random
+import uuid
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from courses.leaderboard import rebuild_leaderboards
+from courses.models import Profile, Course, Unit, Enrollment, UnitProgress, Team, TeamMember
+from courses.rank_index import GLOBAL, ScopeIndex, course_scope, rank_indexes
+
+
+class ScopeIndexTest(SimpleTestCase):
+    def test_matches_a_full_sort_after_random_updates(self):
+        rng = random.Random(7)
+        index = ScopeIndex()
+        points = {}
+        for _ in range(2000):
+            user_id = uuid.UUID(int=rng.randrange(300))
+            new = None if rng.random() < 0.1 else rng.randrange(40)
+            self.assertTrue(index.apply([(user_id, points.get(user_id), new)]))
+            if new is None:
+                points.pop(user_id, None)
+            else:
+                points[user_id] = new
+
+        ordered = sorted(points.items(), key=lambda item: (-item[1], item[0].bytes))
+        distinct = sorted(set(points.values()), reverse=True)
+        self.assertEqual(len(index), len(ordered))
+        self.assertEqual([entry['user_id'] for entry in index.top(20)], [str(u) for u, _ in ordered[:20]])
+        for position, (user_id, value) in enumerate(ordered, start=1):
+            entry = index.rank_of(user_id, value)
+            self.assertEqual((entry['position'], entry['rank']), (position, distinct.index(value) + 1))
+        user_id, value = ordered[50]
+        window = index.window(index.rank_of(user_id, value)['position'], 2, 3)
+        self.assertEqual([entry['user_id'] for entry in window], [str(u) for u, _ in ordered[48:54]])
+
+    def test_out_of_sync_change_is_reported(self):
+        index = ScopeIndex()
+        index.apply([(uuid.uuid4(), None, 5)])
+        self.assertFalse(index.apply([(uuid.uuid4(), 5, 6)]))
+
+
+@override_settings(LEADERBOARD_DEBOUNCE_SECONDS=0)
+class RankLookupTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        rank_indexes.clear()
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.course = Course.objects.create(title='A', created_by=trainer)
+        self.units = [Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=i) for i in range(4)]
+        self.learners = []
+        for i in range(5):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            enrollment = Enrollment.objects.create(course=self.course, user=learner)
+            for unit in self.units[:i % 4]:
+                UnitProgress.objects.create(enrollment=enrollment, unit=unit, status='completed')
+            self.learners.append(learner)
+        rebuild_leaderboards()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.learners[1])
+
+    def test_rank_action_serves_top_and_neighbours(self):
+        resp = self.client.get('/api/leaderboard/rank/', {'course_id': str(self.course.id), 'top': 2, 'before': 1, 'after': 1})
+        data = resp.json()
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(data['total'], 5)
+        self.assertEqual((data['me']['total_points'], data['me']['rank']), (10, 3))
+        self.assertEqual([entry['total_points'] for entry in data['top']], [30, 20])
+        self.assertEqual([entry['total_points'] for entry in data['around']], [20, 10, 0])
+
+    def test_index_follows_recomputes_and_team_changes(self):
+        index = rank_indexes.get(course_scope(self.course.id))
+        enrollment = Enrollment.objects.get(user=self.learners[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            for unit in self.units:
+                UnitProgress.objects.create(enrollment=enrollment, unit=unit, status='completed')
+            rebuild_leaderboards([self.course.id])
+        self.assertIs(rank_indexes.get(course_scope(self.course.id)), index)
+        self.assertEqual(index.rank_of(self.learners[0].id, 40)['rank'], 1)
+
+        team = Team.objects.create(team_name='Ops')
+        TeamMember.objects.create(team=team, user=self.learners[1])
+        data = self.client.get('/api/leaderboard/rank/', {'team_id': str(team.team_id)}).json()
+        self.assertEqual((data['total'], data['me']['rank']), (1, 1))
+        TeamMember.objects.create(team=team, user=self.learners[3])
+        data = self.client.get('/api/leaderboard/rank/', {'team_id': str(team.team_id)}).json()
+        self.assertEqual((data['total'], data['me']['rank']), (2, 2))
+
+    def test_load_streams_rows_in_index_order(self):
+        with mock.patch.object(ScopeIndex, '_resort') as resort, CaptureQueriesContext(connection) as ctx:
+            index = ScopeIndex.load(GLOBAL)
+        resort.assert_not_called()
+        self.assertIn('ORDER BY', ctx.captured_queries[-1]['sql'])
+        self.assertEqual([entry['total_points'] for entry in index.top(5)], [30, 20, 10, 0, 0])
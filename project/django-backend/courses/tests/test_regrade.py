@@ -0,0 +1,91 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.grading import grade_attempts
+from courses.jobs import run_job
+from courses.models import Profile, Course, Unit, Quiz, Question, Enrollment, UnitProgress, QuizAttempt, Leaderboard
+from courses.regrade import regrade_quiz
+
+
+class RegradeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer, passing_criteria=50)
+        self.unit = Unit.objects.create(course=self.course, module_type='test', title='Q', sequence_order=1, is_mandatory=True)
+        Unit.objects.create(course=self.course, module_type='text', title='T', sequence_order=2, is_mandatory=False)
+        self.quiz = Quiz.objects.create(unit=self.unit, passing_score=50)
+        # The key is wrong: 'Rome' is marked correct
+        self.question = Question.objects.create(
+            quiz=self.quiz, type='multiple_choice', text='Capital of France?', options=['Paris', 'Rome'], correct_answer='Rome',
+        )
+        self.learners = []
+        attempts = []
+        for i in range(7):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            Enrollment.objects.create(course=self.course, user=learner)
+            answer = 'Paris' if i < 5 else 'Rome'
+            attempts.append(QuizAttempt(quiz=self.quiz, user=learner, answers={str(self.question.id): answer}))
+            self.learners.append(learner)
+        QuizAttempt.objects.bulk_create(grade_attempts(attempts))
+
+    def fix_key(self):
+        self.question.correct_answer = 'Paris'
+        self.question.save()
+
+    def test_regrade_streams_chunks_and_updates_progress(self):
+        self.assertEqual(QuizAttempt.objects.filter(passed=True).count(), 2)
+        self.fix_key()
+        chunks = []
+        totals = regrade_quiz(self.quiz, chunk_size=3, on_chunk=lambda totals, last_id: chunks.append(dict(totals)))
+        self.assertEqual(totals, {'processed': 7, 'changed': 7})
+        self.assertEqual([chunk['processed'] for chunk in chunks], [3, 6, 7])
+        self.assertEqual(QuizAttempt.objects.filter(passed=True, score=100).count(), 5)
+
+        enrollment = Enrollment.objects.get(user=self.learners[0])
+        self.assertEqual((enrollment.status, enrollment.progress_percentage), ('completed', 50))
+        self.assertEqual(UnitProgress.objects.get(enrollment=enrollment).score, 100)
+        self.assertEqual(UnitProgress.objects.get(enrollment__user=self.learners[6]).status, 'in_progress')
+        self.assertEqual(Leaderboard.objects.get(course=self.course, user=self.learners[0]).rank, 1)
+
+        # Nothing changes on a second pass
+        self.assertEqual(regrade_quiz(self.quiz)['changed'], 0)
+
+    def test_regrade_endpoint_and_command(self):
+        self.fix_key()
+        client = APIClient()
+        client.force_authenticate(user=self.trainer)
+        resp = client.post(f'/api/quizzes/{self.quiz.id}/regrade/')
+        self.assertEqual(resp.status_code, 202)
+        run_job(resp.json()['job_id'])
+        job = client.get(f"/api/jobs/{resp.json()['job_id']}/").json()
+        self.assertEqual((job['status'], job['result']), ('completed', {'processed': 7, 'changed': 7}))
+
+        out = StringIO()
+        call_command('regrade_quiz', str(self.quiz.id), stdout=out)
+        self.assertIn('7 attempts, 0 changed', out.getvalue())
+
+        client.force_authenticate(user=self.learners[0])
+        self.assertEqual(client.post(f'/api/quizzes/{self.quiz.id}/regrade/').status_code, 403)
+
+    def test_failed_checkpoint_rolls_back_its_chunk(self):
+        self.fix_key()
+        checkpoints = []
+
+        def checkpoint(totals, last_id):
+            if checkpoints:
+                raise RuntimeError('worker died')
+            checkpoints.append(last_id)
+
+        with self.assertRaises(RuntimeError):
+            regrade_quiz(self.quiz, chunk_size=3, on_chunk=checkpoint)
+        # Only the checkpointed chunk was written; resuming after it regrades the rest once
+        regraded = [
+            (attempt.answers[str(self.question.id)] == 'Paris') == attempt.passed for attempt in QuizAttempt.objects.all()
+        ]
+        self.assertEqual(sum(regraded), 3)
+        self.assertEqual(regrade_quiz(self.quiz, after=checkpoints[0])['changed'], 4)
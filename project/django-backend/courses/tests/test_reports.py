@@ -0,0 +1,112 @@
+from datetime import timedelta
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit, Quiz, Enrollment, UnitProgress, QuizAttempt, Team, TeamMember
+
+
+class CourseReportTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        unit = Unit.objects.create(course=self.course, module_type='test', title='Q', sequence_order=1)
+        quiz = Quiz.objects.create(unit=unit)
+        self.team = Team.objects.create(team_name='Ops')
+        old = timezone.now() - timedelta(days=30)
+        rows = [('completed', 100, 90, None), ('in_progress', 50, 60, None), ('assigned', 0, None, old)]
+        for i, (status, progress, score, assigned_at) in enumerate(rows):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            Enrollment.objects.create(
+                course=self.course, user=learner, status=status, progress_percentage=progress,
+                assigned_at=assigned_at or timezone.now(),
+            )
+            if score is not None:
+                QuizAttempt.objects.create(quiz=quiz, user=learner, score=score)
+            if i == 0:
+                TeamMember.objects.create(team=self.team, user=learner)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+        self.url = f'/api/trainer/v1/course/{self.course.id}/report/'
+
+    def test_report_is_one_aggregate_query(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, 200)
+        # course lookup + the aggregate
+        self.assertEqual(len(ctx.captured_queries), 2)
+        data = resp.json()
+        self.assertEqual(
+            (data['total_enrollments'], data['assigned'], data['in_progress'], data['completed']), (3, 1, 1, 1)
+        )
+        self.assertEqual((data['average_progress'], data['average_score'], data['quiz_attempts']), (50, 75, 2))
+
+    def test_date_range_and_team_filters(self):
+        since = (timezone.now() - timedelta(days=7)).date().isoformat()
+        data = self.client.get(self.url, {'date_from': since}).json()
+        self.assertEqual((data['total_enrollments'], data['average_progress']), (2, 75))
+
+        data = self.client.get(self.url, {'team_id': str(self.team.team_id)}).json()
+        self.assertEqual((data['total_enrollments'], data['completed'], data['average_score']), (1, 1, 90))
+
+        self.assertEqual(self.client.get(self.url, {'date_to': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'team_id': 'nope'}).status_code, 400)
+
+
+class LearnerReportTest(TestCase):
+    def setUp(self):
+        self.manager = Profile.objects.create_user(username='manager1', email='manager1@example.com', password='password')
+        trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.team = Team.objects.create(team_name='Ops', manager=self.manager)
+        self.learners = []
+        for i in range(3):
+            learner = Profile.objects.create_user(username=f'learner{i}', email=f'learner{i}@example.com', password='password')
+            TeamMember.objects.create(team=self.team, user=learner)
+            self.learners.append(learner)
+        self.outsider = Profile.objects.create_user(username='outsider', email='outsider@example.com', password='password')
+        self.courses = [Course.objects.create(title=f'C{i}', created_by=trainer) for i in range(2)]
+        self.unit = Unit.objects.create(course=self.courses[0], module_type='test', title='Q', sequence_order=1)
+        self.quiz = Quiz.objects.create(unit=self.unit)
+        for learner in self.learners:
+            for course in self.courses:
+                Enrollment.objects.create(course=course, user=learner)
+        self.client = APIClient()
+
+    def test_activity_is_tracked_by_progress_and_attempts(self):
+        learner = self.learners[0]
+        enrollment = Enrollment.objects.get(user=learner, course=self.courses[0])
+        self.assertIsNone(enrollment.last_activity_at)
+        UnitProgress.objects.create(enrollment=enrollment, unit=self.unit, status='completed')
+        enrollment.refresh_from_db()
+        first = enrollment.last_activity_at
+        self.assertIsNotNone(first)
+
+        Enrollment.objects.filter(pk=enrollment.pk).update(last_activity_at=first - timedelta(hours=1))
+        QuizAttempt.objects.create(quiz=self.quiz, user=learner, score=80)
+        QuizAttempt.objects.create(quiz=self.quiz, user=learner, score=40)
+        enrollment.refresh_from_db()
+        self.assertGreaterEqual(enrollment.last_activity_at, first)
+
+        self.client.force_authenticate(user=learner)
+        data = self.client.get(f'/api/profiles/{learner.id}/report/').json()
+        self.assertEqual((data['courses_enrolled'], data['courses_completed']), (2, 1))
+        self.assertEqual((data['average_progress'], data['total_quiz_score']), (50, 120))
+        self.assertEqual(data['last_activity'], enrollment.last_activity_at.isoformat())
+
+    def test_team_report_in_one_call(self):
+        self.client.force_authenticate(user=self.manager)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get('/api/trainer/v1/team-report/', {'team_id': str(self.team.team_id)})
+        self.assertEqual(resp.status_code, 200)
+        # team lookup + one report query for the page
+        self.assertEqual(len(ctx.captured_queries), 2)
+        rows = resp.json()['results']
+        self.assertEqual([row['email'] for row in rows], [f'learner{i}@example.com' for i in range(3)])
+        self.assertTrue(all(row['courses_enrolled'] == 2 for row in rows))
+
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get('/api/trainer/v1/team-report/', {'team_id': str(self.team.team_id)}).status_code, 403)
+        self.assertEqual(self.client.get(f'/api/profiles/{self.learners[0].id}/report/').status_code, 403)
@@ -0,0 +1,45 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+from courses.models import Profile, Course, Unit, ModuleSequencing
+
+
+class SequenceRulesTest(TestCase):
+    def setUp(self):
+        self.trainer = Profile.objects.create_user(username='trainer1', email='trainer1@example.com', password='password')
+        self.trainer.primary_role = 'trainer'
+        self.trainer.save()
+        self.course = Course.objects.create(title='A', created_by=self.trainer)
+        self.units = [
+            Unit.objects.create(course=self.course, module_type='text', title=f'U{i}', sequence_order=i)
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.trainer)
+        self.url = f'/api/trainer/v1/course/{self.course.id}/sequence/'
+
+    def rule(self, module, preceding=None, **extra):
+        return {'module_id': str(module.id), 'preceding_module_id': str(preceding.id) if preceding else None, **extra}
+
+    def test_put_applies_only_the_diff(self):
+        u = self.units
+        resp = self.client.put(self.url, {'rules': [self.rule(u[1], u[0]), self.rule(u[2], u[1]), self.rule(u[3], u[2])]}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(resp.json()['created']), 3)
+        kept = ModuleSequencing.objects.get(module=u[1]).sequence_id
+
+        rules = [self.rule(u[1], u[0]), self.rule(u[2], u[0], drip_feed_delay_days=2)]
+        resp = self.client.put(self.url, {'rules': rules}, format='json')
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual((len(data['created']), len(data['updated']), len(data['deleted'])), (0, 1, 1))
+        self.assertEqual(ModuleSequencing.objects.get(module=u[1]).sequence_id, kept)
+        self.assertEqual(ModuleSequencing.objects.get(module=u[2]).drip_feed_delay_days, 2)
+        self.assertEqual(len(self.client.get(self.url).json()), 2)
+
+    def test_put_rejects_modules_from_other_courses_without_changes(self):
+        other = Course.objects.create(title='B', created_by=self.trainer)
+        foreign = Unit.objects.create(course=other, module_type='text', title='X', sequence_order=0)
+        ModuleSequencing.objects.create(course=self.course, module=self.units[1], preceding_module=self.units[0])
+        resp = self.client.put(self.url, {'rules': [self.rule(self.units[2], foreign)]}, format='json')
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(ModuleSequencing.objects.filter(course=self.course).count(), 1)
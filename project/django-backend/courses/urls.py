@@ -7,7 +7,8 @@ from .views import (
     PageUnitViewSet, QuizViewSet, QuestionViewSet, AssignmentViewSet,
     ScormPackageViewSet, SurveyViewSet, EnrollmentViewSet,
     UnitProgressViewSet, AssignmentSubmissionViewSet, QuizAttemptViewSet,
-    LeaderboardViewSet, MediaUploadViewSet, token_by_email, register
+    LeaderboardViewSet, BackgroundJobViewSet, MediaUploadViewSet, token_by_email, register,
+    QuestionBankViewSet, BankQuestionViewSet, QuizBankDrawViewSet
 )
 
 router = DefaultRouter()
@@ -21,6 +22,9 @@ router.register(r'text-units', TextUnitViewSet)
 router.register(r'page-units', PageUnitViewSet)
 router.register(r'quizzes', QuizViewSet)
 router.register(r'questions', QuestionViewSet)
+router.register(r'question-banks', QuestionBankViewSet)
+router.register(r'bank-questions', BankQuestionViewSet)
+router.register(r'quiz-bank-draws', QuizBankDrawViewSet)
 router.register(r'assignments', AssignmentViewSet)
 router.register(r'scorm-packages', ScormPackageViewSet)
 router.register(r'surveys', SurveyViewSet)
@@ -29,6 +33,7 @@ router.register(r'unit-progress', UnitProgressViewSet)
 router.register(r'assignment-submissions', AssignmentSubmissionViewSet)
 router.register(r'quiz-attempts', QuizAttemptViewSet)
 router.register(r'leaderboard', LeaderboardViewSet)
+router.register(r'jobs', BackgroundJobViewSet)
 router.register(r'media', MediaUploadViewSet, basename='media')
 
 # Trainer-specific alias routes (keeps frontend compatibility with /trainer/v1/* paths)
@@ -37,13 +42,21 @@ from django.urls import path
 trainer_urls = [
     # course list/create
     path('trainer/v1/course/', CourseViewSet.as_view({'get': 'list', 'post': 'create'}), name='trainer-course-list'),
+    path('trainer/v1/course/enrollment-stats/', CourseViewSet.as_view({'get': 'bulk_enrollment_stats'}), name='trainer-course-enrollment-stats'),
     # course detail + actions
     path('trainer/v1/course/<uuid:pk>/', CourseViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='trainer-course-detail'),
     path('trainer/v1/course/<uuid:pk>/publish/', CourseViewSet.as_view({'post': 'publish'}), name='trainer-course-publish'),
     path('trainer/v1/course/<uuid:pk>/duplicate/', CourseViewSet.as_view({'post': 'duplicate'}), name='trainer-course-duplicate'),
     path('trainer/v1/course/<uuid:pk>/sequence/', CourseViewSet.as_view({'get': 'sequence', 'put': 'sequence'}), name='trainer-course-sequence'),
     path('trainer/v1/course/<uuid:pk>/assign/', CourseViewSet.as_view({'post': 'assign'}), name='trainer-course-assign'),
+    path('trainer/v1/course/<uuid:pk>/assignable_learners/', CourseViewSet.as_view({'get': 'assignable_learners'}), name='trainer-course-assignable-learners'),
+    path('trainer/v1/course/<uuid:pk>/report/', CourseViewSet.as_view({'get': 'report'}), name='trainer-course-report'),
     path('trainer/v1/course/<uuid:pk>/modules/', CourseViewSet.as_view({'get': 'units'}), name='trainer-course-modules'),
+    path('trainer/v1/learner/<uuid:pk>/report/', ProfileViewSet.as_view({'get': 'report'}), name='trainer-learner-report'),
+    path('trainer/v1/team-report/', ProfileViewSet.as_view({'get': 'team_report'}), name='trainer-team-report'),
+    path('trainer/v1/jobs/<uuid:pk>/', BackgroundJobViewSet.as_view({'get': 'retrieve'}), name='trainer-job-detail'),
+    path('trainer/v1/course/<uuid:pk>/modules/reorder/', CourseViewSet.as_view({'post': 'reorder'}), name='trainer-course-modules-reorder'),
+    path('trainer/module/<uuid:pk>/move/', UnitViewSet.as_view({'post': 'move'}), name='trainer-module-move'),
     # module-level preview
     path('trainer/module/<uuid:pk>/content/preview/', UnitViewSet.as_view({'post': 'preview_content'}), name='trainer-module-preview'),
 ]
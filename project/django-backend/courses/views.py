@@ -1,20 +1,51 @@
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.authtoken.models import Token
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, OuterRef, Q
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 import os
+import uuid
 
 from .models import (
     Profile, Course, Unit, VideoUnit, AudioUnit, PresentationUnit,
     TextUnit, PageUnit, Quiz, Question, Assignment, ScormPackage,
     Survey, Enrollment, UnitProgress, AssignmentSubmission,
-    QuizAttempt, Leaderboard, MediaMetadata, Team, TeamMember
+    QuizAttempt, Leaderboard, MediaMetadata, Team, TeamMember, BackgroundJob,
+    ModuleSequencing, QuestionBank, BankQuestion, QuizBankDraw
 )
+from .assignment import assign_course
+from .duplication import duplicate_course
+from .jobs import enqueue_job
+from .question_banks import attempt_answer_key, attempt_payload
+from .quiz_sessions import (
+    AttemptsExhausted, accepts_answers, allocate_attempt, attempts_used, autosave_buffer, open_session,
+    start_attempt, submit_attempt,
+)
+from .permissions import IsTrainer
+from .pagination import (
+    EnrollmentPagination, UnitProgressPagination, QuizAttemptPagination,
+    AssignmentSubmissionPagination, LearnerPagination, LeaderboardPagination
+)
+from .delivery import delivery_payload, delivery_seed, render
+from .grading import GRADED_FIELDS, grade
+from .heartbeats import authorize_heartbeats, heartbeat_buffer
+from .item_analysis import REPORT_CACHE_SECONDS, analyse_quiz, report_cache_key, report_job, runs_in_background
+from .leaderboard import rebuild_leaderboards, recompute_global, team_standings
+from .rank_index import GLOBAL, course_scope, rank_indexes, team_scope
+from .loaders import prefetch_course_tree, prefetch_unit_details
+from .counters import read_counters
+from .module_order import reorder_modules, move_module, allocate_sequence_order, reserve_sequence_order
+from .reports import course_report, learner_report_data, learner_reports, parse_report_bound
+from .sequencing import replace_sequencing_rules
+from .stats import total_learners
 from .serializers import (
     ProfileSerializer, CourseSerializer, CourseDetailSerializer,
     UnitSerializer, VideoUnitSerializer, AudioUnitSerializer,
@@ -22,7 +53,8 @@ from .serializers import (
     QuizSerializer, QuestionSerializer, AssignmentSerializer,
     ScormPackageSerializer, SurveySerializer, EnrollmentSerializer,
     UnitProgressSerializer, AssignmentSubmissionSerializer,
-    QuizAttemptSerializer, LeaderboardSerializer, MediaMetadataSerializer
+    QuizAttemptSerializer, LeaderboardSerializer, MediaMetadataSerializer,
+    BackgroundJobSerializer, QuestionBankSerializer, BankQuestionSerializer, QuizBankDrawSerializer
 )
 
 
@@ -99,6 +131,40 @@ class ProfileViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """Learner report: courses enrolled/completed, average progress, quiz score total, last activity."""
+        user = request.user
+        profile = self.get_object()
+        allowed = (
+            user.pk == profile.pk or user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'
+            or TeamMember.objects.filter(user=profile, team__manager=user).exists()
+        )
+        if not allowed:
+            return Response({'detail': 'Not allowed to view this report'}, status=403)
+        return Response(learner_report_data(learner_reports(Profile.objects.filter(pk=profile.pk)).get()))
+
+    @action(detail=False, methods=['get'], url_path='team-report')
+    def team_report(self, request):
+        """Learner reports for every member of ?team_id=, cursor-paginated by email."""
+        user = request.user
+        team_id = request.query_params.get('team_id')
+        if not team_id:
+            return Response({'error': 'team_id is required'}, status=400)
+        try:
+            team = Team.objects.filter(team_id=team_id).first()
+        except ValidationError:
+            return Response({'error': 'team_id must be a UUID'}, status=400)
+        if team is None:
+            return Response({'error': 'Team not found'}, status=404)
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer' or team.manager_id == user.pk):
+            return Response({'detail': 'Team manager permission required'}, status=403)
+
+        members = TeamMember.objects.filter(team=team, user=OuterRef('pk'))
+        paginator = LearnerPagination()
+        page = paginator.paginate_queryset(learner_reports(Profile.objects.filter(Exists(members))), request, view=self)
+        return paginator.get_paginated_response([learner_report_data(row) for row in page])
+
 
 class CourseViewSet(viewsets.ModelViewSet):
     queryset = Course.objects.all()
@@ -109,21 +175,37 @@ class CourseViewSet(viewsets.ModelViewSet):
             return CourseDetailSerializer
         return CourseSerializer
 
-    def get_queryset(self):
+    def _visible_courses(self):
         user = self.request.user
         # align with Profile.primary_role mapping
         if getattr(user, 'primary_role', '') == 'trainer':
             return Course.objects.filter(created_by=user)
         return Course.objects.filter(enrollments__user=user)
 
+    def get_queryset(self):
+        queryset = self._visible_courses()
+        # Join the creator and count units in the main query so that serializing a page
+        # costs a fixed number of queries regardless of how many courses it contains.
+        # Meta.ordering is not applied to GROUP BY queries, so repeat it for stable pagination.
+        return (
+            queryset.select_related('created_by', 'enrollment_counter')
+            .annotate(units_count=Count('units', distinct=True))
+            .order_by('-created_at')
+        )
+
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        course = prefetch_course_tree(self.get_object())
+        serializer = self.get_serializer(course)
+        return Response(serializer.data)
+
     @action(detail=True, methods=['get'])
     def units(self, request, pk=None):
         course = self.get_object()
-        units = course.units.all()
-        serializer = UnitSerializer(units, many=True)
+        units = prefetch_unit_details(course.units.all())
+        serializer = UnitSerializer(units, many=True, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -142,51 +224,14 @@ class CourseViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'Trainer permission required'}, status=403)
 
         orig = self.get_object()
-        # shallow clone course fields
-        dup = Course.objects.create(
-            title=f"{orig.title} (copy)",
-            description=orig.description,
-            about=orig.about,
-            outcomes=orig.outcomes,
-            course_type=orig.course_type,
-            status='draft',
-            is_mandatory=orig.is_mandatory,
-            estimated_duration_hours=orig.estimated_duration_hours,
-            passing_criteria=orig.passing_criteria,
-            created_by=user
-        )
-        # clone units and their subtype data
-        for unit in orig.units.all():
-            new_unit = Unit.objects.create(
-                course=dup,
-                module_type=unit.module_type,
-                title=unit.title,
-                description=unit.description,
-                sequence_order=unit.sequence_order,
-                is_mandatory=unit.is_mandatory,
-                estimated_duration_minutes=unit.estimated_duration_minutes,
-                video_count=unit.video_count,
-                has_quizzes=unit.has_quizzes
-            )
-            # clone subtype data where available; be defensive if subtype tables are missing
-            try:
-                if hasattr(unit, 'quiz_details') and unit.quiz_details:
-                    quiz = unit.quiz_details
-                    new_quiz = Quiz.objects.create(unit=new_unit, time_limit=quiz.time_limit, passing_score=quiz.passing_score, attempts_allowed=quiz.attempts_allowed, show_answers=quiz.show_answers, randomize_questions=quiz.randomize_questions, mandatory_completion=quiz.mandatory_completion)
-                    for q in quiz.questions.all():
-                        Question.objects.create(quiz=new_quiz, type=q.type, text=q.text, options=q.options, correct_answer=q.correct_answer, points=q.points, order=q.order)
-            except Exception:
-                # If related subtype tables are absent (e.g., quizzes table missing), skip cloning subtype data.
-                continue
-        # Attempt to return a full detail representation; if nested subtype tables are
-        # missing, fall back to a minimal CourseSerializer to avoid raising a 500.
-        try:
-            serializer = CourseDetailSerializer(dup, context={'request': request})
-            return Response(serializer.data)
-        except Exception:
-            # Fall back to a lightweight representation
-            serializer = CourseSerializer(dup, context={'request': request})
-            return Response(serializer.data)
+        # Large courses can be copied by a background job; poll /jobs/<job_id>/ for the new course id
+        if str(request.data.get('async', '')).lower() in ('1', 'true'):
+            job = enqueue_job('duplicate_course', {'course_id': str(orig.id), 'user_id': str(user.id)}, user=user)
+            return Response({'job_id': str(job.id), 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+        dup = prefetch_course_tree(duplicate_course(orig, user))
+        serializer = CourseDetailSerializer(dup, context={'request': request})
+        return Response(serializer.data)
 
     @action(detail=True, methods=['get', 'put'], permission_classes=[permissions.IsAuthenticated])
     def sequence(self, request, pk=None):
@@ -210,23 +255,38 @@ class CourseViewSet(viewsets.ModelViewSet):
                 })
             return Response(data)
 
-        # PUT: replace sequencing rules atomically
-        rules = request.data.get('rules', [])
-        # basic validation
-        ModuleSequencing.objects.filter(course=course).delete()
-        created = []
-        for r in rules:
-            module = Unit.objects.get(id=r['module_id'])
-            preceding = None
-            if r.get('preceding_module_id'):
-                preceding = Unit.objects.get(id=r['preceding_module_id'])
-            ms = ModuleSequencing.objects.create(course=course, module=module, preceding_module=preceding, drip_feed_rule=r.get('drip_feed_rule','none'), drip_feed_delay_days=r.get('drip_feed_delay_days',0), prerequisite_completed=r.get('prerequisite_completed', False))
-            created.append(str(ms.sequence_id))
-        return Response({'created': created})
+        # PUT: replace sequencing rules atomically, writing only what changed
+        rules = request.data.get('rules', []) or []
+        try:
+            changes = replace_sequencing_rules(course, rules)
+        except ValidationError as exc:
+            return Response({'error': ' '.join(exc.messages)}, status=400)
+        return Response(changes)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def reorder(self, request, pk=None):
+        """Reorder all modules of a course. Input: {"module_ids": [<id>, ...]} in the new order."""
+        user = request.user
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+
+        course = self.get_object()
+        module_ids = request.data.get('module_ids')
+        if not isinstance(module_ids, list):
+            return Response({'error': 'module_ids must be a list'}, status=400)
+        try:
+            positions = reorder_modules(course, module_ids)
+        except ValidationError as exc:
+            return Response({'error': ' '.join(exc.messages)}, status=400)
+        return Response([{'id': str(module_id), 'sequence_order': seq} for module_id, seq in positions.items()])
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def assign(self, request, pk=None):
-        """Assign course to list of users or teams. Input: {"user_ids":[], "team_ids":[]}"""
+        """Assign course to list of users or teams. Input: {"user_ids":[], "team_ids":[], "async": false}
+
+        With "async": true the assignment runs as a background job; the response carries the
+        job id and /jobs/<job_id>/ reports processed/created/skipped counts while it runs.
+        """
         user = request.user
         if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'):
             return Response({'detail': 'Trainer permission required'}, status=403)
@@ -234,50 +294,96 @@ class CourseViewSet(viewsets.ModelViewSet):
         course = self.get_object()
         user_ids = request.data.get('user_ids', []) or []
         team_ids = request.data.get('team_ids', []) or []
-        created = 0
-        # assign explicit users
-        for uid in user_ids:
-            try:
-                u = Profile.objects.get(id=uid)
-                if not Enrollment.objects.filter(course=course, user=u).exists():
-                    Enrollment.objects.create(course=course, user=u, assigned_by=user, status='assigned')
-                    created += 1
-            except Profile.DoesNotExist:
-                continue
-        # assign team members
-        for tid in team_ids:
-            members = TeamMember.objects.filter(team_id=tid).values_list('user_id', flat=True)
-            for uid in members:
-                try:
-                    u = Profile.objects.get(id=uid)
-                    if not Enrollment.objects.filter(course=course, user=u).exists():
-                        Enrollment.objects.create(course=course, user=u, assigned_by=user, status='assigned')
-                        created += 1
-                except Profile.DoesNotExist:
-                    continue
+        if str(request.data.get('async', '')).lower() in ('1', 'true'):
+            payload = {
+                'course_id': str(course.id),
+                'assigned_by_id': str(user.id),
+                'user_ids': [str(uid) for uid in user_ids],
+                'team_ids': [str(tid) for tid in team_ids],
+            }
+            job = enqueue_job('assign_course', payload, user=user)
+            return Response({'job_id': str(job.id), 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+        created = assign_course(course, user, user_ids=user_ids, team_ids=team_ids)
         return Response({'created': created})
+
     @action(detail=True, methods=['get'])
     def assignable_learners(self, request, pk=None):
+        """Trainees not enrolled in the course, one cursor page at a time.
+
+        Query params: search (prefix of email, first or last name; "first last" matches both),
+        team_id, page_size, cursor.
+        """
         course = self.get_object()
-        enrolled_user_ids = Enrollment.objects.filter(course=course).values_list('user_id', flat=True)
         # Use `primary_role` (actual field on Profile) — return trainees who are not already enrolled
-        learners = Profile.objects.filter(primary_role='trainee').exclude(id__in=enrolled_user_ids)
-        serializer = ProfileSerializer(learners, many=True)
-        return Response(serializer.data)
+        enrolled = Enrollment.objects.filter(course=course, user=OuterRef('pk'))
+        learners = Profile.objects.filter(primary_role='trainee').filter(~Exists(enrolled))
+
+        search = request.query_params.get('search', '').strip()
+        if search:
+            parts = search.split(None, 1)
+            if len(parts) == 2:
+                learners = learners.filter(first_name__istartswith=parts[0], last_name__istartswith=parts[1])
+            else:
+                learners = learners.filter(
+                    Q(email__istartswith=search) | Q(first_name__istartswith=search) | Q(last_name__istartswith=search)
+                )
+
+        team_id = request.query_params.get('team_id')
+        if team_id:
+            try:
+                members = TeamMember.objects.filter(team_id=team_id, user=OuterRef('pk'))
+            except ValidationError:
+                return Response({'error': 'team_id must be a UUID'}, status=400)
+            learners = learners.filter(Exists(members))
+
+        paginator = LearnerPagination()
+        page = paginator.paginate_queryset(learners, request, view=self)
+        serializer = ProfileSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @action(detail=True, methods=['get'])
     def enrollment_stats(self, request, pk=None):
         course = self.get_object()
-        enrollments = Enrollment.objects.filter(course=course)
-        total_learners = Profile.objects.filter(primary_role='trainee').count()
+        stats = read_counters([course.id])[str(course.id)]
+        return Response({**stats, 'total_learners': total_learners()})
+
+    @action(detail=False, methods=['get'], url_path='enrollment-stats')
+    def bulk_enrollment_stats(self, request):
+        """Enrollment stats for many courses in one call: ?course_ids=<id>,<id>,...
+
+        Without course_ids, stats for every course visible to the user are returned.
+        """
+        course_ids = self._visible_courses().values_list('id', flat=True)
+        requested = [cid for cid in request.query_params.get('course_ids', '').split(',') if cid]
+        if requested:
+            try:
+                course_ids = course_ids.filter(id__in=requested)
+            except ValidationError:
+                return Response({'error': 'course_ids must be a comma-separated list of UUIDs'}, status=400)
         return Response({
-            'total_enrolled': enrollments.count(),
-            'total_learners': total_learners,
-            'completed': enrollments.filter(status='completed').count(),
-            'in_progress': enrollments.filter(status='in_progress').count(),
-            'assigned': enrollments.filter(status='assigned').count()
+            'total_learners': total_learners(),
+            'courses': read_counters(list(course_ids)),
         })
 
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """Aggregated course report. Query params: date_from, date_to (YYYY-MM-DD or ISO), team_id."""
+        user = request.user
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+        course = self.get_object()
+        params = request.query_params
+        try:
+            report = course_report(
+                course,
+                date_from=parse_report_bound(params.get('date_from'), 'date_from'),
+                date_to=parse_report_bound(params.get('date_to'), 'date_to', end=True),
+                team_id=params.get('team_id') or None,
+            )
+        except ValidationError as exc:
+            return Response({'error': ' '.join(exc.messages)}, status=400)
+        return Response(report)
+
 
 class UnitViewSet(viewsets.ModelViewSet):
     queryset = Unit.objects.all()
@@ -294,31 +400,29 @@ class UnitViewSet(viewsets.ModelViewSet):
         """Override create to auto-assign sequence_order and handle errors gracefully."""
         data = request.data.copy()
         course_id = data.get('course') or data.get('course_id')
-        
-        # Auto-assign sequence_order if not provided
-        if data.get('sequence_order') is None and data.get('order') is None:
-            if not course_id:
-                return Response({'course': 'course is required'}, status=400)
-            try:
-                from django.db.models import Max
-                result = Unit.objects.filter(course_id=course_id).aggregate(Max('sequence_order'))
-                max_seq = result.get('sequence_order__max')
-                next_seq = (max_seq if max_seq is not None else -1) + 1
-                data['sequence_order'] = next_seq
-            except Exception as e:
-                return Response({'detail': f'Error calculating sequence order: {str(e)}'}, status=400)
+        if course_id:
+            data['course'] = course_id
 
         serializer = self.get_serializer(data=data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=400)
-        
+
+        # Auto-assign sequence_order if not provided: the per-course allocator hands out the
+        # next position atomically, so concurrent creates in one course cannot collide.
+        explicit_seq = serializer.validated_data.get('sequence_order')
+        extra = {}
+        if explicit_seq is None:
+            extra['sequence_order'] = allocate_sequence_order(serializer.validated_data['course'].pk)
+
         try:
-            unit = serializer.save()
+            unit = serializer.save(**extra)
         except Exception as exc:
             from django.db import IntegrityError
             if isinstance(exc, IntegrityError):
                 return Response({'detail': 'Sequence order conflict - this position is already used'}, status=400)
             return Response({'detail': str(exc)}, status=500)
+        if explicit_seq is not None:
+            reserve_sequence_order(unit.course_id, explicit_seq)
 
         resp = {
             'id': str(unit.id),
@@ -332,6 +436,29 @@ class UnitViewSet(viewsets.ModelViewSet):
         }
         return Response(resp, status=201)
 
+    @transaction.atomic
+    def perform_update(self, serializer):
+        unit = serializer.instance
+        previous = (unit.course_id, unit.sequence_order)
+        unit = serializer.save()
+        # Like an explicit position on create: keep the allocator past it so later creates cannot collide
+        if (unit.course_id, unit.sequence_order) != previous and unit.sequence_order is not None:
+            reserve_sequence_order(unit.course_id, unit.sequence_order)
+
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def move(self, request, pk=None):
+        """Move a module right after another one. Input: {"after_id": <module id or null for first>}"""
+        user = request.user
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+
+        unit = self.get_object()
+        try:
+            position = move_module(unit, request.data.get('after_id'))
+        except ValidationError as exc:
+            return Response({'error': ' '.join(exc.messages)}, status=400)
+        return Response({'id': str(unit.id), 'sequence_order': position})
+
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
     def preview_content(self, request, pk=None):
         """Basic validation endpoint for module content preview (trainer-only)."""
@@ -389,6 +516,84 @@ class QuizViewSet(viewsets.ModelViewSet):
     serializer_class = QuizSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    @action(detail=True, methods=['get'])
+    def deliver(self, request, pk=None):
+        """Answer-free quiz for taking it, ordered for ?attempt_id= (or the learner) from a stable seed."""
+        user = request.user
+        payload = delivery_payload(pk)
+        if payload is None:
+            return Response({'detail': 'Not found.'}, status=404)
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'
+                or Enrollment.objects.filter(user=user, course_id=payload['course_id']).exists()):
+            return Response({'detail': 'Not enrolled in this course'}, status=403)
+        attempt_id = request.query_params.get('attempt_id')
+        if attempt_id and payload['bank_draws']:
+            try:
+                question_ids = QuizAttempt.objects.filter(pk=attempt_id, quiz_id=pk, user=user).values_list('question_ids', flat=True).first()
+            except ValidationError:
+                question_ids = None
+            payload = attempt_payload(payload, question_ids)
+        return Response(render(payload, delivery_seed(pk, user.pk, attempt_id)))
+
+    @action(detail=True, methods=['post'])
+    def start(self, request, pk=None):
+        """Start (or resume) a quiz session: the attempt plus the quiz ordered for it.
+
+        Enforces attempts_allowed and sets expires_at from time_limit; autosave to
+        /quiz-attempts/<id>/autosave/ and finish with /quiz-attempts/<id>/submit/.
+        """
+        user = request.user
+        payload = delivery_payload(pk)
+        if payload is None:
+            return Response({'detail': 'Not found.'}, status=404)
+        if not Enrollment.objects.filter(user=user, course_id=payload['course_id']).exists():
+            return Response({'detail': 'Not enrolled in this course'}, status=403)
+        quiz = Quiz.objects.select_related('unit').get(pk=pk)
+        try:
+            attempt = start_attempt(user, quiz)
+        except AttemptsExhausted:
+            return Response({'error': 'No attempts left for this quiz'}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'attempt': QuizAttemptSerializer(attempt).data,
+            'attempts_used': attempts_used(user.pk, quiz.pk),
+            'quiz': render(attempt_payload(payload, attempt.question_ids), delivery_seed(pk, user.pk, attempt.pk)),
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def regrade(self, request, pk=None):
+        """Re-score every attempt against the current answer key as a background job; poll /jobs/<job_id>/."""
+        user = request.user
+        quiz = self.get_object()
+        if not (user.is_superuser or (getattr(user, 'primary_role', '') == 'trainer' and quiz.unit.course.created_by_id == user.pk)):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+        job = enqueue_job('regrade_quiz', {'quiz_id': str(quiz.id)}, user=user)
+        return Response({'job_id': str(job.id), 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'], url_path='item-analysis')
+    def item_analysis(self, request, pk=None):
+        """Difficulty, discrimination, option frequencies and answer times per question.
+
+        Cached for ten minutes; pass ?refresh=true to recompute. Large quizzes are analysed
+        by a background job: the response is then 202 with the job, and once it completes
+        this endpoint (or /jobs/<job_id>/ as its result) returns the report.
+        """
+        user = request.user
+        quiz = self.get_object()
+        if not (user.is_superuser or (getattr(user, 'primary_role', '') == 'trainer' and quiz.unit.course.created_by_id == user.pk)):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+        refresh = request.query_params.get('refresh') == 'true'
+        report = None if refresh else cache.get(report_cache_key(quiz.pk))
+        if report is None:
+            if runs_in_background(quiz.pk):
+                job = report_job(quiz.pk, user=user, refresh=refresh)
+                if job.status != 'completed':
+                    return Response({'job_id': str(job.id), 'status': job.status}, status=status.HTTP_202_ACCEPTED)
+                report = job.result
+            else:
+                report = analyse_quiz(quiz.pk)
+                cache.set(report_cache_key(quiz.pk), report, REPORT_CACHE_SECONDS)
+        return Response(report)
+
 
 class QuestionViewSet(viewsets.ModelViewSet):
     queryset = Question.objects.all()
@@ -402,6 +607,55 @@ class QuestionViewSet(viewsets.ModelViewSet):
         return Question.objects.all()
 
 
+class QuestionBankViewSet(viewsets.ModelViewSet):
+    queryset = QuestionBank.objects.all()
+    serializer_class = QuestionBankSerializer
+    permission_classes = [IsTrainer]
+
+    def get_queryset(self):
+        return QuestionBank.objects.annotate(question_count=Count('questions')).order_by('name', 'id')
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def categories(self, request, pk=None):
+        """Categories of the bank with their question counts, for building draw rules."""
+        bank = self.get_object()
+        rows = bank.questions.values('category').annotate(count=Count('id')).order_by('category')
+        return Response(list(rows))
+
+
+class BankQuestionViewSet(viewsets.ModelViewSet):
+    queryset = BankQuestion.objects.all()
+    serializer_class = BankQuestionSerializer
+    # Bank questions carry their correct answers; learners receive them through delivery only
+    permission_classes = [IsTrainer]
+
+    def get_queryset(self):
+        queryset = BankQuestion.objects.order_by('created_at', 'id')
+        bank_id = self.request.query_params.get('bank_id')
+        if bank_id:
+            queryset = queryset.filter(bank_id=bank_id)
+        category = self.request.query_params.get('category')
+        if category:
+            queryset = queryset.filter(category=category)
+        return queryset
+
+
+class QuizBankDrawViewSet(viewsets.ModelViewSet):
+    queryset = QuizBankDraw.objects.all()
+    serializer_class = QuizBankDrawSerializer
+    # Draw rules name the banks and categories a quiz pulls from; learners only see the drawn questions
+    permission_classes = [IsTrainer]
+
+    def get_queryset(self):
+        quiz_id = self.request.query_params.get('quiz_id')
+        if quiz_id:
+            return QuizBankDraw.objects.filter(quiz_id=quiz_id)
+        return QuizBankDraw.objects.all()
+
+
 class AssignmentViewSet(viewsets.ModelViewSet):
     queryset = Assignment.objects.all()
     serializer_class = AssignmentSerializer
@@ -424,6 +678,7 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = EnrollmentPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -463,26 +718,11 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        enrollments = []
-        for user_id in user_ids:
-            try:
-                user = Profile.objects.get(id=user_id)
-                if not Enrollment.objects.filter(course=course, user=user).exists():
-                    enrollments.append(Enrollment(
-                        course=course,
-                        user=user,
-                        assigned_by=request.user,
-                        status='assigned'
-                    ))
-            except Profile.DoesNotExist:
-                continue
-
-        if enrollments:
-            Enrollment.objects.bulk_create(enrollments)
+        created = assign_course(course, request.user, user_ids=user_ids)
 
         return Response({
-            'created': len(enrollments),
-            'message': f'{len(enrollments)} learners enrolled successfully'
+            'created': created,
+            'message': f'{created} learners enrolled successfully'
         })
 
 
@@ -490,12 +730,42 @@ class UnitProgressViewSet(viewsets.ModelViewSet):
     queryset = UnitProgress.objects.all()
     serializer_class = UnitProgressSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = UnitProgressPagination
+
+    @action(detail=False, methods=['post'])
+    def heartbeat(self, request):
+        """Buffer player progress reports; they are written to unit_progress in periodic batches.
+
+        Input: {"enrollment_id", "unit_id", "watch_percentage"} or {"heartbeats": [<same>, ...]}
+        """
+        items = request.data.get('heartbeats')
+        if items is None:
+            items = [request.data]
+        if not isinstance(items, list):
+            return Response({'error': 'heartbeats must be a list'}, status=400)
+
+        reports = {}
+        for item in items:
+            try:
+                key = (uuid.UUID(str(item['enrollment_id'])), uuid.UUID(str(item['unit_id'])))
+                watch_percentage = int(item['watch_percentage'])
+            except (KeyError, TypeError, ValueError):
+                return Response({'error': 'each heartbeat needs enrollment_id, unit_id and watch_percentage'}, status=400)
+            if not 0 <= watch_percentage <= 100:
+                return Response({'error': 'watch_percentage must be between 0 and 100'}, status=400)
+            reports[key] = max(watch_percentage, reports.get(key, 0))
+
+        allowed = authorize_heartbeats(request.user, list(reports))
+        for enrollment_id, unit_id in allowed:
+            heartbeat_buffer.add(enrollment_id, unit_id, reports[(enrollment_id, unit_id)])
+        return Response({'buffered': len(allowed), 'rejected': len(reports) - len(allowed)}, status=status.HTTP_202_ACCEPTED)
 
 
 class AssignmentSubmissionViewSet(viewsets.ModelViewSet):
     queryset = AssignmentSubmission.objects.all()
     serializer_class = AssignmentSubmissionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AssignmentSubmissionPagination
     parser_classes = [MultiPartParser, FormParser]
 
     def get_queryset(self):
@@ -519,6 +789,7 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
     queryset = QuizAttempt.objects.all()
     serializer_class = QuizAttemptSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = QuizAttemptPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -526,19 +797,178 @@ class QuizAttemptViewSet(viewsets.ModelViewSet):
             return QuizAttempt.objects.filter(user=user)
         return QuizAttempt.objects.all()
 
+    def _graded_fields(self, serializer):
+        quiz = serializer.validated_data.get('quiz') or serializer.instance.quiz
+        answers = serializer.validated_data.get('answers', serializer.instance.answers if serializer.instance else {})
+        question_ids = serializer.instance.question_ids if serializer.instance else None
+        result = grade(attempt_answer_key(quiz.pk, question_ids), answers)
+        return {field: result[field] for field in GRADED_FIELDS}
+
+    def _is_trainer(self):
+        user = self.request.user
+        return user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'
+
+    # Atomic so the attempt counter and the score rollup move with the attempt
+    @transaction.atomic
+    def perform_create(self, serializer):
+        quiz = serializer.validated_data['quiz']
+        if not self._is_trainer():
+            if serializer.validated_data['user'].pk != self.request.user.pk:
+                raise PermissionDenied('You can only create your own attempts')
+            # A direct create has no deadline; timed quizzes go through QuizViewSet.start
+            if quiz.time_limit:
+                raise PermissionDenied('Timed quizzes must be started through the quiz start endpoint')
+        number = allocate_attempt(serializer.validated_data['user'].pk, quiz)
+        if number is None:
+            raise PermissionDenied('No attempts left for this quiz')
+        serializer.save(attempt_number=number, **self._graded_fields(serializer))
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        # Learners answer through autosave/submit; a regraded edit would bypass the attempt limit
+        if not self._is_trainer():
+            raise PermissionDenied('Only trainers can edit attempts')
+        serializer.save(**self._graded_fields(serializer))
+
+    @action(detail=True, methods=['post'])
+    def autosave(self, request, pk=None):
+        """Buffer answers of an open session; they are written to the attempt in periodic batches.
+
+        Input: {"answers": {<question_id>: <answer>, ...}} (only changed answers are needed)
+        """
+        answers = request.data.get('answers')
+        if not isinstance(answers, dict):
+            return Response({'error': 'answers must be an object keyed by question id'}, status=400)
+        try:
+            session = open_session(uuid.UUID(str(pk)))
+        except ValueError:
+            session = None
+        if session is None or session[0] != str(request.user.pk):
+            return Response({'detail': 'Not found.'}, status=404)
+        if not accepts_answers(session[1]):
+            return Response({'error': 'Time limit exceeded'}, status=status.HTTP_409_CONFLICT)
+        autosave_buffer.add(pk, answers)
+        return Response({'buffered': len(answers)}, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['post'])
+    def submit(self, request, pk=None):
+        """Grade and close an open session. Input: {"answers": {...}} (optional, merged over autosaves)."""
+        attempt = self.get_object()
+        if attempt.user_id != request.user.pk:
+            return Response({'detail': 'You can only submit your own attempts'}, status=403)
+        answers = request.data.get('answers')
+        if answers is not None and not isinstance(answers, dict):
+            return Response({'error': 'answers must be an object keyed by question id'}, status=400)
+        attempt = submit_attempt(attempt, answers)
+        return Response(QuizAttemptSerializer(attempt).data)
+
 
 class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Leaderboard.objects.all()
     serializer_class = LeaderboardSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = LeaderboardPagination
 
     def get_queryset(self):
+        # Positions are numbered per scope (courses.leaderboard), so a list is one scope:
+        # ?course_id= for a course, the global rows otherwise (course rows are no longer mixed in)
         course_id = self.request.query_params.get('course_id')
-        queryset = Leaderboard.objects.all().order_by('rank')
+        queryset = Leaderboard.objects.select_related('user', 'course')
         if course_id:
-            queryset = queryset.filter(course_id=course_id)
+            return queryset.filter(course_id=course_id)
+        if self.action == 'list':
+            return queryset.filter(course__isnull=True)
         return queryset
 
+    @action(detail=False, methods=['get'])
+    def team(self, request):
+        """Standings of ?team_id='s members, ranked within the team."""
+        team_id = request.query_params.get('team_id')
+        if not team_id:
+            return Response({'error': 'team_id is required'}, status=400)
+        try:
+            entries = list(team_standings(team_id))
+        except ValidationError:
+            return Response({'error': 'team_id must be a UUID'}, status=400)
+        return Response([
+            {**LeaderboardSerializer(entry).data, 'team_rank': entry.team_rank} for entry in entries
+        ])
+
+    @action(detail=False, methods=['get'])
+    def rank(self, request):
+        """Rank of a user with top-K and neighbours, served from the in-memory rank index.
+
+        Query params: course_id or team_id (global board otherwise), user_id (defaults to
+        the caller), top (default 10), before/after (default 5, max 50 each).
+        """
+        params = request.query_params
+        try:
+            top = min(int(params.get('top', 10)), 100)
+            before = min(int(params.get('before', 5)), 50)
+            after = min(int(params.get('after', 5)), 50)
+        except ValueError:
+            return Response({'error': 'top, before and after must be integers'}, status=400)
+        user_id = params.get('user_id') or request.user.pk
+        entries = Leaderboard.objects.filter(course__isnull=True)
+        try:
+            if params.get('course_id'):
+                scope = course_scope(uuid.UUID(params['course_id']))
+                entries = Leaderboard.objects.filter(course_id=scope[1])
+            elif params.get('team_id'):
+                scope = team_scope(uuid.UUID(params['team_id']))
+            else:
+                scope = GLOBAL
+            points = entries.filter(user_id=user_id).values_list('total_points', flat=True).first()
+        except (ValueError, ValidationError):
+            return Response({'error': 'course_id, team_id and user_id must be UUIDs'}, status=400)
+
+        index = rank_indexes.get(scope)
+        me = index.rank_of(user_id, points) if points is not None else None
+        leaders = index.top(top)
+        around = index.window(me['position'], before, after) if me else []
+        listed = leaders + around + ([me] if me else [])
+        names = {
+            str(pk): f"{first} {last}".strip()
+            for pk, first, last in Profile.objects.filter(
+                id__in={entry['user_id'] for entry in listed}
+            ).values_list('id', 'first_name', 'last_name')
+        }
+        for entry in listed:
+            entry['user_name'] = names.get(entry['user_id'], '')
+        return Response({'total': len(index), 'me': me, 'top': leaders, 'around': around})
+
+    @action(detail=False, methods=['post'])
+    def recompute(self, request):
+        """Recompute now instead of waiting for the debounce: {"course_id": ...} or the global scope."""
+        user = request.user
+        if not (user.is_superuser or getattr(user, 'primary_role', '') == 'trainer'):
+            return Response({'detail': 'Trainer permission required'}, status=403)
+        course_id = request.data.get('course_id')
+        if course_id:
+            courses = Course.objects.all() if user.is_superuser else Course.objects.filter(created_by=user)
+            try:
+                found = courses.filter(id=course_id).exists()
+            except ValidationError:
+                return Response({'error': 'course_id must be a UUID'}, status=400)
+            if not found:
+                return Response({'error': 'Course not found'}, status=404)
+            rebuild_leaderboards([course_id])
+        else:
+            recompute_global()
+        return Response({'status': 'recomputed'})
+
+
+class BackgroundJobViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = BackgroundJob.objects.all()
+    serializer_class = BackgroundJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.is_superuser:
+            return BackgroundJob.objects.all()
+        return BackgroundJob.objects.filter(created_by=user)
+
 
 class MediaUploadViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
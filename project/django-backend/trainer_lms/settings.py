@@ -77,11 +77,68 @@ else:
         }
     }
 
+# Cache. Compiled answer keys, quiz delivery payloads, question bank id arrays and rank
+# index versions are invalidated through it, so every worker process must share it:
+# set REDIS_URL, or the PostgreSQL setup uses the database cache table (create it with
+# `python manage.py createcachetable`). The per-process memory cache is only used with
+# SQLite, i.e. a single development server.
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DB_ENGINE == 'postgresql':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # MongoDB Configuration
 MONGODB_ENABLED = config('MONGODB_ENABLED', default=False, cast=bool)
 MONGODB_URI = config('MONGODB_URI', default='mongodb://localhost:27017')
 MONGODB_DB_NAME = config('MONGODB_DB_NAME', default='lms')
 
+# Background jobs (course duplication, bulk assignment). When disabled, jobs are only
+# recorded by the web process and executed by `python manage.py run_jobs`.
+BACKGROUND_JOBS_IN_THREAD = config('BACKGROUND_JOBS_IN_THREAD', default=True, cast=bool)
+# A running job's worker renews its lease every third of this; `run_jobs --resume` only
+# takes over jobs whose lease has expired.
+BACKGROUND_JOB_LEASE_SECONDS = config('BACKGROUND_JOB_LEASE_SECONDS', default=60, cast=float)
+
+# How often buffered player progress heartbeats are written to unit_progress (0 disables
+# the background flusher; buffers are then only flushed explicitly and at exit).
+PROGRESS_HEARTBEAT_FLUSH_SECONDS = config('PROGRESS_HEARTBEAT_FLUSH_SECONDS', default=5, cast=float)
+
+# Leaderboards are recomputed at most this often after progress/quiz events (0 disables
+# the timer; use `python manage.py rebuild_leaderboards` instead).
+LEADERBOARD_DEBOUNCE_SECONDS = config('LEADERBOARD_DEBOUNCE_SECONDS', default=30, cast=float)
+
+# In-memory rank indexes (courses.rank_index): how many scopes a process keeps loaded
+# (~24 MB per million learners) and whether to load the largest ones at startup.
+LEADERBOARD_INDEX_MAX_SCOPES = config('LEADERBOARD_INDEX_MAX_SCOPES', default=32, cast=int)
+LEADERBOARD_INDEX_WARM_ON_STARTUP = config('LEADERBOARD_INDEX_WARM_ON_STARTUP', default=False, cast=bool)
+
+# Quiz sessions (courses.quiz_sessions): how often buffered autosaves are written (0
+# disables the background flusher) and how long after a time limit answers are still
+# accepted. Keep the grace above the flush interval so `sweep_quiz_attempts` sees them.
+QUIZ_AUTOSAVE_FLUSH_SECONDS = config('QUIZ_AUTOSAVE_FLUSH_SECONDS', default=10, cast=float)
+QUIZ_SUBMIT_GRACE_SECONDS = config('QUIZ_SUBMIT_GRACE_SECONDS', default=30, cast=float)
+# Item analysis of quizzes with more submitted attempts than this runs as a background
+# job; the endpoint answers 202 with the job until the report is ready.
+ITEM_ANALYSIS_SYNC_ATTEMPTS = config('ITEM_ANALYSIS_SYNC_ATTEMPTS', default=20000, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -129,7 +129,7 @@ function AppContent() {
         );
 
       case 'assign-course':
-        return <AssignCourse onNavigate={handleNavigate} />;
+        return <AssignCourse onNavigate={handleNavigate} teamId={navState.data?.teamId} />;
 
       case 'reports':
         return <Reports />;
@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { courseService } from '../services/courseService';
 import { enrollmentService } from '../services/enrollmentService';
 import { Course } from '../types';
@@ -6,6 +6,8 @@ import { UserPlus, Search, Users, BookOpen, CheckCircle, AlertCircle } from 'luc
 
 interface AssignCourseProps {
   onNavigate: (page: string, data?: any) => void;
+  // Only offer members of this team
+  teamId?: string;
 }
 
 interface CourseWithStats extends Course {
@@ -13,23 +15,35 @@ interface CourseWithStats extends Course {
   totalLearners?: number;
 }
 
-export function AssignCourse({ onNavigate }: AssignCourseProps) {
+export function AssignCourse({ onNavigate, teamId }: AssignCourseProps) {
   const [courses, setCourses] = useState<CourseWithStats[]>([]);
   const [learners, setLearners] = useState<any[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [learnersLoading, setLearnersLoading] = useState(false);
+  const [learnersError, setLearnersError] = useState<{ message: string; cursor: string | null } | null>(null);
   const [selectedCourse, setSelectedCourse] = useState<string | null>(null);
   const [selectedLearners, setSelectedLearners] = useState<string[]>([]);
   const [searchTerm, setSearchTerm] = useState('');
+  const [search, setSearch] = useState('');
   const [loading, setLoading] = useState(true);
   const [assigning, setAssigning] = useState(false);
+  // Responses to superseded requests (an older search or course) are dropped
+  const learnersRequest = useRef(0);
 
   useEffect(() => {
     loadCourses();
   }, []);
 
-  // When a course is selected, load available learners for that specific course
+  // Search is done server-side; wait for typing to pause before asking
   useEffect(() => {
-    if (selectedCourse) fetchAssignableLearners(selectedCourse);
-  }, [selectedCourse]);
+    const timer = setTimeout(() => setSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  // When a course is selected, load the first page of available learners for that specific course
+  useEffect(() => {
+    if (selectedCourse) fetchAssignableLearners(selectedCourse, null);
+  }, [selectedCourse, search, teamId]);
 
   const loadCourses = async () => {
     try {
@@ -53,21 +67,25 @@ export function AssignCourse({ onNavigate }: AssignCourseProps) {
     }
   };
 
-  const fetchAssignableLearners = async (courseId: string) => {
-    setLoading(true);
+  const fetchAssignableLearners = async (courseId: string, cursor: string | null) => {
+    const request = ++learnersRequest.current;
+    setLearnersLoading(true);
+    setLearnersError(null);
+    if (!cursor) {
+      setLearners([]);
+      setNextCursor(null);
+    }
     try {
-      const list = await courseService.getAssignableLearners(courseId);
-      setLearners(list);
-      setCourses(c => c.map(course => course.id === courseId ? { ...course, totalLearners: list.length } : course));
+      const page = await courseService.getAssignableLearners(courseId, { search, teamId, cursor });
+      if (request !== learnersRequest.current) return;
+      setLearners(current => cursor ? [...current, ...page.results] : page.results);
+      setNextCursor(page.next);
     } catch (error: any) {
+      if (request !== learnersRequest.current) return;
       console.error('Error loading learners:', error);
-      const msg = (error?.message || '').toLowerCase();
-      if (msg.includes('row-level security') || msg.includes('permission') || msg.includes('trainer token')) {
-        alert(`Failed to load learners: ${error?.message}\n\nQuick fix: ensure you're signed in as a trainer or set a DRF trainer token in localStorage.\nRun: python project/scripts/create_token_sql.py trainer_user@example.com\nThen in browser console run: localStorage.setItem("trainerToken","<token>")`);
-      }
-      setLearners([]);
+      setLearnersError({ message: error?.message || 'Failed to load learners', cursor });
     } finally {
-      setLoading(false);
+      if (request === learnersRequest.current) setLearnersLoading(false);
     }
   };
 
@@ -83,7 +101,7 @@ export function AssignCourse({ onNavigate }: AssignCourseProps) {
       alert(`Successfully assigned course to ${selectedLearners.length} learner${selectedLearners.length !== 1 ? 's' : ''}`);
       setSelectedLearners([]);
       setSelectedCourse(null);
-      loadData();
+      loadCourses();
     } catch (error) {
       console.error('Error assigning course:', error);
       alert('Failed to assign course. Please try again.');
@@ -96,10 +114,7 @@ export function AssignCourse({ onNavigate }: AssignCourseProps) {
     return new Set<string>();
   };
 
-  const filteredLearners = learners.filter(l =>
-    l.full_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    l.email.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  const allLoadedSelected = learners.length > 0 && learners.every(l => selectedLearners.includes(l.id));
 
   if (loading) {
     return (
@@ -197,26 +212,52 @@ export function AssignCourse({ onNavigate }: AssignCourseProps) {
                 />
               </div>
 
-              {filteredLearners.length === 0 ? (
-                <div className="text-center py-8 text-gray-500">
-                  <p>No learners found</p>
+              {learnersError && (
+                <div className="flex items-start gap-3 p-3 mb-4 bg-red-50 border border-red-200 rounded-lg text-sm text-red-700">
+                  <AlertCircle className="w-5 h-5 flex-shrink-0" />
+                  <div className="flex-1 min-w-0">
+                    <p className="font-medium">Could not load learners</p>
+                    <p className="break-words">{learnersError.message}</p>
+                    <p className="mt-1 text-red-600">
+                      Make sure you're signed in as a trainer, or set a DRF trainer token with{' '}
+                      <code>localStorage.setItem("trainerToken","&lt;token&gt;")</code>.
+                    </p>
+                  </div>
+                  <button
+                    onClick={() => fetchAssignableLearners(selectedCourse, learnersError.cursor)}
+                    className="px-3 py-1 bg-white border border-red-300 rounded-lg hover:bg-red-100 transition-colors font-medium"
+                  >
+                    Retry
+                  </button>
+                </div>
+              )}
+
+              {learnersLoading && learners.length === 0 ? (
+                <div className="flex items-center justify-center py-8">
+                  <div className="animate-spin rounded-full h-8 w-8 border-b-2 border-blue-600"></div>
                 </div>
+              ) : learners.length === 0 ? (
+                !learnersError && (
+                  <div className="text-center py-8 text-gray-500">
+                    <p>No learners found</p>
+                  </div>
+                )
               ) : (
                 <div className="space-y-2 max-h-[400px] overflow-y-auto">
                   <button
                     onClick={() => {
-                      if (selectedLearners.length === filteredLearners.length) {
-                        setSelectedLearners([]);
+                      if (allLoadedSelected) {
+                        setSelectedLearners(selectedLearners.filter(id => !learners.some(l => l.id === id)));
                       } else {
-                        setSelectedLearners(filteredLearners.map(l => l.id));
+                        setSelectedLearners(Array.from(new Set([...selectedLearners, ...learners.map(l => l.id)])));
                       }
                     }}
                     className="w-full text-left px-3 py-2 bg-gray-100 rounded-lg hover:bg-gray-200 transition-colors text-sm font-medium text-gray-700"
                   >
-                    {selectedLearners.length === filteredLearners.length ? 'Deselect All' : 'Select All'}
+                    {allLoadedSelected ? 'Deselect All' : 'Select All'}
                   </button>
 
-                  {filteredLearners.map((learner) => (
+                  {learners.map((learner) => (
                     <label
                       key={learner.id}
                       className="flex items-center gap-3 p-3 bg-gray-50 rounded-lg cursor-pointer hover:bg-gray-100"
@@ -239,6 +280,16 @@ export function AssignCourse({ onNavigate }: AssignCourseProps) {
                       </div>
                     </label>
                   ))}
+
+                  {nextCursor && (
+                    <button
+                      onClick={() => fetchAssignableLearners(selectedCourse, nextCursor)}
+                      disabled={learnersLoading}
+                      className="w-full px-3 py-2 border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors text-sm font-medium text-gray-700 disabled:opacity-50 disabled:cursor-not-allowed"
+                    >
+                      {learnersLoading ? 'Loading...' : 'Load more'}
+                    </button>
+                  )}
                 </div>
               )}
             </>
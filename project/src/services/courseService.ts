@@ -1,7 +1,15 @@
 import { supabase } from '../lib/supabase';
 import { Course, DashboardStats } from '../types';
 import { unitService } from './unitService';
-import { enrollmentService } from './enrollmentService';
+
+const ASSIGNABLE_PAGE_SIZE = 50;
+
+export interface AssignableLearnerFilters {
+  search?: string;
+  teamId?: string;
+  cursor?: string | null;
+  pageSize?: number;
+}
 
 async function supabaseCreateCourse(course: Partial<Course>) {
   const { data, error } = await supabase
@@ -118,19 +126,24 @@ export const courseService = {
     return data;
   },
 
-  async getAssignableLearners(courseId: string): Promise<any[]> {
+  // One cursor page of trainees not yet enrolled; pass the returned `next` back as `cursor` for the following page
+  async getAssignableLearners(courseId: string, filters: AssignableLearnerFilters = {}): Promise<{ results: any[]; next: string | null }> {
     const token = localStorage.getItem('trainerToken') || '';
-    try {
-      const resp = await fetch(`/api/trainer/v1/course/${courseId}/assignable_learners/`, {
-        headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Token ${token}` } : {}) }
-      });
-      if (resp.ok) return await resp.json();
-    } catch (e) {
-      console.warn('Trainer assignable learners endpoint failed', e);
+    const params = new URLSearchParams({ page_size: String(filters.pageSize || ASSIGNABLE_PAGE_SIZE) });
+    if (filters.search) params.set('search', filters.search);
+    if (filters.teamId) params.set('team_id', filters.teamId);
+    if (filters.cursor) params.set('cursor', filters.cursor);
+    const resp = await fetch(`/api/trainer/v1/course/${courseId}/assignable_learners/?${params.toString()}`, {
+      headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Token ${token}` } : {}) }
+    });
+    if (!resp.ok) {
+      const text = await resp.text();
+      throw new Error(`Failed to load learners (${resp.status}) ${text}`);
     }
-
-    // Fallback to Supabase learners
-    return await enrollmentService.getLearners();
+    // Cursor-paginated: { next, previous, results }
+    const data = await resp.json();
+    const next = data.next ? new URL(data.next, window.location.origin).searchParams.get('cursor') : null;
+    return { results: data.results, next };
   },
 
   async createCourse(course: Partial<Course>): Promise<Course> {
@@ -10,6 +10,12 @@ export interface CourseReport {
   averageScore: number;
 }
 
+export interface CourseReportFilters {
+  dateFrom?: string;
+  dateTo?: string;
+  teamId?: string;
+}
+
 export interface LearnerReport {
   userId: string;
   userName: string;
@@ -21,99 +27,73 @@ export interface LearnerReport {
   lastActivity: string;
 }
 
-export const reportService = {
-  async getCourseReport(courseId: string): Promise<CourseReport> {
-    const { data: course } = await supabase
-      .from('courses')
-      .select('id, title')
-      .eq('id', courseId)
-      .single();
-
-    const { data: enrollments } = await supabase
-      .from('enrollments')
-      .select('*')
-      .eq('course_id', courseId);
-
-    const totalEnrollments = enrollments?.length || 0;
-    const inProgress = enrollments?.filter(e => e.status === 'in_progress').length || 0;
-    const completed = enrollments?.filter(e => e.status === 'completed').length || 0;
-    const averageProgress = totalEnrollments > 0
-      ? enrollments!.reduce((sum, e) => sum + e.progress_percentage, 0) / totalEnrollments
-      : 0;
-
-    const { data: units } = await supabase
-      .from('units')
-      .select('id')
-      .eq('course_id', courseId)
-      .eq('type', 'quiz');
-
-    const quizUnitIds = units?.map(u => u.id) || [];
-    const { data: quizzes } = await supabase
-      .from('quizzes')
-      .select('id')
-      .in('unit_id', quizUnitIds);
-
-    const quizIds = quizzes?.map(q => q.id) || [];
-    const { data: attempts } = await supabase
-      .from('quiz_attempts')
-      .select('score')
-      .in('quiz_id', quizIds);
+function toLearnerReport(data: any): LearnerReport {
+  return {
+    userId: data.user_id,
+    userName: data.user_name,
+    email: data.email,
+    coursesEnrolled: data.courses_enrolled,
+    coursesCompleted: data.courses_completed,
+    averageProgress: data.average_progress,
+    totalQuizScore: data.total_quiz_score,
+    lastActivity: data.last_activity || ''
+  };
+}
 
-    const averageScore = attempts?.length
-      ? attempts.reduce((sum, a) => sum + a.score, 0) / attempts.length
-      : 0;
+export const reportService = {
+  async getCourseReport(courseId: string, filters: CourseReportFilters = {}): Promise<CourseReport> {
+    const token = localStorage.getItem('trainerToken') || '';
+    const params = new URLSearchParams();
+    if (filters.dateFrom) params.set('date_from', filters.dateFrom);
+    if (filters.dateTo) params.set('date_to', filters.dateTo);
+    if (filters.teamId) params.set('team_id', filters.teamId);
+    const query = params.toString();
+
+    // Aggregated server-side; the payload size does not grow with the course
+    const resp = await fetch(`/api/trainer/v1/course/${courseId}/report/${query ? `?${query}` : ''}`, {
+      headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Token ${token}` } : {}) }
+    });
+    if (!resp.ok) {
+      throw new Error(`Failed to load course report (${resp.status})`);
+    }
+    const data = await resp.json();
 
     return {
-      courseId: course?.id || '',
-      courseTitle: course?.title || '',
-      totalEnrollments,
-      inProgress,
-      completed,
-      averageProgress: Math.round(averageProgress),
-      averageScore: Math.round(averageScore)
+      courseId: data.course_id,
+      courseTitle: data.course_title,
+      totalEnrollments: data.total_enrollments,
+      inProgress: data.in_progress,
+      completed: data.completed,
+      averageProgress: data.average_progress,
+      averageScore: data.average_score
     };
   },
 
   async getLearnerReport(userId: string): Promise<LearnerReport> {
-    const { data: profile } = await supabase
-      .from('profiles')
-      .select('*')
-      .eq('id', userId)
-      .single();
-
-    const { data: enrollments } = await supabase
-      .from('enrollments')
-      .select('*')
-      .eq('user_id', userId);
-
-    const coursesEnrolled = enrollments?.length || 0;
-    const coursesCompleted = enrollments?.filter(e => e.status === 'completed').length || 0;
-    const averageProgress = coursesEnrolled > 0
-      ? enrollments!.reduce((sum, e) => sum + e.progress_percentage, 0) / coursesEnrolled
-      : 0;
-
-    const { data: attempts } = await supabase
-      .from('quiz_attempts')
-      .select('score')
-      .eq('user_id', userId);
-
-    const totalQuizScore = attempts?.reduce((sum, a) => sum + a.score, 0) || 0;
-
-    const lastActivity = enrollments?.sort((a, b) =>
-      new Date(b.started_at || b.assigned_at).getTime() -
-      new Date(a.started_at || a.assigned_at).getTime()
-    )[0]?.started_at || enrollments?.[0]?.assigned_at || '';
+    const token = localStorage.getItem('trainerToken') || '';
+    const resp = await fetch(`/api/trainer/v1/learner/${userId}/report/`, {
+      headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Token ${token}` } : {}) }
+    });
+    if (!resp.ok) {
+      throw new Error(`Failed to load learner report (${resp.status})`);
+    }
+    return toLearnerReport(await resp.json());
+  },
 
-    return {
-      userId: profile?.id || '',
-      userName: profile?.full_name || '',
-      email: profile?.email || '',
-      coursesEnrolled,
-      coursesCompleted,
-      averageProgress: Math.round(averageProgress),
-      totalQuizScore,
-      lastActivity
-    };
+  async getTeamReport(teamId: string, cursor?: string): Promise<{ results: LearnerReport[]; next: string | null }> {
+    const token = localStorage.getItem('trainerToken') || '';
+    const params = new URLSearchParams({ team_id: teamId });
+    if (cursor) params.set('cursor', cursor);
+    const resp = await fetch(`/api/trainer/v1/team-report/?${params.toString()}`, {
+      headers: { 'Content-Type': 'application/json', ...(token ? { 'Authorization': `Token ${token}` } : {}) }
+    });
+    if (!resp.ok) {
+      throw new Error(`Failed to load team report (${resp.status})`);
+    }
+    // Cursor-paginated: { next, previous, results }
+    const data = await resp.json();
+    const next = data.next ? new URL(data.next, window.location.origin).searchParams.get('cursor') : null;
+    return { results: data.results.map(toLearnerReport), next };
   },
 
   async exportCourseReportCSV(courseId: string): Promise<string> {